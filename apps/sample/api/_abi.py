@@ -0,0 +1,255 @@
+"""
+Local ABI cache for Etherscan ABI references in descriptors.
+
+ABIs are stored content-addressed on disk (one file per ABI, named by the hash
+of its canonical JSON) with a small reference file per chain id and contract
+address pointing at it, so contracts sharing an ABI share one object. The
+store can be pre-seeded from a directory of ABI JSON files laid out as
+`<chain_id>/<address>.json`.
+
+`AbiInliner` replaces Etherscan `getabi` URLs in a descriptor with the ABI
+itself before validation, so conversions never fetch ABIs over the network.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from _cache import LRUCache, canonical_hash
+from _transform import Container, ETHERSCAN_V2_API_URL, JsonVisitor
+from _upstream import QueryParams, UpstreamError
+
+Abi = List[Dict[str, Any]]
+
+ADDRESS_PATTERN = re.compile(r"0x[0-9a-fA-F]{40}")
+
+
+class AbiNotCachedError(ValueError):
+    """
+    An ABI is missing from the local cache and fetching it is not allowed.
+    """
+
+
+def is_valid_reference(chain_id: str, address: str) -> bool:
+    """
+    Whether a chain id (decimal digits) and contract address (0x + 40 hex
+    digits) are well-formed, and therefore safe to use in store paths.
+    """
+    return chain_id.isascii() and chain_id.isdigit() and ADDRESS_PATTERN.fullmatch(address) is not None
+
+
+class AbiStore:
+    """
+    Content-addressed on-disk ABI store keyed by chain id and contract address.
+    Parsed ABIs are also kept in a bounded in-memory LRU by content hash.
+    """
+
+    def __init__(self, directory: str, memory_size: int = 256) -> None:
+        self.directory = directory
+        self._memory: LRUCache[str, Abi] = LRUCache(memory_size)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.json")
+
+    def _ref_path(self, chain_id: str, address: str) -> str:
+        if not is_valid_reference(chain_id, address):
+            raise ValueError(f"Invalid ABI reference: chain {chain_id!r}, address {address!r}")
+        return os.path.join(self.directory, "refs", chain_id, address.lower())
+
+    def get(self, chain_id: str, address: str) -> Optional[Abi]:
+        if not is_valid_reference(chain_id, address):
+            return None
+        try:
+            with open(self._ref_path(chain_id, address), "r", encoding="utf-8") as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+
+        abi = self._memory.get(digest)
+        if abi is not None:
+            return abi
+        try:
+            with open(self._object_path(digest), "r", encoding="utf-8") as f:
+                abi = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._memory.set(digest, abi)
+        return abi
+
+    def put(self, chain_id: str, address: str, abi: Abi) -> str:
+        """
+        Store an ABI and point the chain id/address reference at it.
+        Returns the content hash of the ABI. Raises ValueError for a malformed
+        chain id or address.
+        """
+        ref_path = self._ref_path(chain_id, address)
+        digest = canonical_hash(abi)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            _atomic_write(object_path, json.dumps(abi, separators=(",", ":")))
+        _atomic_write(ref_path, digest)
+        self._memory.set(digest, abi)
+        return digest
+
+    def seed(self, directory: str) -> int:
+        """
+        Import every `<chain_id>/<address>.json` file of `directory`, either a bare
+        ABI array or a raw Etherscan getabi response. Returns the number imported
+        (0 when `directory` does not exist).
+        """
+        count = 0
+        if not os.path.isdir(directory):
+            return count
+        for chain_id in sorted(os.listdir(directory)):
+            chain_dir = os.path.join(directory, chain_id)
+            if not os.path.isdir(chain_dir):
+                continue
+            for filename in sorted(os.listdir(chain_dir)):
+                address, extension = os.path.splitext(filename)
+                if extension != ".json":
+                    continue
+                with open(os.path.join(chain_dir, filename), "r", encoding="utf-8") as f:
+                    abi = parse_abi_payload(json.load(f))
+                if abi is None:
+                    raise ValueError(f"Invalid ABI file: {os.path.join(chain_dir, filename)}")
+                self.put(chain_id, address, abi)
+                count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {"directory": self.directory, "memory": self._memory.stats()}
+
+
+def _atomic_write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def parse_abi_payload(payload: Any) -> Optional[Abi]:
+    """
+    Extract the ABI from a bare ABI array or an Etherscan getabi response, whose
+    `result` is the ABI encoded as a JSON string. Returns None when there is none
+    (e.g. an Etherscan rate-limit or "not verified" answer).
+    """
+    if isinstance(payload, dict):
+        if str(payload.get("status")) != "1" or not isinstance(payload.get("result"), str):
+            return None
+        try:
+            payload = json.loads(payload["result"])
+        except ValueError:
+            return None
+    if isinstance(payload, list) and all(isinstance(entry, dict) for entry in payload):
+        return payload
+    return None
+
+
+def parse_etherscan_abi_url(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Return the (chain id, lowercase address) an Etherscan v2 getabi URL refers to,
+    or None for any other URL.
+    """
+    if not url.startswith(ETHERSCAN_V2_API_URL):
+        return None
+    params = dict(parse_qsl(urlsplit(url).query))
+    if params.get("module") != "contract" or params.get("action") != "getabi" or not params.get("address"):
+        return None
+    return params.get("chainid", "1"), params["address"].lower()
+
+
+class AbiResolver:
+    """
+    Serve ABIs referenced by Etherscan URLs from an `AbiStore`.
+
+    On a miss the ABI is fetched with `fetch(path, params)` and stored, unless
+    `offline` is set, in which case `AbiNotCachedError` is raised immediately.
+    The optional seed directory is imported once, on first use.
+    """
+
+    def __init__(
+        self,
+        store: AbiStore,
+        fetch: Callable[[str, QueryParams], Any],
+        offline: bool = False,
+        seed_directory: Optional[str] = None,
+    ) -> None:
+        self.store = store
+        self._fetch = fetch
+        self.offline = offline
+        self._seed_directory = seed_directory
+        self._seeded = seed_directory is None
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "fetched": 0, "fetch_errors": 0, "seeded": 0}
+
+    def _ensure_seeded(self) -> None:
+        if self._seeded:
+            return
+        with self._lock:
+            if not self._seeded:
+                self.counters["seeded"] = self.store.seed(self._seed_directory)
+                self._seeded = True
+
+    def resolve_url(self, url: str) -> Optional[Abi]:
+        """
+        Return the ABI an Etherscan getabi URL refers to, or None when the URL is
+        not a getabi URL or the ABI could not be fetched (the URL is then left for
+        the descriptor library to resolve as before).
+        """
+        reference = parse_etherscan_abi_url(url)
+        if reference is None or not is_valid_reference(*reference):
+            return None
+        self._ensure_seeded()
+        chain_id, address = reference
+
+        abi = self.store.get(chain_id, address)
+        if abi is not None:
+            self.counters["hits"] += 1
+            return abi
+        if self.offline:
+            raise AbiNotCachedError(
+                f"ABI for contract {address} on chain {chain_id} is not in the local ABI cache "
+                "and offline mode is enabled"
+            )
+
+        parts = urlsplit(url)
+        try:
+            abi = parse_abi_payload(self._fetch(parts.path, parse_qsl(parts.query)))
+        except UpstreamError:
+            abi = None
+        if abi is None:
+            self.counters["fetch_errors"] += 1
+            return None
+        self.store.put(chain_id, address, abi)
+        self.counters["fetched"] += 1
+        return abi
+
+    def stats(self) -> Dict[str, Any]:
+        return {"offline": self.offline, **self.counters, "store": self.store.stats()}
+
+
+class AbiInliner(JsonVisitor):
+    """
+    Replace Etherscan getabi URLs in `abi` fields with the ABI from the resolver.
+    Must run after `EtherscanUrlNormalizer`, which upgrades legacy URLs to v2.
+    """
+
+    leaf_types = (str,)
+
+    def __init__(self, resolver: AbiResolver) -> None:
+        self._resolver = resolver
+
+    def enter(self, key: Any, value: Container) -> bool:
+        # `abi` URLs only appear in `context.contract`: display formats,
+        # metadata and already inlined ABIs are not walked for this visitor
+        return key in (0, "context", "contract")
+
+    def visit_leaf(self, container: Container, key: Any, value: Any) -> Any:
+        if key != "abi" or not isinstance(container, dict):
+            return value
+        abi = self._resolver.resolve_url(value)
+        return abi if abi is not None else value
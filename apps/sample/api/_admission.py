@@ -0,0 +1,317 @@
+"""
+Workload isolation and admission control.
+
+Routes are grouped into workload classes, each with its own concurrency limit
+and bounded queue. A request that finds its class's queue full is rejected
+right away with `Overloaded` (mapped to 429/503 + Retry-After) instead of
+waiting behind other work. CPU-bound conversions can run in a dedicated
+process pool, so their pure-Python signing and validation no longer hold the
+GIL of the process serving the latency-sensitive proxy routes.
+"""
+import asyncio
+import math
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from _metrics import Counter, Gauge, Histogram, register, stage
+
+T = TypeVar("T")
+
+QUEUE_DEPTH = register(Gauge(
+    "api_workload_queue_depth", "Requests waiting for a slot, by workload class.", ["workload"]
+))
+RUNNING = register(Gauge(
+    "api_workload_running", "Requests holding a slot, by workload class.", ["workload"]
+))
+REJECTED = register(Counter(
+    "api_workload_rejected_total", "Requests rejected because the queue was full, by workload class.", ["workload"]
+))
+QUEUE_WAIT = register(Histogram(
+    "api_workload_queue_wait_seconds", "Time spent waiting for a slot, by workload class.", ["workload"]
+))
+
+
+class Overloaded(Exception):
+    """
+    A workload class is saturated; the client should retry after `retry_after` seconds.
+    """
+
+    def __init__(self, workload: str, status: int, retry_after: int) -> None:
+        super().__init__(f"Server busy ({workload} queue is full), retry in {retry_after}s")
+        self.workload = workload
+        self.status = status
+        self.retry_after = retry_after
+
+
+# A pool that keeps breaking (workers killed, e.g. out of memory) is given up
+# after this many restarts; its callers then run their work in-process
+MAX_POOL_RESTARTS = 3
+
+
+class ProcessPool:
+    """
+    A spawn process pool of `workers` processes, created on first use.
+
+    `get` returns None, meaning the caller runs the work itself, when the pool
+    is not `enabled`, in a pool worker process (pools are never nested) or
+    when processes cannot be created. After a
+    `BrokenProcessPool`, callers `discard` the broken pool; the next `get`
+    creates a new one, up to MAX_POOL_RESTARTS times.
+    """
+
+    def __init__(self, workers: int, enabled: bool = True) -> None:
+        self.workers = max(1, workers)
+        self.enabled = enabled
+        self.restarts = 0
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Executor]:
+        if not self.enabled or multiprocessing.parent_process() is not None:
+            return None
+        with self._lock:
+            if self._pool is None:
+                try:
+                    # spawn: forking a threaded Flask worker is unsafe
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                except (OSError, NotImplementedError):
+                    # Some serverless sandboxes do not allow creating processes
+                    self.enabled = False
+                    return None
+            return self._pool
+
+    def discard(self, pool: Executor) -> None:
+        """
+        Drop `pool` after it broke, unless it was already replaced.
+        """
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.restarts += 1
+            if self.restarts > MAX_POOL_RESTARTS:
+                self.enabled = False
+        pool.shutdown(wait=False)
+
+    @property
+    def active(self) -> bool:
+        return self._pool is not None
+
+
+class Workload:
+    """
+    One workload class: at most `concurrency` requests run at a time and at
+    most `max_queue` more wait for a slot; beyond that, requests are rejected
+    with `reject_status`.
+
+    With `processes` set, `run` executes the function in a `ProcessPool` of
+    `concurrency` workers (falling back to the calling thread when processes
+    cannot be created or the pool broke); otherwise it runs in the calling
+    thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        max_queue: int,
+        reject_status: int = 503,
+        processes: bool = False,
+    ) -> None:
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.reject_status = reject_status
+        self.processes = processes
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.pool = ProcessPool(self.concurrency, enabled=processes)
+        # Moving average of the time a request holds a slot, for Retry-After
+        self._service_seconds = 0.0
+        self.rejected = 0
+
+    def retry_after(self) -> int:
+        """
+        Seconds until a slot is likely to free up, from the queue length and the
+        average service time (at least one second).
+        """
+        waiting = max(0, self._pending - self.concurrency) + 1
+        return max(1, math.ceil(self._service_seconds * waiting / self.concurrency))
+
+    def _admit(self, count: int = 1) -> float:
+        """
+        Queue `count` units of work, each later started with `_start` (or
+        dropped with `_abandon`) and finished with `_finish`.
+        """
+        with self._lock:
+            if self._pending >= self.concurrency + self.max_queue:
+                self.rejected += 1
+                REJECTED.inc(self.name)
+                raise Overloaded(self.name, self.reject_status, self.retry_after())
+            self._pending += count
+        QUEUE_DEPTH.inc(self.name, amount=count)
+        return time.perf_counter()
+
+    def _abandon(self) -> None:
+        QUEUE_DEPTH.dec(self.name)
+        with self._lock:
+            self._pending -= 1
+
+    def _start(self, enqueued: float) -> float:
+        started = time.perf_counter()
+        QUEUE_DEPTH.dec(self.name)
+        QUEUE_WAIT.observe(started - enqueued, self.name)
+        RUNNING.inc(self.name)
+        return started
+
+    def _finish(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        RUNNING.dec(self.name)
+        with self._lock:
+            self._pending -= 1
+            self._service_seconds = elapsed if not self._service_seconds else (
+                0.8 * self._service_seconds + 0.2 * elapsed
+            )
+
+    def _acquire(self, enqueued: float) -> float:
+        """
+        Wait for a slot for one admitted unit of work.
+        """
+        try:
+            with stage(f"{self.name}_queue"):
+                self._slots.acquire()
+        except BaseException:
+            self._abandon()
+            raise
+        return self._start(enqueued)
+
+    def _release(self, started: float) -> None:
+        self._slots.release()
+        self._finish(started)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Admit a request of this class and hold one of its slots while the
+        enclosed work runs. Raises `Overloaded` when the queue is full.
+        """
+        started = self._acquire(self._admit())
+        try:
+            yield
+        finally:
+            self._release(started)
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """
+        `slot` for coroutines: waiting for a slot does not block the event
+        loop. Admission (queue length, rejections, Retry-After) is shared with
+        `slot`; coroutines have their own `concurrency` running slots.
+        """
+        enqueued = self._admit()
+        try:
+            if self._async_slots is None:
+                self._async_slots = asyncio.Semaphore(self.concurrency)
+            with stage(f"{self.name}_queue"):
+                await self._async_slots.acquire()
+        except BaseException:
+            self._abandon()
+            raise
+        started = self._start(enqueued)
+        try:
+            yield
+        finally:
+            self._async_slots.release()
+            self._finish(started)
+
+    def run(self, fn: Callable[..., T], *args: Any, inline: bool = False) -> T:
+        """
+        Run `fn(*args)` in a slot of this class (see `slot`). `inline` forces the
+        calling thread, e.g. for work that needs request state or already fans
+        out to its own pool. In a process pool, `fn` and its arguments/result
+        must be picklable.
+        """
+        with self.slot():
+            return self._call(fn, args, inline)
+
+    def _call(self, fn: Callable[..., T], args: Tuple[Any, ...], inline: bool = False) -> T:
+        """
+        `fn(*args)` in the process pool when enabled, else in the calling thread.
+        Exceptions raised by `fn` propagate; failures of the pool itself fall
+        back to the calling thread.
+        """
+        pool = None if inline else self.pool.get()
+        if pool is None:
+            return fn(*args)
+        try:
+            future = pool.submit(fn, *args)
+        except RuntimeError:
+            # The pool was shut down, e.g. discarded by another request after it broke
+            return fn(*args)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died: replace the pool and run this one here
+            self.pool.discard(pool)
+        except pickle.PicklingError:
+            # The work or its result cannot be sent between processes
+            pass
+        return fn(*args)
+
+    def map(self, fn: Callable[..., T], items: List[Any]) -> List[T]:
+        """
+        `fn` applied to each of `items`, spread over the process pool when
+        enabled (see `run`). The items are admitted together, so a batch is
+        not rejected for being larger than the queue, but each one waits for
+        and holds its own slot while it runs: a batch never occupies more
+        pool workers than it holds slots.
+        """
+        if not items:
+            return []
+        enqueued = self._admit(len(items))
+
+        def call(item: Any) -> T:
+            started = self._acquire(enqueued)
+            try:
+                return self._call(fn, (item,))
+            finally:
+                self._release(started)
+
+        if len(items) > 1 and self.pool.get() is not None:
+            with ThreadPoolExecutor(max_workers=min(len(items), self.concurrency)) as threads:
+                return list(threads.map(call, items))
+        results: List[T] = []
+        try:
+            for item in items:
+                results.append(call(item))
+        except BaseException:
+            # The items after the failed one never start
+            for _ in range(len(items) - len(results) - 1):
+                self._abandon()
+            raise
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "running": min(pending, self.concurrency),
+            "queued": max(0, pending - self.concurrency),
+            "rejected": self.rejected,
+            "avg_service_seconds": round(self._service_seconds, 6),
+            "executor": "process" if self.pool.active else "inline",
+            "pool_restarts": self.pool.restarts,
+        }
@@ -0,0 +1,332 @@
+"""
+ASGI serving mode.
+
+    pip install -r requirements.txt
+    uvicorn --app-dir api _asgi:app
+
+The I/O-bound routes (certificates, dynamic descriptor proxy and its batch
+variant) run as coroutines: metadata service requests are made with aiohttp over
+at most METADATA_SERVICE_MAX_CONCURRENCY connections, so a single process holds
+hundreds of concurrent proxy requests without a thread each. Every other route
+is served by the Flask app in a thread pool of ASGI_WSGI_THREADS threads, so
+descriptor processing (itself handed to the conversion workload) never blocks
+the event loop. Route paths, response bodies, status codes and compression are
+the same as in the WSGI mode, and both modes share the same caches and I/O
+workload admission (503 + Retry-After when its queue is full), request metrics
+and Server-Timing stages. Request bodies are read in full before being handled,
+and rejected with 413 beyond ASGI_MAX_BODY_BYTES. With an upstream cassette (see
+`_cassette`), metadata service calls go through the recording/replaying requests
+client in the thread pool instead.
+"""
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+import index
+from _admission import Overloaded
+from _encoding import compress_response, json_response
+from _metrics import IN_FLIGHT, collect_stages, record_request, stage
+from _upstream import AsyncUpstreamClient, UpstreamError
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Threads running the Flask app and the CPU-bound work of the async routes
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+_executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix="asgi-wsgi")
+# Largest request body accepted, on every route
+ASGI_MAX_BODY_BYTES = int(os.getenv("ASGI_MAX_BODY_BYTES", str(32 * 1024 * 1024)))
+
+PROXY_PREFIX = "/api/dynamic-descriptor-proxy/"
+
+metadata_service = AsyncUpstreamClient(
+    index.metadata_service_client,
+    int(os.getenv("METADATA_SERVICE_MAX_CONCURRENCY", "256")),
+    executor=_executor,
+)
+
+
+class RequestTooLarge(Exception):
+    """
+    The request body is larger than ASGI_MAX_BODY_BYTES.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(f"Request body too large (max {ASGI_MAX_BODY_BYTES} bytes)")
+
+
+async def _read_body(scope: Scope, receive: Receive) -> bytes:
+    """
+    Read the whole request body. Raises `RequestTooLarge` as soon as the
+    declared or received length exceeds ASGI_MAX_BODY_BYTES.
+    """
+    for name, value in scope["headers"]:
+        if name == b"content-length" and value.isdigit() and int(value) > ASGI_MAX_BODY_BYTES:
+            raise RequestTooLarge()
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > ASGI_MAX_BODY_BYTES:
+            raise RequestTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _send_response(
+    send: Send,
+    scope: Scope,
+    body: Any,
+    status: int,
+    route: str,
+    started: float,
+    headers: Optional[Dict[str, str]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> None:
+    """
+    Send a JSON response encoded and compressed as the Flask app would, and
+    record its metrics, with the stage `timings` in its Server-Timing header.
+    """
+    server_timing = record_request(route, status, time.perf_counter() - started, timings or {})
+    response = json_response(body, status)
+    response.headers.update(headers or {})
+    response.headers["Server-Timing"] = server_timing
+    accept_encoding = ""
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            accept_encoding = value.decode("latin-1")
+    response = compress_response(response, accept_encoding)
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response.headers.items()],
+    })
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+async def get_certificates() -> Tuple[Any, int]:
+    """
+    Async /api/certificates. Certificates are served from memory and
+    revalidated in the background, so only the very first fetch (or snapshot
+    load) is waited for, in the thread pool.
+    """
+    certificates_cache = index.certificates_cache
+    try:
+        if certificates_cache.loaded:
+            return certificates_cache.get(), 200
+        # In a copy of this context, so the fetch stages are recorded for this request
+        return await asyncio.get_running_loop().run_in_executor(
+            _executor, contextvars.copy_context().run, certificates_cache.get
+        ), 200
+    except requests.RequestException as e:
+        return {"error": f"Failed to fetch certificates: {str(e)}"}, 502
+    except ValueError as e:
+        return {"error": str(e)}, 500
+    except Exception as e:
+        return {"error": f"Failed to process certificates: {str(e)}"}, 500
+
+
+async def dynamic_descriptor_proxy(subpath: str, query: str) -> Tuple[Any, int]:
+    """
+    Async /api/dynamic-descriptor-proxy/<subpath> (see `index.dynamic_descriptor_proxy`).
+    """
+    params = parse_qsl(query, keep_blank_values=True)
+    try:
+        with stage("metadata_fetch"):
+            if index.upstream_cassette is not None:
+                # Recorded/replayed traffic goes through the requests-based client
+                return await asyncio.get_running_loop().run_in_executor(
+                    _executor, index.metadata_service_client.get_json, subpath, params
+                ), 200
+            return await metadata_service.get_json(subpath, params), 200
+    except UpstreamError as e:
+        return {"error": e.message}, e.status
+    except ValueError:
+        return {"error": "Failed to re-sign descriptor."}, 500
+
+
+async def _fetch_dynamic_descriptor_item(item: Any) -> Dict[str, Any]:
+    if not isinstance(item, str) or not item.strip("/"):
+        return {"status": 400, "error": "Expected a metadata service path"}
+    parts = urlsplit(item)
+    result, status = await dynamic_descriptor_proxy(parts.path, parts.query)
+    if status != 200:
+        return {"status": status, **result}
+    return {"status": 200, "data": result}
+
+
+async def dynamic_descriptor_proxy_batch(scope: Scope, receive: Receive) -> Tuple[Any, int]:
+    """
+    Async /api/dynamic-descriptor-proxy-batch; the paths are fetched
+    concurrently within the metadata service concurrency limit.
+    """
+    try:
+        request_data = json.loads(await _read_body(scope, receive))
+    except RequestTooLarge as e:
+        return {"error": str(e)}, 413
+    except ValueError:
+        request_data = None
+    paths = request_data.get("paths") if isinstance(request_data, dict) else None
+    if not isinstance(paths, list):
+        return {"error": "Expected a JSON object with a 'paths' array"}, 400
+    if len(paths) > index.DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS:
+        return {"error": f"Too many paths (max {index.DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS})"}, 400
+
+    results = await asyncio.gather(*(_fetch_dynamic_descriptor_item(path) for path in paths))
+    for path, result in zip(paths, results):
+        result["path"] = path
+    return {"results": results}, 200
+
+
+def _async_route(scope: Scope, receive: Receive) -> Optional[Tuple[str, Coroutine[Any, Any, Tuple[Any, int]]]]:
+    """
+    Match a request against the async routes: (Flask endpoint name, handler
+    coroutine), or None for routes served by the Flask app.
+    """
+    method, path = scope["method"], scope["path"]
+    if method == "GET" and path == "/api/certificates":
+        return "get_certificates", get_certificates()
+    if method == "GET" and path.startswith(PROXY_PREFIX) and len(path) > len(PROXY_PREFIX):
+        query = scope.get("query_string", b"").decode("latin-1")
+        return "dynamic_descriptor_proxy", dynamic_descriptor_proxy(path[len(PROXY_PREFIX):], query)
+    if method == "POST" and path == "/api/dynamic-descriptor-proxy-batch":
+        return "dynamic_descriptor_proxy_batch", dynamic_descriptor_proxy_batch(scope, receive)
+    return None
+
+
+def _wsgi_environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        # WSGI carries the decoded path as latin-1 code points
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name, value = raw_name.decode("latin-1").upper().replace("-", "_"), raw_value.decode("latin-1")
+        if name == "TRANSFER_ENCODING":
+            continue
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # The body is read in full and de-chunked, so every request has a length
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+async def _call_flask(scope: Scope, receive: Receive, send: Send) -> None:
+    """
+    Serve a request with the Flask app in the thread pool. Streamed responses
+    (e.g. NDJSON) are forwarded chunk by chunk.
+    """
+    started_at = time.perf_counter()
+    try:
+        body = await _read_body(scope, receive)
+    except RequestTooLarge as e:
+        # Rejected before Flask resolved an endpoint
+        await _send_response(send, scope, {"error": str(e)}, 413, "unmatched", started_at)
+        return
+    environ = _wsgi_environ(scope, body)
+    loop = asyncio.get_running_loop()
+    started: Dict[str, Any] = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable[[bytes], None]:
+        started["status"], started["headers"] = int(status.split(" ", 1)[0]), headers
+        return lambda data: None
+
+    def run() -> Tuple[Any, Any]:
+        result = index.app(environ, start_response)
+        return result, iter(result)
+
+    result, chunks = await loop.run_in_executor(_executor, run)
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": started["status"],
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in started["headers"]],
+        })
+        while True:
+            chunk = await loop.run_in_executor(_executor, next, chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            await loop.run_in_executor(_executor, close)
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await metadata_service.close()
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    """
+    ASGI entry point.
+    """
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    route = _async_route(scope, receive)
+    if route is None:
+        await _call_flask(scope, receive, send)
+        return
+
+    name, handler = route
+    started = time.perf_counter()
+    IN_FLIGHT.inc(name)
+    with collect_stages() as timings:
+        try:
+            # Same admission as the WSGI routes: the I/O workload class
+            async with index.io_workload.async_slot():
+                body, status = await handler
+            headers = None
+        except Overloaded as e:
+            handler.close()
+            body, status, headers = {"error": str(e)}, e.status, {"Retry-After": str(e.retry_after)}
+    try:
+        await _send_response(send, scope, body, status, name, started, headers, timings)
+    finally:
+        IN_FLIGHT.dec(name)
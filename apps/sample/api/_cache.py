@@ -0,0 +1,589 @@
+import hashlib
+import json
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+def canonical_hash(data: Any, namespace: str = "") -> str:
+    """
+    SHA-256 of the canonical JSON encoding of `data` (sorted keys, no whitespace),
+    optionally salted with a namespace.
+    """
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{namespace}\n{encoded}".encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC, Generic[K, V]):
+    """
+    Storage behind every cache of the API: a bounded mapping whose entries
+    optionally expire. `LRUCache` keeps entries in the process; `SQLiteCache`
+    shares them between all worker processes of a node. `make_cache` picks
+    one according to CACHE_BACKEND.
+    """
+
+    @abstractmethod
+    def get(self, key: K, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: K, value: V) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class LRUCache(CacheBackend[K, V]):
+    """
+    Thread-safe bounded LRU mapping with hit/miss counters.
+    Entries optionally expire `ttl` seconds after being set.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (self._ttl is not None and entry[0] <= time.monotonic()):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        if self._max_size <= 0:
+            return
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "max_size": self._max_size,
+                "ttl": self._ttl,
+            }
+
+
+class SQLiteCache(CacheBackend[Hashable, Any]):
+    """
+    Size-bounded cache in a SQLite database (WAL mode) shared by every process
+    on the node. Several caches live in one database, separated by `namespace`.
+
+    Keys are stored as their JSON encoding (tuples become arrays). Values are
+    JSON-encoded, or stored as-is when `binary` is set (for bytes values).
+    Rows are kept in rowid order of last use, so entries past `max_size` are
+    evicted least recently used first with a rowid range delete. To keep reads
+    from taking the write lock, a hit only moves its row to the end when it
+    was last used more than ACCESS_RESOLUTION seconds ago. SQLite errors are
+    treated as misses: the cache is best effort, like DiskCache.
+    """
+
+    # Seconds within which repeated hits on an entry do not refresh its position
+    ACCESS_RESOLUTION = 60.0
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        max_size: int,
+        ttl: Optional[float] = None,
+        binary: bool = False,
+    ) -> None:
+        self._path = path
+        self._namespace = namespace
+        self._max_size = max_size
+        self._ttl = ttl
+        self._binary = binary
+        self._local = threading.local()
+        # Guards the hit/miss counters, which every thread updates
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            # Ordered by rowid within a namespace, for eviction
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_order ON cache (namespace)")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"), default=lambda value: value.hex())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        encoded_key = self._encode_key(key)
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?",
+                (self._namespace, encoded_key),
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                connection.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key = ?", (self._namespace, encoded_key)
+                )
+                row = None
+            if row is not None and row[2] < now - self.ACCESS_RESOLUTION:
+                connection.execute(
+                    "UPDATE cache SET rowid = (SELECT IFNULL(MAX(rowid), 0) + 1 FROM cache), accessed_at = ?"
+                    " WHERE namespace = ? AND key = ?",
+                    (now, self._namespace, encoded_key),
+                )
+        except sqlite3.Error:
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return default
+        return bytes(row[0]) if self._binary else json.loads(row[0])
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self._max_size <= 0:
+            return
+        now = time.time()
+        encoded = value if self._binary else json.dumps(value, separators=(",", ":")).encode("utf-8")
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self._namespace, self._encode_key(key), encoded,
+                 now + self._ttl if self._ttl is not None else None, now),
+            )
+            excess = connection.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self._namespace,)
+            ).fetchone()[0] - self._max_size
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND rowid <= ("
+                    " SELECT rowid FROM cache WHERE namespace = ? ORDER BY rowid LIMIT 1 OFFSET ?)",
+                    (self._namespace, self._namespace, excess - 1),
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache WHERE namespace = ?", (self._namespace,))
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        try:
+            row = self._connection().execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self._namespace,)
+            ).fetchone()
+        except sqlite3.Error:
+            return 0
+        return row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "backend": "sqlite",
+            "hits": hits,
+            "misses": misses,
+            "size": len(self),
+            "max_size": self._max_size,
+            "ttl": self._ttl,
+        }
+
+
+# CACHE_BACKEND=sqlite shares every API cache between the worker processes of a
+# node through the SQLite database at CACHE_SQLITE_PATH; "memory" (the default)
+# keeps one cache per process
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH") or os.path.join(tempfile.gettempdir(), "erc7730-api-cache.sqlite3")
+
+
+def make_cache(namespace: str, max_size: int, ttl: Optional[float] = None, binary: bool = False) -> CacheBackend:
+    """
+    Create a cache on the configured backend. `namespace` separates caches that
+    share a backend; `binary` marks caches whose values are bytes.
+    """
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCache(CACHE_SQLITE_PATH, namespace, max_size, ttl, binary)
+    if CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+    return LRUCache(max_size, ttl)
+
+
+class DiskCache:
+    """
+    JSON values stored one file per key under a directory, sharded by key prefix.
+    Writes are atomic (temporary file + rename) so concurrent processes never read
+    a partially written entry.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Any:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best effort: a read-only or full disk only costs recomputation
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "directory": self._directory}
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into a single computation.
+    Followers wait for the leader and receive its result or exception.
+    """
+
+    class _Call:
+        def __init__(self) -> None:
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, compute: Callable[[], V]) -> V:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class ResultCache:
+    """
+    Two-tier (memory LRU or another `memory` backend, optional disk) cache of
+    JSON-serializable results keyed by content hash, with single-flight
+    computation on misses.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        directory: Optional[str] = None,
+        memory: Optional[CacheBackend[str, Any]] = None,
+    ) -> None:
+        self.memory: CacheBackend[str, Any] = memory if memory is not None else LRUCache(max_size)
+        self.disk = DiskCache(directory) if directory else None
+        self._flight = SingleFlight()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        def load() -> Any:
+            if self.disk is not None:
+                stored = self.disk.get(key)
+                if stored is not None:
+                    self.memory.set(key, stored)
+                    return stored
+            computed = compute()
+            self.memory.set(key, computed)
+            if self.disk is not None:
+                self.disk.set(key, computed)
+            return computed
+
+        return self._flight.do(key, load)
+
+    def get(self, key: str) -> Any:
+        """
+        Return a cached result from either tier without computing it, or None.
+        """
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+            "single_flight_shared": self._flight.shared,
+        }
+
+
+class RevalidatingValue:
+    """
+    A single upstream value kept fresh for `ttl` seconds, then served stale while a
+    background refresh revalidates it with the validators (ETag/Last-Modified)
+    returned by the previous fetch. The last good value is persisted to
+    `snapshot_path` and used when the upstream cannot be reached.
+
+    `fetch(validators)` returns `(value, validators)` for a new value, or None when
+    the upstream confirmed the current value is still valid (HTTP 304).
+
+    With a `shared` backend, every fetch is published to it and a refresh first
+    adopts a value another process fetched less than `ttl` seconds ago.
+    """
+
+    # Key of the value in the shared backend
+    SHARED_KEY = "value"
+
+    def __init__(
+        self,
+        fetch: Callable[[Dict[str, str]], Optional[Any]],
+        ttl: float,
+        snapshot_path: Optional[str] = None,
+        shared: Optional[CacheBackend[str, Any]] = None,
+    ) -> None:
+        self._fetch = fetch
+        self._ttl = ttl
+        self._snapshot_path = snapshot_path
+        self._shared = shared
+        self._value: Any = _MISSING
+        self._validators: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._snapshot_checked = False
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.counters = {
+            "fresh": 0,
+            "stale": 0,
+            "fetched": 0,
+            "not_modified": 0,
+            "errors": 0,
+            "snapshot_loads": 0,
+            "shared": 0,
+        }
+
+    def get(self) -> Any:
+        if not self._snapshot_checked:
+            self._load_snapshot()
+
+        if self._value is not _MISSING:
+            if time.monotonic() - self._fetched_at < self._ttl:
+                self.counters["fresh"] += 1
+            else:
+                self.counters["stale"] += 1
+                self._refresh_in_background()
+            return self._value
+
+        with self._lock:
+            if self._value is _MISSING:
+                self._refresh()
+        return self._value
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether a value is held, so `get` returns without waiting for a fetch.
+        """
+        return self._value is not _MISSING
+
+    def clear(self) -> None:
+        """
+        Drop the in-memory value; the next read reloads the snapshot or fetches.
+        """
+        with self._lock:
+            self._value = _MISSING
+            self._validators = {}
+            self._snapshot_checked = False
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                self._refresh()
+            except Exception:
+                # Keep serving the stale value; the next stale read retries
+                pass
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _refresh(self) -> None:
+        if self._adopt_shared():
+            return
+        try:
+            result = self._fetch(dict(self._validators))
+        except Exception:
+            self.counters["errors"] += 1
+            raise
+        if result is None:
+            self.counters["not_modified"] += 1
+        else:
+            self.counters["fetched"] += 1
+            self._value, self._validators = result
+            self._save_snapshot()
+        self._fetched_at = time.monotonic()
+        if self._shared is not None:
+            self._shared.set(self.SHARED_KEY, {
+                "value": self._value,
+                "validators": self._validators,
+                "fetched_at": time.time(),
+            })
+
+    def _adopt_shared(self) -> bool:
+        """
+        Take over a value fetched by another process, if it is still fresh.
+        """
+        if self._shared is None:
+            return False
+        entry = self._shared.get(self.SHARED_KEY)
+        if not isinstance(entry, dict):
+            return False
+        age = time.time() - entry.get("fetched_at", 0.0)
+        if not 0 <= age < self._ttl:
+            return False
+        self._value, self._validators = entry["value"], entry.get("validators", {})
+        self._fetched_at = time.monotonic() - age
+        self.counters["shared"] += 1
+        return True
+
+    def _load_snapshot(self) -> None:
+        with self._lock:
+            if self._snapshot_checked:
+                return
+            self._snapshot_checked = True
+            if not self._snapshot_path:
+                return
+            try:
+                with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                value, validators = snapshot["value"], snapshot.get("validators", {})
+            except (OSError, ValueError, KeyError, TypeError):
+                return
+            # Loaded as stale: served immediately and revalidated in the background
+            self._value, self._validators, self._fetched_at = value, validators, float("-inf")
+            self.counters["snapshot_loads"] += 1
+
+    def _save_snapshot(self) -> None:
+        if not self._snapshot_path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self._snapshot_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"validators": self._validators, "value": self._value}, f)
+            os.replace(tmp_path, self._snapshot_path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        # Age is unknown until the first upstream response (e.g. when serving a snapshot)
+        fetched = self._value is not _MISSING and self._fetched_at != float("-inf")
+        return {
+            **self.counters,
+            "ttl": self._ttl,
+            "age": time.monotonic() - self._fetched_at if fetched else None,
+        }
@@ -0,0 +1,191 @@
+"""
+Record/replay of upstream HTTP responses (CAL, metadata service).
+
+With UPSTREAM_CASSETTE_MODE=record, every upstream response is saved to the
+cassette directory UPSTREAM_CASSETTE_DIR; with UPSTREAM_CASSETTE_MODE=replay,
+the recorded responses are loaded into memory and served without any network
+access. Responses are recorded as received, before reformatting/re-signing, so
+replayed ones still go through the regular processing.
+
+Layout of a cassette directory:
+
+    entries/<hh>/<hash>.json    {"request": {"method", "path", "query"},
+                                 "status", "headers", "body"[, "encoding"]}
+
+Entries are keyed by method, path and normalized (sorted) query string; the
+host is not part of the key, so a cassette recorded against one deployment
+replays against any base URL. Every entry is its own file, written
+atomically, and the cassette is indexed by scanning them when loaded, so
+several processes can record into the same directory.
+"""
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+RECORD = "record"
+REPLAY = "replay"
+ENTRIES_DIR = "entries"
+
+# Response headers worth keeping: content type and cache validators
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def cassette_key(method: str, url: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Hash key of a request, and the method/path/normalized query it covers.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    described = {"method": method.upper(), "path": parts.path, "query": query}
+    key = hashlib.sha256(f"{described['method']}\0{parts.path}\0{query}".encode("utf-8")).hexdigest()
+    return key, described
+
+
+class CassetteMiss(requests.ConnectionError):
+    """
+    A request has no recorded response in replay mode.
+    """
+
+
+class Cassette:
+    """
+    An on-disk cassette, recording to or replaying from `directory`.
+    """
+
+    def __init__(self, directory: str, mode: str) -> None:
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r} (expected {RECORD!r} or {REPLAY!r})")
+        self.directory = directory
+        self.mode = mode
+        self._lock = threading.Lock()
+        # key -> recorded response
+        self._entries: Dict[str, Dict[str, Any]] = self._load_entries()
+        self.replayed = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _load_entries(self) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        entries_dir = os.path.join(self.directory, ENTRIES_DIR)
+        if not os.path.isdir(entries_dir):
+            return entries
+        for prefix in sorted(os.listdir(entries_dir)):
+            prefix_dir = os.path.join(entries_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for filename in sorted(os.listdir(prefix_dir)):
+                key, extension = os.path.splitext(filename)
+                if extension != ".json":
+                    continue
+                entry = self._read_entry(os.path.join(prefix_dir, filename))
+                if entry is not None:
+                    entries[key] = entry
+        return entries
+
+    def _read_entry(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def adapter(self, **kwargs: Any) -> "CassetteAdapter":
+        """
+        A requests transport adapter going through this cassette; `kwargs` are
+        passed to `HTTPAdapter` (e.g. `pool_maxsize`).
+        """
+        return CassetteAdapter(self, **kwargs)
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        key, described = cassette_key(request.method or "GET", request.url or "")
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            raise CassetteMiss(
+                f"No recorded response for {described['method']} {described['path']}"
+                f"{'?' + described['query'] if described['query'] else ''}",
+                request=request,
+            )
+        self.replayed += 1
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url or ""
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        etag = response.headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            response.status_code, response.reason, response._content = 304, "Not Modified", b""
+            return response
+        response.status_code = entry["status"]
+        response.reason = "Replayed"
+        body: str = entry["body"]
+        response._content = base64.b64decode(body) if entry.get("encoding") == "base64" else body.encode("utf-8")
+        return response
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response) -> None:
+        # A 304 only confirms the response already recorded
+        if response.status_code == 304:
+            return
+        key, described = cassette_key(request.method or "GET", request.url or "")
+        entry: Dict[str, Any] = {
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+        }
+        try:
+            entry["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body"] = base64.b64encode(response.content).decode("ascii")
+            entry["encoding"] = "base64"
+
+        entry["request"] = described
+        path = os.path.join(self.directory, ENTRIES_DIR, key[:2], f"{key}.json")
+        _atomic_write(path, json.dumps(entry, indent=1))
+        with self._lock:
+            self._entries[key] = entry
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "mode": self.mode,
+            "entries": len(self._entries),
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter recording responses to, or replaying them from, a cassette.
+    """
+
+    def __init__(self, cassette: Cassette, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if self.cassette.mode == REPLAY:
+            return self.cassette.replay(request)
+        response = super().send(request, **kwargs)
+        self.cassette.record(request, response)
+        return response
+
+
+def _atomic_write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
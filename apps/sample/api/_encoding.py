@@ -0,0 +1,164 @@
+"""
+Response encoding: direct JSON-to-bytes responses, the opt-in compact
+descriptor format and Accept-Encoding content negotiation.
+
+Compact format (`?format=compact`):
+  - a `signatures` object whose `test` and `prod` values are identical is
+    replaced by that single signature string;
+  - with `bytes=base64`, lowercase hex payloads (`data`, `descriptor` and
+    `signatures` strings) are sent as `{"$bytes": "<base64>"}`, a third
+    smaller than hex. Clients expand `$bytes` to lowercase hex, so other hex
+    strings (upper or mixed case) are sent as-is to come back unchanged.
+The response carries `"format": "compact-v1"`; clients expand it back to the
+regular shape.
+
+Brotli and zstd are used when the optional `brotli` / `zstandard` packages are
+installed; gzip is always available.
+"""
+import base64
+import gzip
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPACT_FORMAT = "compact-v1"
+BYTES_KEY = "$bytes"
+# Keys whose string values are hex-encoded payloads in processed descriptors
+HEX_FIELDS = frozenset(("data", "descriptor", "signatures"))
+
+# Bodies smaller than this are not worth compressing
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_LEVEL = {"gzip": 5, "br": 5, "zstd": 3}
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    # Preferred first when the client accepts several with the same quality
+    compressors: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        compressors["zstd"] = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL["zstd"]).compress
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=COMPRESSION_LEVEL["br"])
+    compressors["gzip"] = lambda body: gzip.compress(body, compresslevel=COMPRESSION_LEVEL["gzip"], mtime=0)
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header, or
+    None for identity.
+    """
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+
+    best: Optional[str] = None
+    best_quality = 0.0
+    for coding in COMPRESSORS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress_response(response: Response, accept_encoding: str) -> Response:
+    """
+    Compress a buffered response body with the best coding the client accepts.
+    Streamed, already encoded and small responses are left untouched.
+    """
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    coding = negotiate_encoding(accept_encoding)
+    if coding is None:
+        return response
+    response.set_data(COMPRESSORS[coding](body))
+    response.headers["Content-Encoding"] = coding
+    return response
+
+
+def json_response(body: Any, status: int = 200) -> Response:
+    """
+    Encode a JSON body straight to bytes (compact separators, key order kept),
+    bypassing Flask's sorting JSON provider.
+    """
+    encoded = json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return Response(encoded, status=status, mimetype="application/json")
+
+
+def _is_lowercase_hex(value: str) -> bool:
+    if len(value) % 2 or value != value.lower():
+        return False
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _compact_value(key: Any, value: Any, binary: bool) -> Any:
+    if key == "signatures" and isinstance(value, dict) and value.keys() == {"test", "prod"}:
+        if value["test"] == value["prod"] and isinstance(value["test"], str):
+            value = value["test"]
+    if binary and key in HEX_FIELDS and isinstance(value, str) and value and _is_lowercase_hex(value):
+        return {BYTES_KEY: base64.b64encode(bytes.fromhex(value)).decode("ascii")}
+    return value
+
+
+def compact_descriptors(obj: Any, binary: bool = False) -> Any:
+    """
+    Return a compact-format copy of processed descriptors; `obj` itself (which
+    may be shared with a cache) is not modified.
+    """
+    root: List[Any] = [None]
+    stack: List[Tuple[Any, Any, Any]] = [(root, 0, obj)]
+    while stack:
+        target, key, value = stack.pop()
+        value = _compact_value(key, value, binary)
+        if isinstance(value, dict):
+            copy: Any = {}
+            target[key] = copy
+            for child_key, child in value.items():
+                copy[child_key] = None
+                stack.append((copy, child_key, child))
+        elif isinstance(value, list):
+            copy = [None] * len(value)
+            target[key] = copy
+            for index, child in enumerate(value):
+                stack.append((copy, index, child))
+        else:
+            target[key] = value
+    return root[0]
+
@@ -0,0 +1,191 @@
+"""
+Incremental re-processing of edited descriptors.
+
+The last processed output of every calldata selector and EIP-712 schema is
+kept per "chainId:address" along with a hash of its input. When a descriptor
+is submitted again in incremental mode, only the selectors/schemas whose
+input hash changed are formatted and signed again, and the response can be
+reduced to just those changes. The chainId:address groups submitted together
+are remembered per section too, so groups a new submission no longer produces
+are reported as removed.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from _cache import CacheBackend, canonical_hash, make_cache
+
+# Sections tracked per chainId:address, and the response field holding each
+SECTION_FIELDS = {
+    "calldata": "descriptors_calldata",
+    "eip712": "descriptors_eip712",
+}
+
+# section -> item key (selector / schema hash) -> (input hash, processed output)
+GroupState = Dict[str, Dict[str, Tuple[str, Any]]]
+
+
+class IncrementalStore:
+    """
+    Last processed state of each chainId:address, and the groups it was last
+    submitted with per section, bounded by LRU eviction.
+    """
+
+    def __init__(self, max_groups: int) -> None:
+        self._groups: CacheBackend[str, GroupState] = make_cache("incremental", max_groups)
+        # "section:chainId:address" -> every chainId:address of its last submission
+        self._submissions: CacheBackend[str, List[str]] = make_cache("incremental_submissions", max_groups)
+
+    def get(self, group_key: str) -> GroupState:
+        return self._groups.get(group_key) or {}
+
+    def put(self, group_key: str, section: str, items: Dict[str, Tuple[str, Any]]) -> None:
+        state = dict(self.get(group_key))
+        state[section] = items
+        self._groups.set(group_key, state)
+
+    def submission(self, group_key: str, section: str) -> List[str]:
+        """
+        The groups last submitted together with `group_key` for `section`.
+        """
+        return self._submissions.get(f"{section}:{group_key}") or []
+
+    def put_submission(self, section: str, group_keys: List[str]) -> None:
+        for group_key in group_keys:
+            self._submissions.set(f"{section}:{group_key}", group_keys)
+
+    def clear(self) -> None:
+        self._groups.clear()
+        self._submissions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._groups.stats()
+
+
+class IncrementalSession:
+    """
+    Tracks the items processed by one request against the store's previous state.
+    Nothing is written to the store until `commit`, so failed requests leave it untouched.
+    """
+
+    def __init__(self, store: IncrementalStore) -> None:
+        self._store = store
+        # (group key, section) -> item key -> (input hash, output)
+        self._items: Dict[Tuple[str, str], Dict[str, Tuple[str, Any]]] = {}
+        self._changed: Dict[Tuple[str, str], List[str]] = {}
+        self.reused = 0
+
+    def item(
+        self,
+        group_key: str,
+        section: str,
+        item_key: str,
+        source: Any,
+        compute: Callable[[], Any],
+    ) -> Any:
+        """
+        Return the processed output of an item, reusing the previous output when
+        the JSON `source` it is derived from hashes the same as last time.
+        `source` is hashed before `compute` runs, so compute may mutate it.
+        """
+        fingerprint = canonical_hash(source)
+        previous = self._store.get(group_key).get(section, {}).get(item_key)
+        if previous is not None and previous[0] == fingerprint:
+            output = previous[1]
+            self.reused += 1
+        else:
+            output = compute()
+            self._changed.setdefault((group_key, section), []).append(item_key)
+        self._items.setdefault((group_key, section), {})[item_key] = (fingerprint, output)
+        return output
+
+    def _submissions(self) -> Dict[str, List[str]]:
+        """
+        Section -> chainId:address groups processed by this session.
+        """
+        submissions: Dict[str, List[str]] = {}
+        for group_key, section in self._items:
+            submissions.setdefault(section, []).append(group_key)
+        return submissions
+
+    def _removed_groups(self) -> List[Tuple[str, str]]:
+        """
+        (group key, section) of the groups submitted last time together with
+        a group of this session, that this session no longer produced.
+        """
+        removed: Dict[Tuple[str, str], None] = {}
+        for section, group_keys in self._submissions().items():
+            for group_key in group_keys:
+                for previous_key in self._store.submission(group_key, section):
+                    if (previous_key, section) not in self._items:
+                        removed[(previous_key, section)] = None
+        return list(removed)
+
+    def delta(self) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+        """
+        Per chainId:address and section: changed (new or modified) and removed
+        item keys. Every item of a group that is no longer produced is removed.
+        """
+        delta: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        for (group_key, section), items in self._items.items():
+            previous = self._store.get(group_key).get(section, {})
+            delta.setdefault(group_key, {})[section] = {
+                "changed": self._changed.get((group_key, section), []),
+                "removed": sorted(set(previous) - set(items)),
+            }
+        for group_key, section in self._removed_groups():
+            previous = self._store.get(group_key).get(section, {})
+            if previous:
+                delta.setdefault(group_key, {})[section] = {"changed": [], "removed": sorted(previous)}
+        return delta
+
+    def only_changed(self, processed_descriptors: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reduce a processed descriptors map to the changed selectors/schemas.
+        Groups without any change are omitted.
+        """
+        reduced: Dict[str, Any] = {}
+        for group_key, entries in processed_descriptors.items():
+            entry: Dict[str, Any] = {}
+            for section, field in SECTION_FIELDS.items():
+                changed = set(self._changed.get((group_key, section), []))
+                if not changed or field not in entries[0]:
+                    continue
+                entry[field] = {
+                    address: {key: value for key, value in items.items() if key in changed}
+                    for address, items in entries[0][field].items()
+                }
+            if entry:
+                reduced[group_key] = [entry]
+        return reduced
+
+    def commit(self) -> None:
+        for group_key, section in self._removed_groups():
+            self._store.put(group_key, section, {})
+        for (group_key, section), items in self._items.items():
+            self._store.put(group_key, section, items)
+        for section, group_keys in self._submissions().items():
+            self._store.put_submission(section, group_keys)
+
+
+_current: ContextVar[Optional[IncrementalSession]] = ContextVar("incremental_session", default=None)
+
+
+def current() -> Optional[IncrementalSession]:
+    """
+    The incremental session of the request being processed, if any.
+    """
+    return _current.get()
+
+
+@contextmanager
+def session(store: IncrementalStore) -> Iterator[IncrementalSession]:
+    """
+    Run the enclosed processing in incremental mode against `store`.
+    """
+    incremental_session = IncrementalSession(store)
+    token = _current.set(incremental_session)
+    try:
+        yield incremental_session
+    finally:
+        _current.reset(token)
@@ -0,0 +1,303 @@
+import bisect
+import cProfile
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import g, has_request_context
+
+# Latency buckets in seconds, from cache hits up to multi-second conversions
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self._buckets = tuple(buckets)
+        # labels -> (per-bucket counts, +Inf included as the last slot, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(labels, ([0] * (len(self._buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self._buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    label_str = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+                label_str = _format_labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{label_str} {total[0]:g}")
+                lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("api_request_duration_seconds", "Request latency by route.", ["route"])
+STAGE_LATENCY = Histogram(
+    "api_stage_duration_seconds",
+    "Time spent per pipeline stage within a request, by route.",
+    ["route", "stage"],
+)
+REQUESTS = Counter("api_requests_total", "Requests by route and HTTP status.", ["route", "status"])
+IN_FLIGHT = Gauge("api_requests_in_flight", "Requests currently being served, by route.", ["route"])
+
+_registry: List[_Metric] = [REQUEST_LATENCY, STAGE_LATENCY, REQUESTS, IN_FLIGHT]
+
+
+def register(metric: _Metric) -> _Metric:
+    """
+    Add a metric to the /api/metrics output.
+    """
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Stage durations collected outside a request, see `collect_stages`
+_collected_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("collected_stages", default=None)
+
+
+def _stage_timings() -> Optional[Dict[str, float]]:
+    collected = _collected_stages.get()
+    if collected is not None:
+        return collected
+    if has_request_context() and "stage_timings" in g:
+        return g.stage_timings
+    return None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a pipeline stage. Durations are summed per stage name for the current
+    request and reported in its Server-Timing header and stage histogram.
+    Outside a request and `collect_stages` this is a no-op.
+    """
+    timings = _stage_timings()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    """
+    Collect the stage durations of the enclosed work into the yielded dict,
+    e.g. in a pool worker, so they can be sent back and added to the request
+    with `record_stages`.
+    """
+    collected: Dict[str, float] = {}
+    token = _collected_stages.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected_stages.reset(token)
+
+
+def record_stages(timings: Dict[str, float]) -> None:
+    """
+    Add stage durations measured elsewhere (see `collect_stages`) to the current request.
+    """
+    current = _stage_timings()
+    if current is None:
+        return
+    for name, duration in timings.items():
+        current[name] = current.get(name, 0.0) + duration
+
+
+# Opt-in profiling: requests slower than PROFILE_SLOW_REQUESTS_MS are dumped as
+# cProfile stats files in PROFILE_DIR (inspect with `python -m pstats <file>`)
+PROFILE_SLOW_REQUESTS_MS = float(os.getenv("PROFILE_SLOW_REQUESTS_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "api-profiles"))
+
+
+def start_request(route: str) -> None:
+    """
+    Begin instrumenting the current request.
+    """
+    g.request_start = time.perf_counter()
+    g.stage_timings = {}
+    g.metrics_route = route
+    IN_FLIGHT.inc(route)
+
+    g.profiler = None
+    if PROFILE_SLOW_REQUESTS_MS > 0:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request is already being profiled
+            return
+        g.profiler = profiler
+
+
+def finish_request(status: int) -> Optional[str]:
+    """
+    Record the current request's metrics and return its Server-Timing header
+    value. After `defer_stages`, the stage histograms are left to `finish_stream`.
+    """
+    if "request_start" not in g:
+        return None
+    total = time.perf_counter() - g.request_start
+    route: str = g.metrics_route
+    server_timing = record_request(route, status, total, g.stage_timings,
+                                   observe_stages="deferred_stages_route" not in g)
+
+    profiler: Optional[cProfile.Profile] = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        if total * 1000 >= PROFILE_SLOW_REQUESTS_MS:
+            _dump_profile(profiler, route, total)
+    return server_timing
+
+
+def defer_stages() -> None:
+    """
+    Mark the current request's response as streamed: its body, and the stages
+    run to generate it, only happen after `finish_request` (and `end_request`).
+    """
+    g.deferred_stages_route = g.metrics_route
+
+
+def finish_stream() -> None:
+    """
+    Record the stage durations of a response marked with `defer_stages` once
+    its body has been generated, including the stages run while streaming.
+    Call it at the end of the response generator, still in the request context.
+    """
+    route: Optional[str] = g.pop("deferred_stages_route", None)
+    if route is not None:
+        _observe_stages(route, g.stage_timings)
+
+
+def record_request(
+    route: str,
+    status: int,
+    total: float,
+    timings: Dict[str, float],
+    observe_stages: bool = True,
+) -> str:
+    """
+    Record a served request's latency, status and stage durations, and return
+    its Server-Timing header value. Used directly by requests served outside
+    Flask (the async routes of the ASGI mode).
+    """
+    REQUEST_LATENCY.observe(total, route)
+    REQUESTS.inc(route, str(status))
+    if observe_stages:
+        _observe_stages(route, timings)
+
+    entries = [f"{name};dur={duration * 1000:.2f}" for name, duration in timings.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def _observe_stages(route: str, timings: Dict[str, float]) -> None:
+    for name, duration in timings.items():
+        STAGE_LATENCY.observe(duration, route, name)
+
+
+def end_request() -> None:
+    """
+    Release per-request instrumentation state; runs even when the request failed.
+    """
+    if "metrics_route" in g:
+        IN_FLIGHT.dec(g.pop("metrics_route"))
+    profiler: Optional[cProfile.Profile] = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+
+
+def _dump_profile(profiler: cProfile.Profile, route: str, total: float) -> None:
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        filename = f"{int(time.time() * 1000)}-{route}-{int(total * 1000)}ms.prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, filename))
+    except OSError:
+        pass
@@ -0,0 +1,160 @@
+"""
+Lazily imported erc7730/eip712 pipelines.
+
+The converters, pydantic models and serializers are only imported when a
+request first needs them, per version, so routes that never process
+descriptors (certificates, dynamic-descriptor proxy) do not pay for them on
+a cold start.
+"""
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from _metrics import Gauge, register
+
+
+def _load_common() -> SimpleNamespace:
+    """Helpers shared by the v1 and v2 descriptor pipelines."""
+    from erc7730.common.output import ListOutputAdder
+
+    return SimpleNamespace(ListOutputAdder=ListOutputAdder)
+
+
+def _load_eip712() -> SimpleNamespace:
+    """Shared EIP-712 instruction stack, used by both v1 and v2 descriptors."""
+    from eip712.convert.input_to_resolved import EIP712InputToResolvedConverter
+    from eip712.convert.resolved_to_instructions import (
+        EIP712ResolvedToInstructionsConverter,
+    )
+    from eip712.model.types import EIP712Version
+    from eip712.serialize import serialize_instruction
+
+    return SimpleNamespace(
+        EIP712InputToResolvedConverter=EIP712InputToResolvedConverter,
+        EIP712ResolvedToInstructionsConverter=EIP712ResolvedToInstructionsConverter,
+        EIP712Version=EIP712Version,
+        serialize_instruction=serialize_instruction,
+    )
+
+
+def _load_v1() -> SimpleNamespace:
+    from erc7730.convert.calldata.convert_erc7730_input_to_calldata import (
+        erc7730_descriptor_to_calldata_descriptors,
+    )
+    from erc7730.convert.ledger.eip712.convert_erc7730_to_eip712 import (
+        ERC7730toEIP712Converter,
+    )
+    from erc7730.convert.resolved.convert_erc7730_input_to_resolved import (
+        ERC7730InputToResolved,
+    )
+    from erc7730.model.input.descriptor import InputERC7730Descriptor
+
+    return SimpleNamespace(
+        erc7730_descriptor_to_calldata_descriptors=erc7730_descriptor_to_calldata_descriptors,
+        ERC7730toEIP712Converter=ERC7730toEIP712Converter,
+        ERC7730InputToResolved=ERC7730InputToResolved,
+        InputERC7730Descriptor=InputERC7730Descriptor,
+    )
+
+
+def _load_v2() -> SimpleNamespace:
+    from erc7730.convert.calldata.convert_erc7730_v2_input_to_calldata import (
+        erc7730_v2_descriptor_to_calldata_descriptors,
+    )
+    from erc7730.convert.ledger.eip712.convert_erc7730_v2_to_eip712 import (
+        ERC7730V2toEIP712Converter,
+    )
+    from erc7730.model.input.v2.descriptor import InputERC7730Descriptor as InputERC7730DescriptorV2
+
+    return SimpleNamespace(
+        erc7730_v2_descriptor_to_calldata_descriptors=erc7730_v2_descriptor_to_calldata_descriptors,
+        ERC7730V2toEIP712Converter=ERC7730V2toEIP712Converter,
+        InputERC7730DescriptorV2=InputERC7730DescriptorV2,
+    )
+
+
+_LOADERS: Dict[str, Callable[[], SimpleNamespace]] = {
+    "common": _load_common,
+    "eip712": _load_eip712,
+    "v1": _load_v1,
+    "v2": _load_v2,
+}
+# Pydantic input model of each descriptor pipeline, used to pre-build validators
+_INPUT_MODELS = {"v1": "InputERC7730Descriptor", "v2": "InputERC7730DescriptorV2"}
+
+_loaded: Dict[str, SimpleNamespace] = {}
+_load_seconds: Dict[str, float] = {}
+_warmup_seconds: Dict[str, float] = {}
+_lock = threading.Lock()
+
+PIPELINE_IMPORT_SECONDS = register(Gauge(
+    "api_pipeline_import_seconds",
+    "Time spent importing each lazily loaded pipeline.",
+    ["pipeline"],
+))
+
+
+def load(name: str) -> SimpleNamespace:
+    """
+    Return the namespace of a pipeline ("common", "eip712", "v1" or "v2"),
+    importing it on first use.
+    """
+    pipeline = _loaded.get(name)
+    if pipeline is not None:
+        return pipeline
+    with _lock:
+        pipeline = _loaded.get(name)
+        if pipeline is None:
+            start = time.perf_counter()
+            pipeline = _LOADERS[name]()
+            _load_seconds[name] = time.perf_counter() - start
+            PIPELINE_IMPORT_SECONDS.inc(name, amount=_load_seconds[name])
+            _loaded[name] = pipeline
+    return pipeline
+
+
+def warm_up(names: Iterable[str]) -> None:
+    """
+    Import the given descriptor pipelines and force their pydantic validators to
+    be built, so the first request does not pay for it.
+    """
+    for name in names:
+        start = time.perf_counter()
+        pipeline = load(name)
+        if name in _INPUT_MODELS:
+            load("common")
+            load("eip712")
+            model = getattr(pipeline, _INPUT_MODELS[name])
+            try:
+                model.model_validate({}, strict=False)
+            except Exception:
+                # An empty document is invalid; validating it only builds the validators
+                pass
+        _warmup_seconds[name] = time.perf_counter() - start
+
+
+def warm_up_in_background(names: Iterable[str]) -> Optional[threading.Thread]:
+    """
+    Run `warm_up` in a daemon thread. Returns None when there is nothing to warm.
+    """
+    names = [name for name in names if name in _LOADERS]
+    if not names:
+        return None
+    thread = threading.Thread(target=warm_up, args=(names,), name="pipeline-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_report() -> Dict[str, Any]:
+    """
+    Which pipelines are loaded and how long importing/warming each one took.
+    """
+    return {
+        name: {
+            "loaded": name in _loaded,
+            "import_seconds": _load_seconds.get(name),
+            "warmup_seconds": _warmup_seconds.get(name),
+        }
+        for name in _LOADERS
+    }
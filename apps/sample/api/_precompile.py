@@ -0,0 +1,158 @@
+"""
+Precompile a directory of ERC-7730 descriptor files into a descriptor store.
+
+Every `*.json` file under the input directory is run through the same
+validate -> convert -> sign pipeline as /api/process-erc7730-descriptor, in
+a process pool, and the results are merged by "chainId:address" into the
+sharded store described in `_store`. Inputs whose content hash is unchanged
+since the previous build are not processed again.
+
+    python api/_precompile.py path/to/registry --output descriptor-store
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import _store  # noqa: E402
+
+DEFAULT_SHARDS = 16
+
+
+def find_inputs(directory: str) -> List[str]:
+    """
+    Relative paths of the descriptor files under `directory`, in a stable order.
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in sorted(files):
+            if filename.endswith(".json") and not filename.startswith("."):
+                paths.append(os.path.relpath(os.path.join(root, filename), directory))
+    return paths
+
+
+def content_hash(path: str, namespace: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(namespace.encode("utf-8") + b"\0" + f.read()).hexdigest()
+
+
+def compile_file(path: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Process one descriptor file. Runs in the pool workers.
+    """
+    import index
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {"error": f"Failed to read descriptor: {e}"}, 400
+    # The store is the cache: skip the in-memory/disk result cache of the API
+    return index._process_descriptor_data_or_error(data, use_cache=False)
+
+
+def precompile(
+    input_dir: str,
+    output_dir: str,
+    workers: int,
+    shard_count: int = DEFAULT_SHARDS,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Build or refresh the store in `output_dir` from the files in `input_dir`.
+    Returns a summary of the build.
+    """
+    import index
+
+    namespace = index.DESCRIPTOR_CACHE_NAMESPACE
+    previous = _store.read_index(output_dir)
+    reusable = not force and previous.get("namespace") == namespace
+    outputs = _store.input_outputs(output_dir)
+
+    inputs: Dict[str, Dict[str, Any]] = {}
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    pending: List[str] = []
+    for relative_path in find_inputs(input_dir):
+        digest = content_hash(os.path.join(input_dir, relative_path), namespace)
+        inputs[relative_path] = {"hash": digest}
+        known = previous["inputs"].get(relative_path) if reusable else None
+        # Failed inputs are retried: their errors may have been transient (e.g. ABI fetches)
+        if known is not None and known["hash"] == digest and "error" not in known:
+            stored = outputs.get(digest)
+            if stored is not None:
+                results[relative_path] = stored
+                continue
+        pending.append(relative_path)
+
+    start = time.perf_counter()
+    absolute = [os.path.join(input_dir, relative_path) for relative_path in pending]
+    if workers > 1 and len(pending) > 1:
+        # spawn: workers import the API fresh instead of inheriting this process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            compiled = list(pool.map(compile_file, absolute, chunksize=max(1, len(absolute) // (workers * 4))))
+    else:
+        compiled = [compile_file(path) for path in absolute]
+
+    errors = 0
+    for relative_path, (result, status) in zip(pending, compiled):
+        if status != 200:
+            inputs[relative_path].update(error=result.get("error"), status=status)
+            errors += 1
+            continue
+        outputs.set(inputs[relative_path]["hash"], result["descriptors"])
+        results[relative_path] = result["descriptors"]
+
+    merged: Dict[str, List[Dict[str, Any]]] = {}
+    for relative_path in sorted(results):
+        descriptors = results[relative_path] or {}
+        inputs[relative_path]["keys"] = sorted(descriptors)
+        for key, data in descriptors.items():
+            merged[key] = index._merge_descriptor_data(merged[key], data) if key in merged else data
+
+    store_index = _store.write_store(output_dir, merged, inputs, shard_count, namespace)
+    return {
+        "inputs": len(inputs),
+        "processed": len(pending),
+        "reused": len(inputs) - len(pending),
+        "errors": errors,
+        "keys": len(store_index["entries"]),
+        "generation": store_index["generation"],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="directory of ERC-7730 descriptor files")
+    parser.add_argument("--output", required=True, help="store directory (created or refreshed)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    parser.add_argument("--force", action="store_true", help="reprocess every input")
+    args = parser.parse_args()
+
+    # The build has its own process pool: convert in the calling process
+    os.environ.setdefault("CONVERSION_EXECUTOR", "inline")
+    summary = precompile(args.input, args.output, args.workers, args.shards, args.force)
+    print(
+        f"{summary['inputs']} inputs: {summary['processed']} processed, {summary['reused']} unchanged, "
+        f"{summary['errors']} failed; {summary['keys']} keys in generation {summary['generation']} "
+        f"({summary['seconds']}s)"
+    )
+    if summary["errors"]:
+        index = _store.read_index(args.output)
+        for relative_path, entry in sorted(index["inputs"].items()):
+            if "error" in entry:
+                print(f"  {relative_path}: {entry['error']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import ecdsa
+from ecdsa.util import sigencode_der
+
+from _admission import ProcessPool
+from _cache import CacheBackend, make_cache
+
+# Number of (key, payload hash) -> DER signature entries kept per signer
+DEFAULT_SIGNATURE_CACHE_SIZE = int(os.getenv("SIGNATURE_CACHE_SIZE", "4096"))
+
+# Parallel signing (off by default): batches of at least PARALLEL_SIGNING_MIN_BATCH
+# new signatures are split across PARALLEL_SIGNING_WORKERS processes. Only the
+# ECDSA signatures of a descriptor are fanned out (validation, conversion and
+# serialization stay serial), over the signing pool below, which is separate
+# from the conversion pool of index.py. Pool workers never sign in parallel,
+# so this only applies to conversions run in the serving process, i.e. with
+# CONVERSION_EXECUTOR=inline, where a large descriptor would otherwise sign on
+# a single core. With the default process executor, concurrent requests are
+# already spread over the conversion pool.
+PARALLEL_SIGNING_WORKERS = int(os.getenv("PARALLEL_SIGNING_WORKERS", "0"))
+PARALLEL_SIGNING_MIN_BATCH = int(os.getenv("PARALLEL_SIGNING_MIN_BATCH", "32"))
+
+
+class Signer:
+    """
+    A loaded SECP256k1 signing key with a bounded LRU cache of signatures.
+
+    The key is parsed once: loading it computes the public point, which also
+    builds python-ecdsa's precomputed multiplication table for the curve
+    generator, so later signatures only pay for the nonce multiplication.
+    Signatures use RFC 6979 deterministic nonces, so a given payload always
+    maps to the same DER signature and can be served from the cache.
+    """
+
+    def __init__(self, signing_key: str, cache_size: int = DEFAULT_SIGNATURE_CACHE_SIZE) -> None:
+        self._signing_key = signing_key
+        self._key = ecdsa.SigningKey.from_string(
+            bytes.fromhex(signing_key),
+            curve=ecdsa.SECP256k1
+        )
+        self._cache: CacheBackend[bytes, bytes] = make_cache(
+            f"signatures:{self.public_key}", cache_size, binary=True
+        )
+
+    @property
+    def public_key(self) -> str:
+        """Compressed public key, hex-encoded."""
+        return self._key.get_verifying_key().to_string("compressed").hex()
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        """
+        Return the DER signature of an already computed SHA-256 digest.
+        """
+        signature = self._cache.get(digest)
+        if signature is not None:
+            return signature
+
+        signature = self._sign_uncached(digest)
+        self._cache.set(digest, signature)
+        return signature
+
+    def _sign_uncached(self, digest: bytes) -> bytes:
+        return self._key.sign_digest_deterministic(
+            digest,
+            hashfunc=hashlib.sha256,
+            sigencode=sigencode_der
+        )
+
+    def sign_digests(self, digests: List[bytes]) -> List[bytes]:
+        """
+        Return the DER signatures of several digests, in order. When at least
+        PARALLEL_SIGNING_MIN_BATCH of them are not cached and the signing pool
+        is enabled, those are signed across its processes; the signatures are
+        deterministic, so the result is the same as signing them one by one.
+        """
+        signatures: List[Optional[bytes]] = [self._cache.get(digest) for digest in digests]
+        missing = list(dict.fromkeys(digest for digest, signature in zip(digests, signatures) if signature is None))
+        pool = _pool.get() if len(missing) >= PARALLEL_SIGNING_MIN_BATCH else None
+        computed: Optional[List[bytes]] = None
+        if pool is not None:
+            # A few chunks per worker: enough to balance, few enough to amortize pickling
+            chunk_size = -(-len(missing) // (PARALLEL_SIGNING_WORKERS * 4))
+            chunks = [missing[start:start + chunk_size] for start in range(0, len(missing), chunk_size)]
+            try:
+                computed = [
+                    signature
+                    for chunk_signatures in pool.map(_sign_digests, [self._signing_key] * len(chunks), chunks)
+                    for signature in chunk_signatures
+                ]
+            except BrokenProcessPool:
+                _pool.discard(pool)
+        if computed is None:
+            computed = [self._sign_uncached(digest) for digest in missing]
+
+        by_digest = dict(zip(missing, computed))
+        for digest, signature in by_digest.items():
+            self._cache.set(digest, signature)
+        return [
+            signature if signature is not None else by_digest[digest]
+            for digest, signature in zip(digests, signatures)
+        ]
+
+    def sign(self, payload: bytes) -> bytes:
+        """
+        Return the DER signature of SHA-256(payload).
+        """
+        return self.sign_digest(hashlib.sha256(payload).digest())
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+_signers: Dict[str, Signer] = {}
+_signers_lock = threading.Lock()
+
+
+def get_signer(signing_key: str) -> Signer:
+    """
+    Return the shared Signer for a hex-encoded private key, loading it on first use.
+    """
+    signer: Optional[Signer] = _signers.get(signing_key)
+    if signer is None:
+        with _signers_lock:
+            signer = _signers.get(signing_key)
+            if signer is None:
+                signer = Signer(signing_key)
+                _signers[signing_key] = signer
+    return signer
+
+
+def signing_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Cache statistics of every loaded signer, keyed by the signer's public key.
+    """
+    with _signers_lock:
+        signers = list(_signers.values())
+    return {
+        signer.public_key: signer.stats()
+        for signer in signers
+    }
+
+
+# Signing pool, created on first use (see _admission.ProcessPool); not
+# shared with the conversion pool, see PARALLEL_SIGNING_WORKERS
+_pool = ProcessPool(PARALLEL_SIGNING_WORKERS, enabled=PARALLEL_SIGNING_WORKERS > 1)
+
+
+def _sign_digests(signing_key: str, digests: List[bytes]) -> List[bytes]:
+    """
+    Pool task: sign a chunk of digests (the key is loaded once per worker).
+    """
+    signer = get_signer(signing_key)
+    return [signer._sign_uncached(digest) for digest in digests]
+
+
+class SigningBatch:
+    """
+    Signatures requested while the batch is current, computed together by
+    `flush` so they can be spread over the signing pool.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[Signer, List[Tuple[bytes, Callable[[bytes], None]]]] = {}
+
+    def add(self, signer: Signer, payload: bytes, on_signed: Callable[[bytes], None]) -> None:
+        """
+        Queue the signature of SHA-256(payload); `on_signed` receives it on flush.
+        """
+        self._pending.setdefault(signer, []).append((hashlib.sha256(payload).digest(), on_signed))
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        for signer, requests in pending.items():
+            signatures = signer.sign_digests([digest for digest, _ in requests])
+            for (_, on_signed), signature in zip(requests, signatures):
+                on_signed(signature)
+
+
+_current_batch: ContextVar[Optional[SigningBatch]] = ContextVar("signing_batch", default=None)
+
+
+def current_batch() -> Optional[SigningBatch]:
+    """
+    The signing batch collecting the current request's signatures, if any.
+    """
+    return _current_batch.get()
+
+
+@contextmanager
+def batch() -> Iterator[SigningBatch]:
+    """
+    Defer the signatures requested in the enclosed block to a `SigningBatch`,
+    flushed when the block exits normally.
+    """
+    signing_batch = SigningBatch()
+    token = _current_batch.set(signing_batch)
+    try:
+        yield signing_batch
+    finally:
+        _current_batch.reset(token)
+    signing_batch.flush()
+
+
+def parallel_signing_enabled() -> bool:
+    """
+    Whether signatures are spread over the signing pool. Never in a pool worker
+    process (e.g. a pooled conversion): nesting a signing pool in each worker
+    would start up to PARALLEL_SIGNING_WORKERS processes per worker.
+    """
+    return PARALLEL_SIGNING_WORKERS > 1 and multiprocessing.parent_process() is None
@@ -0,0 +1,298 @@
+"""
+Precompiled descriptor store.
+
+Layout of a store directory:
+
+    index.json                  compact index (see below)
+    shards/<generation>-NN.jsonl processed descriptors, one JSON value per line
+    inputs/<hh>/<hash>.json     processed output of each input file, by content hash
+
+The index maps every "chainId:address" key to `[shard, offset, length]`, the
+byte range of its `[{descriptors_calldata/descriptors_eip712: ...}]` entry in
+that shard, and every calldata selector or EIP-712 schema hash of that entry
+to `[[field, address, offset, length], ...]`, the byte ranges of its value in
+the same shard, so single items are served without decoding the entry. It
+also records the content hash and produced keys of every input
+file so rebuilds only process inputs that changed. Shard files are named by
+build generation and the index is replaced last, so a reader never sees an
+index pointing into shards that are still being written.
+
+`DescriptorStore` serves a store read-only from memory-mapped shards.
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from _cache import DiskCache
+
+STORE_FORMAT = 2
+INDEX_FILE = "index.json"
+SHARDS_DIR = "shards"
+INPUTS_DIR = "inputs"
+
+# chainId:address -> [shard, offset, length]
+Entries = Dict[str, List[int]]
+# chainId:address -> selector/schema hash -> [[field, address, offset, length], ...]
+Items = Dict[str, Dict[str, List[List[Any]]]]
+
+# Fields of an entry whose items (selectors, schema hashes) are indexed
+ITEM_FIELDS = ("descriptors_calldata", "descriptors_eip712")
+
+
+def shard_of(key: str, shard_count: int) -> int:
+    """
+    Stable shard number of a "chainId:address" key.
+    """
+    return int.from_bytes(hashlib.sha256(key.lower().encode("utf-8")).digest()[:4], "big") % shard_count
+
+
+def shard_path(directory: str, generation: str, shard: int) -> str:
+    return os.path.join(directory, SHARDS_DIR, f"{generation}-{shard:02x}.jsonl")
+
+
+def input_outputs(directory: str) -> DiskCache:
+    """
+    Content-addressed processed output of each input file.
+    """
+    return DiskCache(os.path.join(directory, INPUTS_DIR))
+
+
+def read_index(directory: str) -> Dict[str, Any]:
+    """
+    Load a store index, or an empty one when the store does not exist yet.
+    """
+    try:
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {"format": STORE_FORMAT, "entries": {}, "inputs": {}}
+    if index.get("format") != STORE_FORMAT:
+        return {"format": STORE_FORMAT, "entries": {}, "inputs": {}}
+    return index
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def encode_entry(entry: List[Dict[str, Any]]) -> Tuple[bytes, Dict[str, List[List[Any]]]]:
+    """
+    Encode a `[{descriptors_calldata/descriptors_eip712: {address: {item: ...}}}]`
+    entry exactly as `json.dumps(entry, separators=(",", ":"), sort_keys=True)`
+    would, and return the byte range of every item value within it.
+    """
+    encoded = bytearray()
+    items: Dict[str, List[List[Any]]] = {}
+
+    def encode(value: Any, path: Tuple[str, ...]) -> None:
+        # path: (field, address, item) of `value` within a part of the entry
+        if isinstance(value, dict) and len(path) < 3 and (not path or path[0] in ITEM_FIELDS):
+            encoded.extend(b"{")
+            for position, name in enumerate(sorted(value)):
+                encoded.extend((b"," if position else b"") + _encode(name) + b":")
+                encode(value[name], path + (name,))
+            encoded.extend(b"}")
+            return
+        start = len(encoded)
+        encoded.extend(_encode(value))
+        if len(path) == 3:
+            items.setdefault(path[2], []).append([path[0], path[1], start, len(encoded) - start])
+
+    encoded.extend(b"[")
+    for position, part in enumerate(entry):
+        if position:
+            encoded.extend(b",")
+        encode(part, ())
+    encoded.extend(b"]")
+    return bytes(encoded), items
+
+
+def write_store(
+    directory: str,
+    descriptors: Dict[str, List[Dict[str, Any]]],
+    inputs: Dict[str, Dict[str, Any]],
+    shard_count: int,
+    namespace: str,
+) -> Dict[str, Any]:
+    """
+    Write the processed descriptors into a new generation of shards, then
+    atomically replace the index and remove the previous generation.
+    Returns the new index.
+    """
+    encoded: Dict[str, bytes] = {}
+    entry_items: Dict[str, Dict[str, List[List[Any]]]] = {}
+    for key, value in descriptors.items():
+        encoded[key], entry_items[key] = encode_entry(value)
+    digest = hashlib.sha256(namespace.encode("utf-8"))
+    for key in sorted(encoded):
+        digest.update(key.encode("utf-8") + b"\0" + encoded[key] + b"\0")
+    generation = digest.hexdigest()[:16]
+
+    by_shard: Dict[int, List[Tuple[str, bytes]]] = {}
+    for key in sorted(encoded):
+        by_shard.setdefault(shard_of(key, shard_count), []).append((key, encoded[key]))
+
+    entries: Entries = {}
+    items: Items = {}
+    os.makedirs(os.path.join(directory, SHARDS_DIR), exist_ok=True)
+    for shard, records in by_shard.items():
+        offset = 0
+        chunks = []
+        for key, value in records:
+            entries[key] = [shard, offset, len(value)]
+            items[key] = {
+                item: [[field, address, offset + start, length] for field, address, start, length in locations]
+                for item, locations in entry_items[key].items()
+            }
+            chunks.append(value + b"\n")
+            offset += len(value) + 1
+        _atomic_write(shard_path(directory, generation, shard), b"".join(chunks))
+
+    index = {
+        "format": STORE_FORMAT,
+        "generation": generation,
+        "namespace": namespace,
+        "shards": shard_count,
+        "entries": entries,
+        "items": items,
+        "inputs": inputs,
+    }
+    _atomic_write(
+        os.path.join(directory, INDEX_FILE),
+        json.dumps(index, separators=(",", ":"), sort_keys=True).encode("utf-8"),
+    )
+
+    prefix = f"{generation}-"
+    for filename in os.listdir(os.path.join(directory, SHARDS_DIR)):
+        if not filename.startswith(prefix):
+            try:
+                os.remove(os.path.join(directory, SHARDS_DIR, filename))
+            except OSError:
+                pass
+    return index
+
+
+def _atomic_write(path: str, content: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class DescriptorStore:
+    """
+    Read-only view of a precompiled store. Shards are memory-mapped, so a
+    lookup is a dict access plus a slice of the mapped bytes. The index is
+    reloaded when the precompiler replaces it (checked at most every
+    `reload_interval` seconds).
+    """
+
+    def __init__(self, directory: str, reload_interval: float = 5.0) -> None:
+        self.directory = directory
+        self._reload_interval = reload_interval
+        self._lock = threading.Lock()
+        # (lowercase chainId:address -> (stored key, shard, offset, length, items), shard -> mapping),
+        # swapped as one tuple so lookups never mix two generations
+        self._view: Tuple[Dict[str, Tuple[str, int, int, int, Dict[str, List[List[Any]]]]], Dict[int, memoryview]] = (
+            {}, {}
+        )
+        self._index_mtime: Optional[float] = None
+        self._checked_at = float("-inf")
+        self.generation: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self._reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self._reload_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(os.path.join(self.directory, INDEX_FILE)).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._index_mtime:
+                try:
+                    self._load()
+                except OSError:
+                    # A rebuild replaced the index while we were reading it: retry next time
+                    return
+                self._index_mtime = mtime
+
+    def _load(self) -> None:
+        index = read_index(self.directory)
+        generation = index.get("generation")
+        shards: Dict[int, memoryview] = {}
+        for shard in {location[0] for location in index["entries"].values()}:
+            with open(shard_path(self.directory, generation, shard), "rb") as f:
+                shards[shard] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        items: Items = index.get("items", {})
+        entries = {
+            key.lower(): (key, shard, offset, length, items.get(key, {}))
+            for key, (shard, offset, length) in index["entries"].items()
+        }
+        # Previous mappings are left to the garbage collector: in-flight lookups may still slice them
+        self._view = (entries, shards)
+        self.generation = generation
+
+    def get_raw(self, chain_id: str, address: str) -> Optional[Tuple[str, memoryview]]:
+        """
+        Return the stored "chainId:address" key and the JSON bytes of its
+        `[{descriptors_calldata/descriptors_eip712: ...}]` entry (a view of the
+        mapped shard, not a copy), or None.
+        """
+        self._maybe_reload()
+        entries, shards = self._view
+        entry = entries.get(f"{chain_id}:{address}".lower())
+        if entry is None:
+            self.misses += 1
+            return None
+        key, shard, offset, length, _ = entry
+        self.hits += 1
+        return key, shards[shard][offset:offset + length]
+
+    def get_item_raw(
+        self, chain_id: str, address: str, item: str
+    ) -> Optional[Tuple[str, List[Tuple[str, str, memoryview]]]]:
+        """
+        Return the stored "chainId:address" key and the (field, address, JSON
+        bytes) of every value stored for a calldata selector or EIP-712 schema
+        hash, or None. Only the item's bytes are read, from the precompiled
+        item index.
+        """
+        self._maybe_reload()
+        entries, shards = self._view
+        entry = entries.get(f"{chain_id}:{address}".lower())
+        locations = entry[4].get(item) if entry is not None else None
+        if not locations:
+            self.misses += 1
+            return None
+        key, shard = entry[0], entry[1]
+        self.hits += 1
+        return key, [
+            (field, stored_address, shards[shard][offset:offset + length])
+            for field, stored_address, offset, length in locations
+        ]
+
+    def get(self, chain_id: str, address: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        raw = self.get_raw(chain_id, address)
+        if raw is None:
+            return None
+        return raw[0], json.loads(bytes(raw[1]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "generation": self.generation,
+            "keys": len(self._view[0]),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
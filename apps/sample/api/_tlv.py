@@ -0,0 +1,119 @@
+import hashlib
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from _signing import Signer
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class TLVField(NamedTuple):
+    """
+    Location of one TLV field inside a descriptor buffer.
+    `start` is the offset of the tag, `value_start`/`end` delimit the value.
+    """
+    tag: int
+    start: int
+    value_start: int
+    end: int
+
+
+def read_der_uint(data: memoryview, offset: int, what: str = "length") -> Tuple[int, int]:
+    """
+    Read a DER-style variable-length unsigned integer, as used by Ledger
+    descriptors for both tags and lengths: a single byte below 0x80, otherwise
+    0x80 | n followed by n big-endian bytes.
+    Returns the value and the offset following it.
+    """
+    if offset >= len(data):
+        raise ValueError(f"truncated TLV: missing {what} byte")
+    first = data[offset]
+    if first < 0x80:
+        return first, offset + 1
+    size = first & 0x7F
+    end = offset + 1 + size
+    if size == 0 or size > 4 or end > len(data):
+        raise ValueError(f"truncated TLV: invalid {what} encoding")
+    return int.from_bytes(data[offset + 1:end], "big"), end
+
+
+def encode_der_uint(value: int) -> bytes:
+    """
+    Encode an unsigned integer with the DER-style variable-length encoding.
+    """
+    if value < 0x80:
+        return bytes([value])
+    encoded = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return bytes([0x80 | len(encoded)]) + encoded
+
+
+def iter_tlv(data: Buffer) -> Iterator[TLVField]:
+    """
+    Walk the TLV fields of a descriptor without copying its bytes.
+    """
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        tag, value_start = read_der_uint(view, offset, "tag")
+        length, value_start = read_der_uint(view, value_start, "length")
+        end = value_start + length
+        if end > len(view):
+            raise ValueError("truncated TLV: value exceeds descriptor length")
+        yield TLVField(tag, offset, value_start, end)
+        offset = end
+
+
+def find_last(data: Buffer, tag: int) -> Optional[TLVField]:
+    """
+    Return the last field carrying `tag`, or None.
+    """
+    found = None
+    for field in iter_tlv(data):
+        if field.tag == tag:
+            found = field
+    return found
+
+
+def resign_descriptors(descriptors: List[bytes], signer: Signer, signature_tag: int) -> List[bytes]:
+    """
+    Re-sign a batch of signed TLV descriptors.
+
+    Each descriptor's trailing SIGNATURE field is replaced by a signature over
+    every byte preceding it. Payloads are hashed straight from a memoryview,
+    identical payloads in the batch are signed once, and each output is built
+    in a single preallocated buffer.
+    """
+    payload_views = []
+    for data in descriptors:
+        field = find_last(data, signature_tag)
+        if field is None:
+            raise ValueError(f"no SIGNATURE (tag 0x{signature_tag:02x}) field found in descriptor")
+        payload_views.append(memoryview(data)[:field.start])
+
+    signatures: Dict[bytes, bytes] = {}
+    resigned = []
+    encoded_tag = encode_der_uint(signature_tag)
+    for payload in payload_views:
+        digest = hashlib.sha256(payload).digest()
+        signature = signatures.get(digest)
+        if signature is None:
+            signature = signatures[digest] = signer.sign_digest(digest)
+
+        header = encoded_tag + encode_der_uint(len(signature))
+        out = bytearray(len(payload) + len(header) + len(signature))
+        out[:len(payload)] = payload
+        out[len(payload):len(payload) + len(header)] = header
+        out[len(payload) + len(header):] = signature
+        resigned.append(bytes(out))
+    return resigned
+
+
+def resign_descriptors_hex(descriptors_hex: List[str], signer: Signer, signature_tag: int) -> List[str]:
+    """
+    Hex-string front end of `resign_descriptors`.
+    """
+    resigned = resign_descriptors(
+        [bytes.fromhex(descriptor) for descriptor in descriptors_hex],
+        signer,
+        signature_tag
+    )
+    return [descriptor.hex() for descriptor in resigned]
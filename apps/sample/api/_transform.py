@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from _signing import Signer
+from _tlv import resign_descriptors_hex
+
+# Returned by a visitor to remove the visited value from its container
+DROP = object()
+
+Container = Union[Dict[str, Any], List[Any]]
+
+ETHERSCAN_LEGACY_ABI_URL = "https://api.etherscan.io/api?module=contract&action=getabi&address="
+ETHERSCAN_V2_ABI_URL = "https://api.etherscan.io/v2/api?chainid=1&module=contract&action=getabi&address="
+ETHERSCAN_V2_API_URL = "https://api.etherscan.io/v2/api"
+
+
+class JsonVisitor:
+    """
+    One transformation applied by `transform_json`.
+
+    `visit_leaf` is called for every scalar whose type is in `leaf_types` and
+    returns its replacement (or DROP). `enter` decides whether the visitor
+    needs to see a nested container; subtrees no visitor enters are skipped.
+    `finish` runs once after the walk, for visitors that batch their work.
+    """
+
+    leaf_types: Tuple[type, ...] = ()
+
+    def enter(self, key: Any, value: Container) -> bool:
+        return True
+
+    def visit_leaf(self, container: Container, key: Any, value: Any) -> Any:
+        return value
+
+    def finish(self) -> None:
+        pass
+
+
+class NullStripper(JsonVisitor):
+    """
+    Remove null values from objects and arrays, as the CAL service does.
+    """
+
+    leaf_types = (type(None),)
+
+    def visit_leaf(self, container: Container, key: Any, value: Any) -> Any:
+        return DROP
+
+
+class EtherscanUrlNormalizer(JsonVisitor):
+    """
+    Rewrite legacy Etherscan ABI URLs to the v2 API and append the API key.
+    """
+
+    leaf_types = (str,)
+
+    def __init__(self, api_key: Optional[str]) -> None:
+        self._api_key = api_key
+
+    def visit_leaf(self, container: Container, key: Any, value: Any) -> Any:
+        if not value.startswith("https://api.etherscan.io/"):
+            return value
+
+        # Step 1: Replace old API URL format with v2 format
+        if value.startswith(ETHERSCAN_LEGACY_ABI_URL):
+            value = value.replace(ETHERSCAN_LEGACY_ABI_URL, ETHERSCAN_V2_ABI_URL, 1)
+
+        # Step 2: Append API key if URL starts with v2 API and an API key is set
+        if self._api_key and value.startswith(ETHERSCAN_V2_API_URL):
+            value = f"{value}&apikey={self._api_key}"
+
+        return value
+
+
+class SignedDescriptorResigner(JsonVisitor):
+    """
+    Collect every `signedDescriptor` string during the walk and re-sign them in
+    a single batch when the walk finishes.
+    """
+
+    leaf_types = (str,)
+
+    def __init__(self, signer: Signer, signature_tag: int) -> None:
+        self._signer = signer
+        self._signature_tag = signature_tag
+        self._slots: List[Tuple[Container, Any]] = []
+
+    def visit_leaf(self, container: Container, key: Any, value: Any) -> Any:
+        if key == "signedDescriptor":
+            self._slots.append((container, key))
+        return value
+
+    def finish(self) -> None:
+        if not self._slots:
+            return
+        resigned = resign_descriptors_hex(
+            [container[key] for container, key in self._slots],
+            self._signer,
+            self._signature_tag
+        )
+        for (container, key), descriptor in zip(self._slots, resigned):
+            container[key] = descriptor
+        self._slots = []
+
+
+def transform_json(obj: Any, visitors: Sequence[JsonVisitor]) -> Any:
+    """
+    Apply a chain of visitors to a JSON tree in a single iterative walk.
+
+    Containers are mutated in place (pass data you own, e.g. a freshly parsed
+    request or a model_dump output) and the possibly replaced root is returned.
+    No recursion is used, so arbitrarily deep documents are supported.
+    """
+    # Wrap the root so a scalar root goes through the same leaf handling
+    root: List[Any] = [obj]
+    stack: List[Tuple[Container, Sequence[JsonVisitor]]] = [(root, tuple(visitors))]
+
+    while stack:
+        container, active = stack.pop()
+        if isinstance(container, dict):
+            entries = list(container.items())
+        else:
+            entries = list(enumerate(container))
+
+        dropped = False
+        for key, value in entries:
+            if isinstance(value, (dict, list)):
+                children = tuple(visitor for visitor in active if visitor.enter(key, value))
+                if children:
+                    stack.append((value, children))
+                continue
+
+            new_value = value
+            for visitor in active:
+                if isinstance(new_value, visitor.leaf_types):
+                    new_value = visitor.visit_leaf(container, key, new_value)
+                    if new_value is DROP:
+                        break
+            if new_value is DROP:
+                if isinstance(container, dict):
+                    del container[key]
+                else:
+                    container[key] = DROP
+                    dropped = True
+            elif new_value is not value:
+                container[key] = new_value
+
+        if dropped:
+            container[:] = [item for item in container if item is not DROP]
+
+    for visitor in visitors:
+        visitor.finish()
+    return root[0] if root else None
@@ -0,0 +1,196 @@
+import asyncio
+import json
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from _cache import CacheBackend, LRUCache, SingleFlight
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+QueryParams = Iterable[Tuple[str, str]]
+
+
+class UpstreamError(Exception):
+    """
+    An upstream request failed or returned an unusable response.
+    """
+
+    def __init__(self, message: str, status: int = 502) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class UpstreamClient:
+    """
+    JSON client for one upstream service.
+
+    Connections are kept alive in a shared pool, identical in-flight requests
+    (same path and query) are coalesced into a single upstream call, and the
+    transformed responses are cached for `cache_ttl` seconds, in `cache` when
+    given (e.g. a backend shared between processes) or in a private LRU.
+
+    `transform` is applied once per upstream response, before caching; exceptions
+    it raises are propagated unchanged. `adapter` replaces the default pooled
+    transport (e.g. with a recording/replaying one).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        transform: Optional[Callable[[Any], Any]] = None,
+        timeout: float = 10,
+        pool_size: int = 16,
+        cache_ttl: float = 30,
+        cache_size: int = 1024,
+        cache: Optional[CacheBackend] = None,
+        adapter: Optional[HTTPAdapter] = None,
+    ) -> None:
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self._transform = transform
+        self._timeout = timeout
+        self._session = requests.Session()
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._flight = SingleFlight()
+        self._cache: CacheBackend[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = (
+            cache if cache is not None else LRUCache(cache_size if cache_ttl > 0 else 0, cache_ttl)
+        )
+        self.upstream_calls = 0
+
+    @staticmethod
+    def cache_key(path: str, params: QueryParams) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """
+        Key a request by path and normalized (sorted) query parameters.
+        """
+        return path.lstrip("/"), tuple(sorted(params))
+
+    def get_json(self, path: str, params: QueryParams = ()) -> Any:
+        """
+        GET `path` with `params` and return the transformed JSON body.
+        Raises UpstreamError when the upstream cannot be reached, answers with an
+        error status or returns a non-JSON body.
+        """
+        key = self.cache_key(path, params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        return self._flight.do(key, lambda: self._fetch(key))
+
+    def _fetch(self, key: Tuple[str, Tuple[Tuple[str, str], ...]]) -> Any:
+        path, params = key
+        self.upstream_calls += 1
+        try:
+            response = self._session.get(f"{self.base_url}/{path}", params=list(params), timeout=self._timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise UpstreamError(f"Failed to fetch from {self.name}.") from e
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise UpstreamError(f"{self.name[:1].upper()}{self.name[1:]} returned non-JSON response.") from e
+
+        if self._transform is not None:
+            payload = self._transform(payload)
+        self._cache.set(key, payload)
+        return payload
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self._flight.shared,
+            "cache": self._cache.stats(),
+        }
+
+
+class AsyncUpstreamClient:
+    """
+    Asyncio front of an `UpstreamClient`, for the ASGI serving mode: same base
+    URL, transform, cache and statistics, but requests are made with aiohttp
+    on the event loop, over at most `max_concurrency` connections (further
+    requests wait for one). Identical in-flight requests are coalesced into
+    one task; `transform` (CPU-bound, e.g. re-signing) runs in `executor`.
+
+    The aiohttp session is bound to the event loop of the first request.
+    """
+
+    def __init__(self, client: UpstreamClient, max_concurrency: int = 64, executor: Optional[Executor] = None) -> None:
+        if aiohttp is None:
+            raise RuntimeError("The async upstream client needs the `aiohttp` package")
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = executor
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._inflight: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], "asyncio.Task[Any]"] = {}
+        self.coalesced = 0
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.client._timeout),
+            )
+        return self._session
+
+    async def get_json(self, path: str, params: QueryParams = ()) -> Any:
+        """
+        Async `UpstreamClient.get_json`, sharing its cache.
+        """
+        key = UpstreamClient.cache_key(path, params)
+        cached = self.client._cache.get(key)
+        if cached is not None:
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A cancelled waiter (client gone) must not cancel the fetch other waiters share
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: Tuple[str, Tuple[Tuple[str, str], ...]]) -> Any:
+        path, params = key
+        client = self.client
+        client.upstream_calls += 1
+        try:
+            async with self._get_session().get(f"{client.base_url}/{path}", params=list(params)) as response:
+                if response.status >= 400:
+                    raise UpstreamError(f"Failed to fetch from {client.name}.")
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise UpstreamError(f"Failed to fetch from {client.name}.") from e
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise UpstreamError(f"{client.name[:1].upper()}{client.name[1:]} returned non-JSON response.") from e
+
+        if client._transform is not None:
+            payload = await asyncio.get_running_loop().run_in_executor(self._executor, client._transform, payload)
+        client._cache.set(key, payload)
+        return payload
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+        }
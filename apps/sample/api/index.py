@@ -1,47 +1,77 @@
+from __future__ import annotations
+
+import time
+
+_MODULE_IMPORT_START = time.perf_counter()
+
 import hashlib
+import importlib.metadata
+import json
+import multiprocessing
 import os
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
 
-import ecdsa
 import requests
-from ecdsa.util import sigencode_der
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from pydantic import ValidationError
 
 
-from eip712.convert.input_to_resolved import EIP712InputToResolvedConverter
-from eip712.convert.resolved_to_instructions import (
-    EIP712ResolvedToInstructionsConverter,
-)
-from eip712.model.input.descriptor import InputEIP712DAppDescriptor
-from eip712.model.instruction import EIP712Instruction
-from eip712.model.types import EIP712Version
-from eip712.serialize import serialize_instruction
-from erc7730.convert.calldata.convert_erc7730_input_to_calldata import (
-    erc7730_descriptor_to_calldata_descriptors,
-)
-from erc7730.convert.ledger.eip712.convert_erc7730_to_eip712 import (
-    ERC7730toEIP712Converter,
-)
-from erc7730.convert.ledger.eip712.convert_erc7730_v2_to_eip712 import (
-    ERC7730V2toEIP712Converter,
-)
-from erc7730.convert.resolved.convert_erc7730_input_to_resolved import (
-    ERC7730InputToResolved,
-)
-from erc7730.common.output import ListOutputAdder
-from erc7730.model.input.descriptor import InputERC7730Descriptor
-
-# v2 imports
-from erc7730.convert.calldata.convert_erc7730_v2_input_to_calldata import (
-    erc7730_v2_descriptor_to_calldata_descriptors,
-)
-from erc7730.model.input.v2.descriptor import InputERC7730Descriptor as InputERC7730DescriptorV2
+# The erc7730/eip712 stacks are imported lazily, per version (see _pipelines)
+if TYPE_CHECKING:
+    from eip712.model.input.descriptor import InputEIP712DAppDescriptor
+    from eip712.model.instruction import EIP712Instruction
+    from erc7730.common.output import ListOutputAdder
+    from erc7730.model.input.descriptor import InputERC7730Descriptor
+    from erc7730.model.input.v2.descriptor import InputERC7730Descriptor as InputERC7730DescriptorV2
+
+import _incremental
+import _metrics
+import _pipelines
+import _signing
+from _abi import AbiInliner, AbiResolver, AbiStore
+from _admission import Overloaded, Workload
+from _cache import CACHE_BACKEND, ResultCache, RevalidatingValue, canonical_hash, make_cache
+from _cassette import Cassette
+from _encoding import COMPACT_FORMAT, compact_descriptors, compress_response, json_response
+from _incremental import IncrementalStore
+from _metrics import collect_stages, record_stages, stage
+from _signing import get_signer, signing_stats
+from _store import DescriptorStore
+from _tlv import resign_descriptors_hex
+from _transform import EtherscanUrlNormalizer, NullStripper, SignedDescriptorResigner, transform_json
+from _upstream import UpstreamClient, UpstreamError
 
 # Constants
 DEFAULT_CAL_URL = "https://global.api.prd.ledger.com/cal/v1"
 DEFAULT_METADATA_SERVICE_URL = "https://nft.api.live.ledger.com"
+# Upstream overrides, e.g. to point at local stand-ins in benchmarks
+CAL_URL = os.getenv("CAL_URL", DEFAULT_CAL_URL)
+METADATA_SERVICE_URL = os.getenv("METADATA_SERVICE_URL", DEFAULT_METADATA_SERVICE_URL)
+ETHERSCAN_URL = "https://api.etherscan.io"
 SIGNATURE_TLV_TAG = 0x15
+
+# Pool worker processes (conversion pool, precompiler) import this module only
+# for the pipeline functions: they skip the start-up work of a serving process
+# (cassette loading, signing key preloading, the descriptor store, the warm-up
+# thread). The other module-level objects do no I/O until first used.
+IS_POOL_WORKER = multiprocessing.parent_process() is not None
+
+# Upstream record/replay (see _cassette): UPSTREAM_CASSETTE_MODE=record captures
+# CAL and metadata service responses into UPSTREAM_CASSETTE_DIR, =replay serves
+# them from there without network access
+UPSTREAM_CASSETTE_MODE = os.getenv("UPSTREAM_CASSETTE_MODE", "")
+UPSTREAM_CASSETTE_DIR = os.getenv("UPSTREAM_CASSETTE_DIR") or os.path.join(tempfile.gettempdir(), "upstream-cassette")
+upstream_cassette = (
+    Cassette(UPSTREAM_CASSETTE_DIR, UPSTREAM_CASSETTE_MODE) if UPSTREAM_CASSETTE_MODE and not IS_POOL_WORKER else None
+)
+cal_session = requests.Session()
+if upstream_cassette is not None:
+    cal_session.mount("https://", upstream_cassette.adapter())
+    cal_session.mount("http://", upstream_cassette.adapter())
 TEST_SIGNING_KEY = "b1ed47ef58f782e2bc4d5abe70ef66d9009c2957967017054470e0f3e10f5833"
 TEST_VERIFYING_KEY = "0320da62003c0ce097e33644a10fe4c30454069a4454f0fa9d4e84f45091429b52"
 TEST_SIGNING_KEY_CERTIFICATE = "f7aeb3d0f44f1bf50d89a1996bbb2bf0544dce2e0a2d0ff67eea0fa9c750f3d0"
@@ -57,6 +87,15 @@ CAL_CERTIFICATES_OVERRIDES = {
     "token_metadata_key"
 }
 
+# Load signing keys once at startup so requests only pay for signing itself
+if not IS_POOL_WORKER:
+    get_signer(TEST_SIGNING_KEY)
+    get_signer(TEST_SIGNING_KEY_CERTIFICATE)
+
+# One "chainId:address" entry of the processed descriptors returned for client storage
+DescriptorGroup = Tuple[str, List[Dict[str, Any]]]
+
+
 def _is_v2_descriptor(data: Dict[str, Any]) -> bool:
     """Check if the descriptor uses the v2 schema."""
     schema = data.get("$schema") or ""
@@ -67,76 +106,148 @@ def _is_v2_descriptor(data: Dict[str, Any]) -> bool:
 app = Flask(__name__)
 
 
+@app.before_request
+def _start_request_metrics() -> None:
+    _metrics.start_request(request.endpoint or "unmatched")
+
+
+@app.after_request
+def _finish_request_metrics(response: Response) -> Response:
+    server_timing = _metrics.finish_request(response.status_code)
+    if server_timing:
+        response.headers["Server-Timing"] = server_timing
+    return response
+
+
+@app.after_request
+def _compress_response(response: Response) -> Response:
+    return compress_response(response, request.headers.get("Accept-Encoding", ""))
+
+
+@app.teardown_request
+def _end_request_metrics(error: Optional[BaseException]) -> None:
+    _metrics.end_request()
+
+
+# Workload classes, so CPU-bound conversions cannot starve the I/O-bound proxy
+# and certificates routes. Conversions (only the validate -> convert -> sign
+# step; caching stays in this process) run in their own process pool unless
+# CONVERSION_EXECUTOR=inline; a full queue is rejected with Retry-After.
+# PARALLEL_SIGNING_WORKERS only takes effect with CONVERSION_EXECUTOR=inline
+# (see _signing): pooled conversions sign serially in their worker.
+CONVERSION_CONCURRENCY = int(os.getenv("CONVERSION_CONCURRENCY", str(os.cpu_count() or 1)))
+conversion_workload = Workload(
+    "conversion",
+    CONVERSION_CONCURRENCY,
+    int(os.getenv("CONVERSION_QUEUE", str(4 * CONVERSION_CONCURRENCY))),
+    reject_status=429,
+    processes=os.getenv("CONVERSION_EXECUTOR", "process") == "process",
+)
+# I/O-bound routes (certificates, dynamic-descriptor proxy) have no executor of
+# their own: their workload class only bounds how many run at once and queue,
+# in the calling server thread (or event loop in ASGI mode), since they wait on
+# upstream services and a thread pool would only add a hand-off.
+io_workload = Workload(
+    "io",
+    int(os.getenv("IO_CONCURRENCY", "64")),
+    int(os.getenv("IO_QUEUE", "256")),
+    reject_status=503,
+)
+
+
+@app.errorhandler(Overloaded)
+def _overloaded(error: Overloaded) -> Tuple[Dict[str, Any], int, Dict[str, str]]:
+    return {"error": str(error)}, error.status, {"Retry-After": str(error.retry_after)}
+
+# Processed descriptors keyed by the hash of the normalized request body.
+# DESCRIPTOR_CACHE_DIR enables an on-disk tier that survives restarts.
+DESCRIPTOR_CACHE_SIZE = int(os.getenv("DESCRIPTOR_CACHE_SIZE", "256"))
+DESCRIPTOR_CACHE_DIR = os.getenv("DESCRIPTOR_CACHE_DIR")
+descriptor_cache = ResultCache(
+    DESCRIPTOR_CACHE_SIZE,
+    DESCRIPTOR_CACHE_DIR,
+    memory=make_cache("descriptors", DESCRIPTOR_CACHE_SIZE),
+)
+
+
+def _descriptor_cache_namespace() -> str:
+    """
+    Salt cache keys with the converter library versions so persisted results
+    are not reused after an erc7730/eip712 upgrade.
+    """
+    versions = []
+    for package in ("erc7730", "eip712-clearsign"):
+        try:
+            versions.append(f"{package}=={importlib.metadata.version(package)}")
+        except importlib.metadata.PackageNotFoundError:
+            versions.append(f"{package}==unknown")
+    return ";".join(versions)
+
+
+DESCRIPTOR_CACHE_NAMESPACE = _descriptor_cache_namespace()
+
+# Last processed selectors/schemas per chainId:address, for incremental re-processing
+incremental_store = IncrementalStore(int(os.getenv("INCREMENTAL_STORE_SIZE", "1024")))
+
+
 def remove_null_values(obj: Any) -> Any:
     """
-    Recursively remove keys with None/null values from dictionaries and lists.
+    Remove keys with None/null values from dictionaries and lists, in place.
     This is needed to behave the same way as the CAL service.
     """
-    if isinstance(obj, dict):
-        return {
-            key: remove_null_values(value)
-            for key, value in obj.items()
-            if value is not None
-        }
-    elif isinstance(obj, list):
-        return [
-            remove_null_values(item)
-            for item in obj
-            if item is not None
-        ]
-    else:
-        return obj
+    return transform_json(obj, [NullStripper()])
+
+
+# Local ABI cache: Etherscan ABI references are served from disk (optionally
+# pre-seeded from ABI_SEED_DIR), and never fetched when ABI_OFFLINE is set
+etherscan_client = UpstreamClient("Etherscan", ETHERSCAN_URL, cache_ttl=0)
+abi_resolver = AbiResolver(
+    AbiStore(os.getenv("ABI_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "erc7730-abis")),
+    etherscan_client.get_json,
+    offline=os.getenv("ABI_OFFLINE", "").lower() in ("1", "true", "yes"),
+    seed_directory=os.getenv("ABI_SEED_DIR") or None,
+)
 
 
 def normalize_etherscan_urls(obj: Any) -> Any:
     """
-    Recursively process JSON data to update Etherscan URLs:
+    Update Etherscan URLs in JSON data, in place:
     1. Replace old API URLs with v2 API URLs
     2. Append API key if ETHERSCAN_API_KEY environment variable is set
+    Descriptor results are cached under the normalized data, so ABIs are only
+    inlined (see `inline_abis`) once the cache missed.
     """
-    if isinstance(obj, dict):
-        return {
-            key: normalize_etherscan_urls(value)
-            for key, value in obj.items()
-        }
-    elif isinstance(obj, list):
-        return [
-            normalize_etherscan_urls(item)
-            for item in obj
-        ]
-    elif isinstance(obj, str):
-        # Step 1: Replace old API URL format with v2 format
-        if obj.startswith("https://api.etherscan.io/api?module=contract&action=getabi&address="):
-            obj = obj.replace(
-                "https://api.etherscan.io/api?module=contract&action=getabi&address=",
-                "https://api.etherscan.io/v2/api?chainid=1&module=contract&action=getabi&address=",
-                1
-            )
+    return transform_json(obj, [EtherscanUrlNormalizer(os.getenv("ETHERSCAN_API_KEY"))])
 
-        # Step 2: Append API key if URL starts with v2 API and ETHERSCAN_API_KEY is set
-        if obj.startswith("https://api.etherscan.io/v2/api"):
-            api_key = os.getenv("ETHERSCAN_API_KEY")
-            if api_key:
-                obj = f"{obj}&apikey={api_key}"
 
-        return obj
-    else:
-        return obj
+def inline_abis(obj: Any) -> Any:
+    """
+    Inline ABIs referenced by (normalized) getabi URLs from the local ABI
+    cache, fetching missing ones unless ABI_OFFLINE is set. In place.
+    """
+    with stage("abi_inline"):
+        return transform_json(obj, [AbiInliner(abi_resolver)])
 
 
 def sign_payload(payload: str, signing_key: str = TEST_SIGNING_KEY) -> Dict[str, Any]:
     """
     Sign a payload with CAL staging key.
+    Keys are loaded once and signatures are memoized by payload hash (see _signing).
+    Within a signing batch, the returned `signatures` object is filled in when
+    the batch is flushed.
     """
-    signing_key_obj = ecdsa.SigningKey.from_string(
-        bytes.fromhex(signing_key),
-        curve=ecdsa.SECP256k1
-    )
-    signature = signing_key_obj.sign(
-        bytes.fromhex(payload),
-        hashfunc=hashlib.sha256,
-        sigencode=sigencode_der
-    )
+    signing_batch = _signing.current_batch()
+    if signing_batch is not None:
+        signatures: Dict[str, str] = {}
+        signing_batch.add(
+            get_signer(signing_key),
+            bytes.fromhex(payload),
+            lambda signature: signatures.update(test=signature.hex(), prod=signature.hex()),
+        )
+        return {"data": payload, "signatures": signatures}
+
+    with stage("sign"):
+        signature = get_signer(signing_key).sign(bytes.fromhex(payload))
     return {"data": payload, "signatures": {"test": signature.hex(), "prod": signature.hex()}}
 
 
@@ -159,8 +270,13 @@ def format_and_sign_descriptor(descriptor: Any) -> Dict[str, Any]:
     """
     Process a single descriptor: convert to JSON, sign, and clean.
     """
-    json_descriptor = descriptor.model_dump(mode="json")
+    return sign_descriptor_json(descriptor.model_dump(mode="json"))
 
+
+def sign_descriptor_json(json_descriptor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sign and clean the JSON of a single descriptor, in place.
+    """
     # Sign transaction info
     if "transaction_info" in json_descriptor and "descriptor" in json_descriptor["transaction_info"]:
         json_descriptor["transaction_info"]["descriptor"] = sign_payload(
@@ -193,91 +309,231 @@ def process_contract_descriptor(input_descriptor: InputERC7730Descriptor) -> Dic
     """
     Process a contract-type ERC7730 v1 descriptor.
     """
+    return dict(iter_contract_descriptor_groups(input_descriptor))
+
+
+def iter_contract_descriptor_groups(input_descriptor: InputERC7730Descriptor) -> Iterator[DescriptorGroup]:
+    """
+    Streaming variant of `process_contract_descriptor`.
+    """
     # Convert to calldata descriptors
-    calldata_descriptors = erc7730_descriptor_to_calldata_descriptors(input_descriptor)
+    with stage("convert"):
+        calldata_descriptors = _pipelines.load("v1").erc7730_descriptor_to_calldata_descriptors(input_descriptor)
 
     # Check if conversion returned empty list
     if not calldata_descriptors:
         raise ValueError("No calldata descriptors generated. Please check the descriptor format.")
 
-    return _group_and_sign_calldata_descriptors(calldata_descriptors)
+    yield from _iter_signed_calldata_groups(calldata_descriptors)
 
 
 def process_contract_descriptor_v2(input_descriptor_v2: InputERC7730DescriptorV2) -> Dict[str, Any]:
     """
     Process a contract-type ERC7730 v2 descriptor.
     """
-    calldata_descriptors = erc7730_v2_descriptor_to_calldata_descriptors(input_descriptor_v2)
+    return dict(iter_contract_descriptor_v2_groups(input_descriptor_v2))
+
+
+def iter_contract_descriptor_v2_groups(input_descriptor_v2: InputERC7730DescriptorV2) -> Iterator[DescriptorGroup]:
+    """
+    Streaming variant of `process_contract_descriptor_v2`.
+    """
+    with stage("convert"):
+        calldata_descriptors = _pipelines.load("v2").erc7730_v2_descriptor_to_calldata_descriptors(input_descriptor_v2)
 
     if not calldata_descriptors:
         raise ValueError("No calldata descriptors generated from v2 descriptor. Please check the descriptor format.")
 
-    return _group_and_sign_calldata_descriptors(calldata_descriptors)
+    yield from _iter_signed_calldata_groups(calldata_descriptors)
 
 
 def _group_and_sign_calldata_descriptors(calldata_descriptors: List[Any]) -> Dict[str, Any]:
     """
     Common logic: group descriptors by chain/address, sign them, and return.
     """
+    return dict(_iter_signed_calldata_groups(calldata_descriptors))
+
+
+def _iter_signed_calldata_groups(calldata_descriptors: List[Any]) -> Iterator[DescriptorGroup]:
+    """
+    Group descriptors by chain/address and sign them, yielding each
+    ("chainId:address", data) group as soon as it is signed.
+    """
     # Group descriptors by chain and address
     grouped_descriptors = group_descriptors_by_chain_and_address(calldata_descriptors)
 
     # Process each group and return them to client
-    processed_descriptors = {}
+    incremental = _incremental.current()
     for (chain_id, address), descriptors in grouped_descriptors.items():
-        selectors = {
-            descriptor.selector: format_and_sign_descriptor(descriptor)
-            for descriptor in descriptors
-        }
+        # Use "chainId:address" format as key for client storage
+        key = f"{chain_id}:{address}"
+
+        if incremental is None:
+            selectors = {
+                descriptor.selector: format_and_sign_descriptor(descriptor)
+                for descriptor in descriptors
+            }
+        else:
+            # Only re-sign selectors whose descriptor changed since the last
+            # submission; the JSON hashed for that is also the one signed
+            selectors = {}
+            for descriptor in descriptors:
+                json_descriptor = descriptor.model_dump(mode="json")
+                selectors[descriptor.selector] = incremental.item(
+                    key,
+                    "calldata",
+                    descriptor.selector,
+                    json_descriptor,
+                    lambda json_descriptor=json_descriptor: sign_descriptor_json(json_descriptor)
+                )
 
         descriptor_data = [{
             "descriptors_calldata": {address: selectors}
         }]
 
-        # Use "chainId:address" format as key for client storage
-        key = f"{chain_id}:{address}"
-        processed_descriptors[key] = descriptor_data
+        yield key, descriptor_data
 
-    return processed_descriptors
 
+# Instruction fields that differ between the deployments of an EIP-712 schema
+EIP712_DEPLOYMENT_FIELDS = {"chain_id", "address"}
+# EIP-712 input contract fields that differ between its deployments
+EIP712_CONTRACT_DEPLOYMENT_FIELDS = {"address"}
 
-def format_and_sign_eip712_instruction(descriptor: EIP712Instruction) -> Dict[str, Any]:
+
+def format_and_sign_eip712_instruction(
+    descriptor: EIP712Instruction,
+    template: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
     Process a single instruction: convert to JSON, sign, and clean.
+    `template` is the cleaned JSON of an instruction that only differs by its
+    deployment fields, so only those are converted again.
     """
-    json_descriptor = descriptor.model_dump(mode="json")
-    if json_descriptor.get("name_types") is not None:
-        json_descriptor["name_types"] = [
-            EIP712ResolvedToInstructionsConverter.int_to_name_type(value).value
-            if isinstance(value, int)
-            else value
-            for value in json_descriptor["name_types"]
-        ]
-    if json_descriptor.get("name_sources") is not None:
-        json_descriptor["name_sources"] = [
-            EIP712ResolvedToInstructionsConverter.int_to_name_source(value).value
-            if isinstance(value, int)
-            else value
-            for value in json_descriptor["name_sources"]
-        ]
-    serialized = serialize_instruction(descriptor, EIP712Version.V2)
+    eip712 = _pipelines.load("eip712")
+    if template is not None:
+        json_descriptor = dict(template)
+        json_descriptor.update(remove_null_values(
+            descriptor.model_dump(mode="json", include=EIP712_DEPLOYMENT_FIELDS)
+        ))
+    else:
+        json_descriptor = descriptor.model_dump(mode="json")
+        if json_descriptor.get("name_types") is not None:
+            json_descriptor["name_types"] = [
+                eip712.EIP712ResolvedToInstructionsConverter.int_to_name_type(value).value
+                if isinstance(value, int)
+                else value
+                for value in json_descriptor["name_types"]
+            ]
+        if json_descriptor.get("name_sources") is not None:
+            json_descriptor["name_sources"] = [
+                eip712.EIP712ResolvedToInstructionsConverter.int_to_name_source(value).value
+                if isinstance(value, int)
+                else value
+                for value in json_descriptor["name_sources"]
+            ]
+        json_descriptor = remove_null_values(json_descriptor)
+    with stage("serialize"):
+        serialized = eip712.serialize_instruction(descriptor, eip712.EIP712Version.V2)
     signature = sign_payload(serialized)
     json_descriptor["descriptor"] = serialized
     json_descriptor["signatures"] = signature["signatures"]
-    return remove_null_values(json_descriptor)
+    return json_descriptor
 
 
-def convert_erc7730_to_eip712_descriptor(descriptor: InputEIP712DAppDescriptor) -> Dict[str, Dict[str, Any]]:
+class EIP712Conversion:
+    """
+    State shared by the EIP-712 conversions of one request: a single pair of
+    converter instances, and for every instruction list already formatted
+    (keyed by the format digest of its contract and its schema hash) its JSON
+    templates and signed result per deployment. A schema deployed on several
+    chains/addresses is only converted to JSON once, and a repeated deployment
+    is not serialized and signed again. The serialized payload and signature
+    cover the deployment, so each new deployment is serialized and signed.
+    """
+
+    def __init__(self) -> None:
+        eip712 = _pipelines.load("eip712")
+        self.to_resolved = eip712.EIP712InputToResolvedConverter()
+        self.to_instructions = eip712.EIP712ResolvedToInstructionsConverter()
+        self._formatted: Dict[
+            Tuple[str, str],
+            Tuple[List[Dict[str, Any]], Dict[Tuple[Any, str], Dict[str, Any]]],
+        ] = {}
+
+    @staticmethod
+    def format_digest(contract: Any) -> str:
+        """
+        Digest of what the instructions of an EIP-712 input contract are
+        generated from, deployment excluded: its name and messages (schemas and
+        display formats). The schema hash alone does not cover display formats.
+        """
+        content = contract.model_dump_json(exclude=EIP712_CONTRACT_DEPLOYMENT_FIELDS)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def format_instructions(
+        self,
+        chain_id: Any,
+        address: str,
+        schema_hash: str,
+        format_digest: str,
+        instructions_list: List[EIP712Instruction],
+    ) -> Dict[str, Any]:
+        memo = self._formatted.get((format_digest, schema_hash))
+        if memo is None:
+            instructions = [format_and_sign_eip712_instruction(instruction) for instruction in instructions_list]
+            templates = [
+                {name: value for name, value in instruction.items() if name not in ("descriptor", "signatures")}
+                for instruction in instructions
+            ]
+            formatted = {"instructions": instructions}
+            self._formatted[(format_digest, schema_hash)] = templates, {(chain_id, address): formatted}
+            return formatted
+
+        templates, by_deployment = memo
+        formatted = by_deployment.get((chain_id, address))
+        if formatted is None:
+            formatted = {
+                "instructions": [
+                    format_and_sign_eip712_instruction(instruction, template)
+                    for instruction, template in zip(instructions_list, templates)
+                ]
+            }
+            by_deployment[(chain_id, address)] = formatted
+        return formatted
+
+
+def convert_erc7730_to_eip712_descriptor(
+    descriptor: InputEIP712DAppDescriptor,
+    conversion: Optional[EIP712Conversion] = None,
+) -> Dict[str, Dict[str, Any]]:
     """
     Convert ERC7730 descriptors to EIP712 descriptors.
     Returns a dict keyed by "chain_id:address" strings.
+    Pass the same `conversion` for every descriptor of a request to share its work.
     """
-    resolved_descriptor = EIP712InputToResolvedConverter().convert(descriptor)
-    instructions = EIP712ResolvedToInstructionsConverter().convert(resolved_descriptor)
+    if conversion is None:
+        conversion = EIP712Conversion()
+    with stage("eip712_instructions"):
+        resolved_descriptor = conversion.to_resolved.convert(descriptor)
+        instructions = conversion.to_instructions.convert(resolved_descriptor)
+
+    # Computed once per contract, shared by its schemas
+    format_digests = {
+        contract.address.lower(): conversion.format_digest(contract) for contract in descriptor.contracts
+    }
 
     # instructions structure: {address: {schema_hash: [instruction_list]}}
     result = {}
+    incremental = _incremental.current()
     for (address, instruction_dict) in instructions.items():
+        format_digest = format_digests.get(address.lower())
+        if format_digest is None:
+            # No input contract for this address: key on the instructions themselves
+            format_digest = canonical_hash(
+                [instruction.model_dump(mode="json", exclude=EIP712_DEPLOYMENT_FIELDS)
+                 for instruction_list in instruction_dict.values() for instruction in instruction_list],
+                "eip712-instructions",
+            )
         for (schema_hash, instructions_list) in instruction_dict.items():
             if not instructions_list:
                 continue
@@ -290,12 +546,22 @@ def convert_erc7730_to_eip712_descriptor(descriptor: InputEIP712DAppDescriptor)
                 result[key] = {}
             if address not in result[key]:
                 result[key][address] = {}
-            result[key][address][schema_hash] = {
-                "instructions": [
-                    format_and_sign_eip712_instruction(instruction)
-                    for instruction in instructions_list
-                ]
-            }
+            if incremental is None:
+                result[key][address][schema_hash] = conversion.format_instructions(
+                    chain_id, address, schema_hash, format_digest, instructions_list
+                )
+            else:
+                # Only re-serialize and re-sign schemas whose format changed
+                result[key][address][schema_hash] = incremental.item(
+                    key,
+                    "eip712",
+                    schema_hash,
+                    format_digest,
+                    lambda chain_id=chain_id, address=address, schema_hash=schema_hash,
+                    format_digest=format_digest, instructions_list=instructions_list: conversion.format_instructions(
+                        chain_id, address, schema_hash, format_digest, instructions_list
+                    )
+                )
 
     return result
 
@@ -305,6 +571,13 @@ def process_eip712_descriptor(input_descriptor: InputERC7730Descriptor) -> Dict[
     Process an EIP712-type ERC7730 v1 descriptor.
     Converts ERC7730 input to resolved format, then to EIP712 descriptors.
     """
+    return dict(iter_eip712_descriptor_groups(input_descriptor))
+
+
+def iter_eip712_descriptor_groups(input_descriptor: InputERC7730Descriptor) -> Iterator[DescriptorGroup]:
+    """
+    Streaming variant of `process_eip712_descriptor`.
+    """
     return _convert_and_format_eip712_descriptors(
         convert_to_eip712=lambda output: _convert_v1_erc7730_to_eip712_descriptors(input_descriptor, output),
         conversion_error_message="Failed to convert ERC7730 descriptor to EIP712",
@@ -317,6 +590,13 @@ def process_eip712_descriptor_v2(input_descriptor_v2: InputERC7730DescriptorV2)
     Process an EIP712-type ERC7730 v2 descriptor.
     Uses the v2 converter to produce legacy EIP-712 descriptors.
     """
+    return dict(iter_eip712_descriptor_v2_groups(input_descriptor_v2))
+
+
+def iter_eip712_descriptor_v2_groups(input_descriptor_v2: InputERC7730DescriptorV2) -> Iterator[DescriptorGroup]:
+    """
+    Streaming variant of `process_eip712_descriptor_v2`.
+    """
     return _convert_and_format_eip712_descriptors(
         convert_to_eip712=lambda output: _convert_v2_erc7730_to_eip712_descriptors(input_descriptor_v2, output),
         conversion_error_message="Failed to convert v2 ERC7730 descriptor to EIP712",
@@ -331,11 +611,14 @@ def _convert_v1_erc7730_to_eip712_descriptors(
     """
     v1 pipeline: input -> resolved -> EIP712 descriptors.
     """
-    resolved_descriptor = ERC7730InputToResolved().convert(input_descriptor, output)
+    v1 = _pipelines.load("v1")
+    with stage("resolve"):
+        resolved_descriptor = v1.ERC7730InputToResolved().convert(input_descriptor, output)
     if resolved_descriptor is None:
         raise ValueError(f"Failed to resolve ERC7730 descriptor: {output}")
 
-    return ERC7730toEIP712Converter().convert(resolved_descriptor, output)
+    with stage("convert"):
+        return v1.ERC7730toEIP712Converter().convert(resolved_descriptor, output)
 
 
 def _convert_v2_erc7730_to_eip712_descriptors(
@@ -345,18 +628,19 @@ def _convert_v2_erc7730_to_eip712_descriptors(
     """
     v2 pipeline currently relies on the dedicated v2 -> EIP712 converter.
     """
-    return ERC7730V2toEIP712Converter().convert(input_descriptor_v2, output)
+    with stage("convert"):
+        return _pipelines.load("v2").ERC7730V2toEIP712Converter().convert(input_descriptor_v2, output)
 
 
 def _convert_and_format_eip712_descriptors(
     convert_to_eip712: Callable[[ListOutputAdder], Optional[Dict[str, InputEIP712DAppDescriptor]]],
     conversion_error_message: str,
     empty_error_message: str,
-) -> Dict[str, Any]:
+) -> Iterator[DescriptorGroup]:
     """
     Common logic for v1/v2 EIP712 conversion: run converter, validate result and format response.
     """
-    output = ListOutputAdder()
+    output = _pipelines.load("common").ListOutputAdder()
     eip712_descriptors = convert_to_eip712(output)
 
     if eip712_descriptors is None:
@@ -364,7 +648,7 @@ def _convert_and_format_eip712_descriptors(
     if not eip712_descriptors:
         raise ValueError(empty_error_message)
 
-    return _format_eip712_descriptors_for_response(eip712_descriptors)
+    yield from _iter_eip712_groups(eip712_descriptors)
 
 
 def _format_eip712_descriptors_for_response(
@@ -374,79 +658,482 @@ def _format_eip712_descriptors_for_response(
     Common post-conversion logic for both v1 and v2 EIP712 descriptor flows.
     Organize generated descriptors by chain_id:address for client storage.
     """
-    processed_descriptors = {}
+    return dict(_iter_eip712_groups(eip712_descriptors))
+
+
+def _iter_eip712_groups(
+    eip712_descriptors: Dict[str, InputEIP712DAppDescriptor],
+) -> Iterator[DescriptorGroup]:
+    """
+    Yield the ("chainId:address", data) groups of each EIP712 descriptor as
+    soon as it is converted and signed. A key produced again by a later
+    descriptor replaces the earlier group.
+    """
+    conversion = EIP712Conversion()
 
     for descriptor_in in eip712_descriptors.values():
-        generated_by_chain_address = convert_erc7730_to_eip712_descriptor(descriptor_in)
+        generated_by_chain_address = convert_erc7730_to_eip712_descriptor(descriptor_in, conversion)
         for key, generated_data in generated_by_chain_address.items():
-            processed_descriptors[key] = [{
+            yield key, [{
                 "descriptors_eip712": generated_data
             }]
 
-    return processed_descriptors
 
+def process_descriptor_data(request_data: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Run the validate -> convert -> sign pipeline on a single ERC7730 descriptor.
+    Returns the processed descriptors keyed by "chainId:address".
+    Raises ValidationError/ValueError for invalid descriptors.
 
-@app.route("/api/process-erc7730-descriptor", methods=["POST"])
-def process_erc7730_descriptor() -> Tuple[Dict[str, Any], int]:
+    Results are cached by the canonical hash of the normalized descriptor, and
+    concurrent requests for the same descriptor share a single computation.
     """
-    Process an ERC7730 descriptor and return the processed data for client storage.
-    Supports both contract and EIP712 descriptor types.
+    # Normalize Etherscan URLs in the request data
+    with stage("normalize"):
+        request_data = normalize_etherscan_urls(request_data)
+
+    if not use_cache:
+        return _convert_descriptor_data(inline_abis(request_data))
+
+    cache_key = canonical_hash(request_data, DESCRIPTOR_CACHE_NAMESPACE)
+    return descriptor_cache.get_or_compute(
+        cache_key,
+        lambda: _convert_descriptor_data(inline_abis(request_data))
+    )
+
+
+def _convert_descriptor_data(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    try:
-        request_data = request.get_json()
-        if not request_data:
-            return {"error": "No JSON data provided"}, 400
+    Run the CPU-bound part of the pipeline in a conversion workload slot: in
+    its process pool when enabled, except during an incremental session whose
+    state lives in this process. Stage timings are reported back to the request.
+    """
+    groups, timings = conversion_workload.run(
+        _timed_conversion, request_data, inline=_incremental.current() is not None
+    )
+    record_stages(timings)
+    return groups
 
-        # Normalize Etherscan URLs in the request data
-        request_data = normalize_etherscan_urls(request_data)
 
-        # Detect v2 schema and dispatch accordingly
-        is_v2 = _is_v2_descriptor(request_data)
+def _timed_conversion(request_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Conversion pool task: the processed groups and the stage durations measured.
+    """
+    with collect_stages() as timings:
+        groups = _process_normalized_descriptor_data(request_data)
+    return groups, timings
+
+
+def _process_normalized_descriptor_data(request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Uncached pipeline for a descriptor whose Etherscan URLs are already normalized.
+
+    With parallel signing enabled (PARALLEL_SIGNING_WORKERS, in the serving
+    process only), the signatures of every selector, enum value and EIP-712
+    instruction are collected first and computed together across the signing
+    pool, then filled in place; the output is identical to signing them one by one.
+    """
+    if not _signing.parallel_signing_enabled() or _incremental.current() is not None:
+        return dict(_iter_normalized_descriptor_groups(request_data))
+    with _signing.batch() as signing_batch:
+        groups = dict(_iter_normalized_descriptor_groups(request_data))
+        with stage("sign"):
+            signing_batch.flush()
+    return groups
+
 
-        if is_v2:
-            # v2 descriptor pipeline
-            input_descriptor_v2 = InputERC7730DescriptorV2.model_validate(
+def _iter_normalized_descriptor_groups(request_data: Dict[str, Any]) -> Iterator[DescriptorGroup]:
+    """
+    Streaming variant of `_process_normalized_descriptor_data`: validation and
+    conversion errors are raised before the first group is yielded.
+    """
+    # Detect v2 schema and dispatch accordingly
+    is_v2 = _is_v2_descriptor(request_data)
+
+    if is_v2:
+        # v2 descriptor pipeline
+        with stage("validate"):
+            input_descriptor_v2 = _pipelines.load("v2").InputERC7730DescriptorV2.model_validate(
                 request_data,
                 strict=False
             )
-            context = input_descriptor_v2.context
-            if not context:
-                return {"error": "Missing context in v2 descriptor"}, 400
-
-            if hasattr(context, 'contract') and context.contract is not None:
-                processed_descriptors = process_contract_descriptor_v2(input_descriptor_v2)
-            elif hasattr(context, 'eip712') and context.eip712 is not None:
-                processed_descriptors = process_eip712_descriptor_v2(input_descriptor_v2)
-            else:
-                return {"error": "Unknown v2 descriptor type: context must contain either 'contract' or 'eip712'"}, 400
+        context = input_descriptor_v2.context
+        if not context:
+            raise ValueError("Missing context in v2 descriptor")
+
+        if hasattr(context, 'contract') and context.contract is not None:
+            return iter_contract_descriptor_v2_groups(input_descriptor_v2)
+        elif hasattr(context, 'eip712') and context.eip712 is not None:
+            return iter_eip712_descriptor_v2_groups(input_descriptor_v2)
         else:
-            # v1 descriptor pipeline
-            input_descriptor = InputERC7730Descriptor.model_validate(
+            raise ValueError("Unknown v2 descriptor type: context must contain either 'contract' or 'eip712'")
+    else:
+        # v1 descriptor pipeline
+        with stage("validate"):
+            input_descriptor = _pipelines.load("v1").InputERC7730Descriptor.model_validate(
                 request_data,
                 strict=False
             )
-            context = input_descriptor.context
-            if not context:
-                return {"error": "Missing context in descriptor"}, 400
-
-            if hasattr(context, 'contract') and context.contract is not None:
-                processed_descriptors = process_contract_descriptor(input_descriptor)
-            elif hasattr(context, 'eip712') and context.eip712 is not None:
-                processed_descriptors = process_eip712_descriptor(input_descriptor)
-            else:
-                return {"error": "Unknown descriptor type: context must contain either 'contract' or 'eip712'"}, 400
+        context = input_descriptor.context
+        if not context:
+            raise ValueError("Missing context in descriptor")
+
+        if hasattr(context, 'contract') and context.contract is not None:
+            return iter_contract_descriptor_groups(input_descriptor)
+        elif hasattr(context, 'eip712') and context.eip712 is not None:
+            return iter_eip712_descriptor_groups(input_descriptor)
+        else:
+            raise ValueError("Unknown descriptor type: context must contain either 'contract' or 'eip712'")
 
-        return {
-            "message": "ERC7730 descriptor processed successfully",
-            "descriptors": processed_descriptors
-        }, 200
 
-    except ValidationError as e:
-        return {"error": f"Invalid descriptor format: {str(e)}"}, 400
-    except ValueError as e:
-        return {"error": str(e)}, 400
+def _process_descriptor_data_or_error(request_data: Any, use_cache: bool = True) -> Tuple[Dict[str, Any], int]:
+    """
+    Process a single descriptor and map failures to an error body and HTTP status.
+    """
+    try:
+        if not isinstance(request_data, dict) or not request_data:
+            return {"error": "No JSON data provided"}, 400
+        return {"descriptors": process_descriptor_data(request_data, use_cache)}, 200
+    except Overloaded:
+        raise
+    except Exception as e:
+        return _descriptor_error(e)
+
+
+def _batch_conversion(request_data: Dict[str, Any]) -> Tuple[Any, int]:
+    """
+    Batch conversion pool task: `_timed_conversion`, with failures mapped to an
+    error body and HTTP status so one invalid descriptor does not fail the batch.
+    """
+    try:
+        return _timed_conversion(request_data), 200
+    except Exception as e:
+        return _descriptor_error(e)
+
+
+def _descriptor_error(error: Exception) -> Tuple[Dict[str, Any], int]:
+    """
+    Map a descriptor processing failure to an error body and HTTP status.
+    """
+    if isinstance(error, ValidationError):
+        return {"error": f"Invalid descriptor format: {str(error)}"}, 400
+    if isinstance(error, ValueError):
+        return {"error": str(error)}, 400
+    return {"error": f"Failed to process descriptor: {str(error)}"}, 500
+
+
+@app.route("/api/process-erc7730-descriptor", methods=["POST"])
+def process_erc7730_descriptor() -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Process an ERC7730 descriptor and return the processed data for client storage.
+    Supports both contract and EIP712 descriptor types.
+
+    With `?incremental=true`, only the calldata selectors and EIP-712 schemas that
+    changed since the last submission for the same chainId:address are formatted
+    and signed again, and the response carries a `delta` listing changed and
+    removed selectors/schemas. `?delta=true` (implies incremental) additionally
+    reduces `descriptors` to the changed parts.
+
+    With `Accept: application/x-ndjson` (non-incremental only), the response is
+    streamed: one record per chainId:address group as soon as it is signed,
+    then a trailer record (see `_stream_descriptor_groups`).
+    """
+    try:
+        request_data = request.get_json()
     except Exception as e:
         return {"error": f"Failed to process descriptor: {str(e)}"}, 500
+    if not request_data:
+        return {"error": "No JSON data provided"}, 400
+
+    delta_only = _is_true(request.args.get("delta"))
+    if not (delta_only or _is_true(request.args.get("incremental"))):
+        if NDJSON_MIMETYPE in request.headers.get("Accept", ""):
+            return _stream_descriptor_groups(request_data)
+
+        result, status = _process_descriptor_data_or_error(request_data)
+        if status != 200:
+            return result, status
+
+        return _descriptors_response({
+            "message": "ERC7730 descriptor processed successfully",
+            "descriptors": result["descriptors"]
+        })
+
+    # Incremental state lives in this process, so the conversion runs here
+    with _incremental.session(incremental_store) as session:
+        result, status = _process_descriptor_data_or_error(request_data, False)
+    if status != 200:
+        return result, status
+
+    delta = session.delta()
+    session.commit()
+    return _descriptors_response({
+        "message": "ERC7730 descriptor processed successfully",
+        "descriptors": session.only_changed(result["descriptors"]) if delta_only else result["descriptors"],
+        "delta": delta
+    })
+
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _stream_descriptor_groups(request_data: Dict[str, Any]) -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Process a descriptor as an NDJSON stream, so clients can store groups while
+    the rest are still being signed:
+
+        {"type": "group", "key": "<chainId:address>", "descriptors": [...]}   (+ "format" when compact)
+        ...
+        {"type": "trailer", "groups": <count>[, "status": <code>, "error": "..."]}
+
+    A later group with the same key replaces the earlier one. Failures before
+    the first group keep the regular JSON error response and status; later ones
+    are reported in the trailer. Results already in the descriptor cache are
+    streamed from it, but streamed results are not added to it, so memory stays
+    bounded by a single group.
+    """
+    slot = ExitStack()
+    slot.enter_context(conversion_workload.slot())
+    try:
+        with stage("normalize"):
+            request_data = normalize_etherscan_urls(request_data)
+        cached = descriptor_cache.get(canonical_hash(request_data, DESCRIPTOR_CACHE_NAMESPACE))
+        if cached is not None:
+            groups = iter(cached.items())
+        else:
+            groups = _iter_normalized_descriptor_groups(inline_abis(request_data))
+        first = next(groups, None)
+    except Exception as e:
+        slot.close()
+        return _descriptor_error(e)
+
+    compact = request.args.get("format") == "compact"
+    binary = request.args.get("bytes") == "base64"
+
+    def encode(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def generate() -> Iterator[bytes]:
+        trailer: Dict[str, Any] = {"type": "trailer", "groups": 0}
+        group = first
+        try:
+            while group is not None:
+                key, data = group
+                record: Dict[str, Any] = {"type": "group", "key": key, "descriptors": data}
+                if compact:
+                    record.update(format=COMPACT_FORMAT, descriptors=compact_descriptors(data, binary))
+                yield encode(record)
+                trailer["groups"] += 1
+                group = next(groups, None)
+        except Exception as e:
+            body, status = _descriptor_error(e)
+            trailer.update(status=status, error=body["error"])
+        finally:
+            slot.close()
+            # The Server-Timing header only has the stages run before streaming
+            _metrics.finish_stream()
+        yield encode(trailer)
+
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    _metrics.defer_stages()
+    # Also release the slot when the client goes away before the stream ends
+    response.call_on_close(slot.close)
+    return response
+
+
+def _is_true(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in ("1", "true", "yes")
+
+
+def _descriptors_response(body: Dict[str, Any], status: int = 200) -> Response:
+    """
+    Encode a response carrying processed `descriptors` straight to JSON bytes,
+    in the compact format when requested with `?format=compact` (and
+    `&bytes=base64` for base64 payloads instead of hex).
+    """
+    if request.args.get("format") == "compact":
+        body = {
+            **body,
+            "format": COMPACT_FORMAT,
+            "descriptors": compact_descriptors(body["descriptors"], request.args.get("bytes") == "base64"),
+        }
+    return json_response(body, status)
+
+
+def _merge_descriptor_data(existing: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge two `[{descriptors_calldata/descriptors_eip712: ...}]` entries for the
+    same chainId:address, combining nested address/selector maps.
+    """
+    def merge(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+        merged = dict(left)
+        for key, value in right.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = merge(merged[key], value)
+            else:
+                merged[key] = value
+        return merged
+
+    return [merge(existing[0], new[0])]
+
+
+@app.route("/api/process-erc7730-descriptors", methods=["POST"])
+def process_erc7730_descriptors() -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Process a list of ERC7730 descriptors (v1 and/or v2) in parallel.
+    Returns the merged "chainId:address" map and the per-item errors, indexed
+    by position in the request array.
+
+    Cached descriptors are answered from the descriptor cache; the others are
+    admitted together and converted across the conversion pool, each holding
+    one conversion slot while it runs.
+
+    Responds 200 when at least one descriptor was processed. When none was,
+    responds 400 if every item was rejected as invalid, and 207 otherwise
+    (e.g. some failed unexpectedly) so the per-item statuses are checked.
+    """
+    request_data = request.get_json(silent=True)
+    if not isinstance(request_data, list) or not request_data:
+        return {"error": "Expected a non-empty JSON array of descriptors"}, 400
+
+    results: List[Tuple[Dict[str, Any], int]] = [({"error": "No JSON data provided"}, 400)] * len(request_data)
+    # Cache key -> (normalized descriptor, positions in the request array)
+    missing: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+    for position, item in enumerate(request_data):
+        if not isinstance(item, dict):
+            results[position] = {"error": "Descriptor must be a JSON object"}, 400
+            continue
+        if not item:
+            continue
+        with stage("normalize"):
+            item = normalize_etherscan_urls(item)
+        cache_key = canonical_hash(item, DESCRIPTOR_CACHE_NAMESPACE)
+        cached = descriptor_cache.get(cache_key)
+        if cached is not None:
+            results[position] = {"descriptors": cached}, 200
+        elif cache_key in missing:
+            missing[cache_key][1].append(position)
+        else:
+            try:
+                item = inline_abis(item)
+            except ValueError as e:
+                results[position] = _descriptor_error(e)
+                continue
+            missing[cache_key] = item, [position]
+
+    if missing:
+        converted = conversion_workload.map(_batch_conversion, [item for item, _ in missing.values()])
+        for (cache_key, (_, positions)), (result, status) in zip(missing.items(), converted):
+            if status == 200:
+                groups, timings = result
+                record_stages(timings)
+                descriptor_cache.set(cache_key, groups)
+                result = {"descriptors": groups}
+            for position in positions:
+                results[position] = result, status
+
+    processed_descriptors: Dict[str, Any] = {}
+    errors = []
+    for index, (result, status) in enumerate(results):
+        if status != 200:
+            errors.append({"index": index, "status": status, "error": result["error"]})
+            continue
+        for key, descriptor_data in result["descriptors"].items():
+            if key in processed_descriptors:
+                processed_descriptors[key] = _merge_descriptor_data(processed_descriptors[key], descriptor_data)
+            else:
+                processed_descriptors[key] = descriptor_data
+
+    status = 200
+    if len(errors) == len(request_data):
+        status = 400 if all(error["status"] == 400 for error in errors) else 207
+    return _descriptors_response({
+        "message": f"Processed {len(request_data) - len(errors)} of {len(request_data)} ERC7730 descriptors",
+        "descriptors": processed_descriptors,
+        "errors": errors
+    }, status)
+
+
+# Precompiled descriptors (see _precompile.py), served by the lookup routes below
+DESCRIPTOR_STORE_DIR = os.getenv("DESCRIPTOR_STORE_DIR")
+descriptor_store = DescriptorStore(DESCRIPTOR_STORE_DIR) if DESCRIPTOR_STORE_DIR and not IS_POOL_WORKER else None
+
+
+@app.route("/api/descriptors/<chain_id>/<address>", methods=["GET"])
+def get_stored_descriptors(chain_id: str, address: str) -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Look up the precompiled descriptors of a contract, in the same
+    `{"descriptors": {"chainId:address": [...]}}` shape as the processing
+    routes. The stored bytes are returned as-is, without decoding them.
+    """
+    if descriptor_store is None:
+        return {"error": "No precompiled descriptor store configured"}, 503
+    found = descriptor_store.get_raw(chain_id, address)
+    if found is None:
+        return {"error": f"No descriptors for {chain_id}:{address}"}, 404
+    key, raw = found
+    if request.args.get("format") == "compact":
+        return _descriptors_response({"descriptors": {key: json.loads(bytes(raw))}})
+    body = b"".join([b'{"descriptors":{', json.dumps(key).encode("utf-8"), b":", raw, b"}}"])
+    return Response(body, mimetype="application/json")
+
+
+@app.route("/api/descriptors/<chain_id>/<address>/<item>", methods=["GET"])
+def get_stored_descriptor_item(chain_id: str, address: str, item: str) -> Union[Response, Tuple[Dict[str, Any], int]]:
+    """
+    Look up a single calldata selector or EIP-712 schema hash of a contract's
+    precompiled descriptors, reduced to that item. Only the item's stored bytes
+    are read (see `DescriptorStore.get_item_raw`).
+    """
+    if descriptor_store is None:
+        return {"error": "No precompiled descriptor store configured"}, 503
+    found = descriptor_store.get_item_raw(chain_id, address, item)
+    if found is None:
+        return {"error": f"No descriptor for {item} on {chain_id}:{address}"}, 404
+    key, values = found
+    # One value per field, as `{field: {address: {item: ...}}}`
+    reduced = {field: (stored_address, raw) for field, stored_address, raw in values}
+    if request.args.get("format") == "compact":
+        return _descriptors_response({"descriptors": {key: [{
+            field: {stored_address: {item: json.loads(bytes(raw))}}
+            for field, (stored_address, raw) in reduced.items()
+        }]}})
+    chunks = [b'{"descriptors":{', json.dumps(key).encode("utf-8"), b":[{"]
+    for position, (field, (stored_address, raw)) in enumerate(reduced.items()):
+        chunks += [b"," if position else b"", json.dumps(field).encode("utf-8"), b":{",
+                   json.dumps(stored_address).encode("utf-8"), b":{", json.dumps(item).encode("utf-8"), b":", raw, b"}}"]
+    chunks.append(b"}]}}")
+    return Response(b"".join(chunks), mimetype="application/json")
+
+
+@app.route("/api/cache-stats", methods=["GET"])
+def get_cache_stats() -> Tuple[Dict[str, Any], int]:
+    """
+    Report hit/miss statistics of the API caches.
+    """
+    return {
+        "descriptors": descriptor_cache.stats(),
+        "certificates": certificates_cache.stats(),
+        "dynamic_descriptors": metadata_service_client.stats(),
+        "incremental": incremental_store.stats(),
+        "abis": abi_resolver.stats(),
+        "store": descriptor_store.stats() if descriptor_store is not None else None,
+        "signatures": signing_stats(),
+        "cassette": upstream_cassette.stats() if upstream_cassette is not None else None,
+        "workloads": {
+            workload.name: workload.stats()
+            for workload in (conversion_workload, io_workload)
+        },
+    }, 200
+
+
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """
+    Expose request/stage latency histograms, request counters and in-flight
+    gauges in the Prometheus text format.
+    """
+    return Response(_metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
 
 
 def reformat_certificate(cert: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
@@ -480,41 +1167,84 @@ def reformat_certificate(cert: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
     return composite_key, descriptor
 
 
-@app.route("/api/certificates", methods=["GET"])
-def get_certificates() -> Tuple[Dict[str, Any], int]:
+def _fetch_certificates(validators: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
     """
-    Fetch certificate descriptors from CAL and return reprocessed descriptors compatible with Speculos.
+    Fetch certificates from CAL and reformat them for Speculos.
+    Sends the previous ETag/Last-Modified so an unchanged list costs a 304 and
+    no re-signing. Returns None when CAL reports the list as not modified.
     """
-    try:
-        # Fetch certificates from CAL service
-        url = f"{DEFAULT_CAL_URL}/certificates"
-        params = {
-            "ref": "branch:main",
-            "output": "public_key,target_device,public_key_id,public_key_usage,descriptor"
-        }
-        response = requests.get(url, params=params, timeout=10)
+    url = f"{CAL_URL}/certificates"
+    params = {
+        "ref": "branch:main",
+        "output": "public_key,target_device,public_key_id,public_key_usage,descriptor"
+    }
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    with stage("cal_fetch"):
+        response = cal_session.get(url, params=params, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return None
         response.raise_for_status()
         certificates = response.json()
 
-        if not isinstance(certificates, list):
-            return {"error": "Unexpected response format from CAL service"}, 500
-
-        # Filter certificates by allowed public_key_id
-        filtered_certificates = [
-            cert for cert in certificates
-            if cert.get("public_key_id") in CAL_CERTIFICATES_OVERRIDES
-        ]
-
-        # Reformat each filtered certificate into a dictionary
-        reformatted_certificates = {}
-        for cert in filtered_certificates:
-            composite_key, descriptor = reformat_certificate(cert)
-            reformatted_certificates[composite_key] = [{"descriptor": descriptor}]
+    if not isinstance(certificates, list):
+        raise ValueError("Unexpected response format from CAL service")
+
+    # Filter certificates by allowed public_key_id
+    filtered_certificates = [
+        cert for cert in certificates
+        if cert.get("public_key_id") in CAL_CERTIFICATES_OVERRIDES
+    ]
+
+    # Reformat each filtered certificate into a dictionary
+    reformatted_certificates = {}
+    for cert in filtered_certificates:
+        composite_key, descriptor = reformat_certificate(cert)
+        reformatted_certificates[composite_key] = [{"descriptor": descriptor}]
+
+    new_validators = {
+        "etag": response.headers.get("ETag", ""),
+        "last_modified": response.headers.get("Last-Modified", ""),
+    }
+    return reformatted_certificates, new_validators
+
+
+# Reformatted certificates, refreshed from CAL every CAL_CERTIFICATES_TTL seconds
+# and persisted to CAL_CERTIFICATES_SNAPSHOT as a fallback when CAL is unreachable.
+# The default snapshot path and the shared cache are keyed by CAL_URL, so
+# processes talking to different CAL environments never serve each other's.
+CAL_CERTIFICATES_TTL = float(os.getenv("CAL_CERTIFICATES_TTL", "300"))
+CAL_URL_HASH = canonical_hash(CAL_URL)[:16]
+CAL_CERTIFICATES_SNAPSHOT = os.getenv(
+    "CAL_CERTIFICATES_SNAPSHOT",
+    os.path.join(tempfile.gettempdir(), f"cal-certificates-snapshot-{CAL_URL_HASH}.json")
+)
+certificates_cache = RevalidatingValue(
+    _fetch_certificates,
+    CAL_CERTIFICATES_TTL,
+    CAL_CERTIFICATES_SNAPSHOT,
+    # Only worth sharing when other processes can see it
+    shared=make_cache(f"certificates:{CAL_URL_HASH}", 1) if CACHE_BACKEND != "memory" else None,
+)
 
-        return reformatted_certificates, 200
 
+@app.route("/api/certificates", methods=["GET"])
+def get_certificates() -> Tuple[Dict[str, Any], int]:
+    """
+    Fetch certificate descriptors from CAL and return reprocessed descriptors compatible with Speculos.
+    """
+    try:
+        return io_workload.run(certificates_cache.get), 200
+    except Overloaded:
+        raise
     except requests.RequestException as e:
         return {"error": f"Failed to fetch certificates: {str(e)}"}, 502
+    except ValueError as e:
+        return {"error": str(e)}, 500
     except Exception as e:
         return {"error": f"Failed to process certificates: {str(e)}"}, 500
 
@@ -523,56 +1253,43 @@ def resign_signed_descriptor(signed_descriptor_hex: str) -> str:
     """
     Re-sign a signed TLV descriptor with the CAL interceptor key.
 
-    The descriptor is a sequence of TLV fields (1-byte tag, 1-byte length,
-    value) whose last field is a SIGNATURE (tag 0x15) holding a DER-encoded
-    ECDSA signature over the SHA-256 of every preceding TLV byte. We walk the
-    TLV fields to locate that trailing SIGNATURE, recompute the signature over
-    the preceding bytes with TEST_SIGNING_KEY, and splice it back in so a
-    Speculos device provisioned with the test certificates accepts it.
-    """
-    data = bytes.fromhex(signed_descriptor_hex)
-
-    # Walk TLV fields from the start; the SIGNATURE field is always last.
-    offset = 0
-    signature_offset: Optional[int] = None
-    while offset < len(data):
-        if offset + 1 >= len(data):
-            raise ValueError("truncated TLV: missing length byte")
-        tag = data[offset]
-        length = data[offset + 1]
-        value_end = offset + 2 + length
-        if value_end > len(data):
-            raise ValueError("truncated TLV: value exceeds descriptor length")
-        if tag == SIGNATURE_TLV_TAG:
-            signature_offset = offset
-        offset = value_end
-
-    if signature_offset is None:
-        raise ValueError("no SIGNATURE (tag 0x15) field found in descriptor")
-
-    payload = data[:signature_offset]
-    signature = bytes.fromhex(sign_payload(payload.hex())["signatures"]["test"])
-    signature_tlv = bytes([SIGNATURE_TLV_TAG, len(signature)]) + signature
-    return (payload + signature_tlv).hex()
+    The descriptor is a sequence of TLV fields (DER-style variable-length tag
+    and length, value) whose last field is a SIGNATURE (tag 0x15) holding a
+    DER-encoded ECDSA signature over the SHA-256 of every preceding TLV byte.
+    We locate that trailing SIGNATURE, recompute the signature over the
+    preceding bytes with TEST_SIGNING_KEY, and splice it back in so a Speculos
+    device provisioned with the test certificates accepts it.
+    """
+    return resign_descriptors_hex([signed_descriptor_hex], get_signer(TEST_SIGNING_KEY), SIGNATURE_TLV_TAG)[0]
 
 
 def resign_descriptors_in_response(obj: Any) -> Any:
     """
-    Recursively re-sign every `signedDescriptor` string found in a metadata
-    service response. Works for both single-descriptor objects and any
-    array/batch shape the service might return.
+    Re-sign every `signedDescriptor` string found in a metadata service
+    response, in place. Works for both single-descriptor objects and any
+    array/batch shape the service might return; all descriptors are re-signed
+    in a single batch once the walk is done.
     """
-    if isinstance(obj, dict):
-        return {
-            key: resign_signed_descriptor(value)
-            if key == "signedDescriptor" and isinstance(value, str)
-            else resign_descriptors_in_response(value)
-            for key, value in obj.items()
-        }
-    elif isinstance(obj, list):
-        return [resign_descriptors_in_response(item) for item in obj]
-    else:
-        return obj
+    return transform_json(obj, [SignedDescriptorResigner(get_signer(TEST_SIGNING_KEY), SIGNATURE_TLV_TAG)])
+
+
+# Shared keep-alive client for the metadata service. Identical in-flight requests
+# are coalesced and re-signed responses are cached for a short time, since test
+# runs replay the same transactions against Speculos.
+DYNAMIC_DESCRIPTOR_CACHE_TTL = float(os.getenv("DYNAMIC_DESCRIPTOR_CACHE_TTL", "30"))
+METADATA_SERVICE_POOL_SIZE = int(os.getenv("METADATA_SERVICE_POOL_SIZE", "16"))
+metadata_service_client = UpstreamClient(
+    "metadata service",
+    METADATA_SERVICE_URL,
+    transform=resign_descriptors_in_response,
+    pool_size=METADATA_SERVICE_POOL_SIZE,
+    adapter=upstream_cassette.adapter(pool_maxsize=METADATA_SERVICE_POOL_SIZE) if upstream_cassette is not None else None,
+    cache=make_cache(
+        "dynamic_descriptors",
+        int(os.getenv("DYNAMIC_DESCRIPTOR_CACHE_SIZE", "1024")) if DYNAMIC_DESCRIPTOR_CACHE_TTL > 0 else 0,
+        DYNAMIC_DESCRIPTOR_CACHE_TTL,
+    ),
+)
 
 
 @app.route("/api/dynamic-descriptor-proxy/<path:subpath>", methods=["GET"])
@@ -592,22 +1309,89 @@ def dynamic_descriptor_proxy(subpath: str) -> Tuple[Any, int]:
     path and query string are forwarded to the upstream metadata service.
     """
     try:
-        upstream_url = f"{DEFAULT_METADATA_SERVICE_URL}/{subpath}"
-        response = requests.get(upstream_url, params=request.args, timeout=10)
-        response.raise_for_status()
-        payload = response.json()
-    except requests.RequestException as e:
-        return jsonify({"error": f"Failed to fetch from metadata service."}), 502
-    except ValueError as e:
-        return jsonify({"error": f"Metadata service returned non-JSON response."}), 502
-
-    try:
-        resigned = resign_descriptors_in_response(payload)
+        with stage("metadata_fetch"):
+            resigned = io_workload.run(metadata_service_client.get_json, subpath, request.args.items(multi=True))
+    except UpstreamError as e:
+        return jsonify({"error": e.message}), e.status
     except ValueError as e:
         return jsonify({"error": f"Failed to re-sign descriptor."}), 500
 
     return jsonify(resigned), 200
 
 
+
+# Bounded pool used to fan batched dynamic-descriptor lookups out to the metadata
+# service (its threads are only started by the first batch)
+DYNAMIC_DESCRIPTOR_BATCH_CONCURRENCY = int(os.getenv("DYNAMIC_DESCRIPTOR_BATCH_CONCURRENCY", "8"))
+DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS = int(os.getenv("DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS", "256"))
+_dynamic_descriptor_batch_executor = ThreadPoolExecutor(
+    max_workers=DYNAMIC_DESCRIPTOR_BATCH_CONCURRENCY,
+    thread_name_prefix="dynamic-descriptor-batch",
+)
+
+
+def _fetch_dynamic_descriptor_item(item: Any) -> Dict[str, Any]:
+    """
+    Resolve one batch entry ("<subpath>?<query>") and report its own status.
+    """
+    if not isinstance(item, str) or not item.strip("/"):
+        return {"status": 400, "error": "Expected a metadata service path"}
+    parts = urlsplit(item)
+    try:
+        data = metadata_service_client.get_json(parts.path, parse_qsl(parts.query, keep_blank_values=True))
+    except UpstreamError as e:
+        return {"status": e.status, "error": e.message}
+    except ValueError:
+        return {"status": 500, "error": "Failed to re-sign descriptor."}
+    return {"status": 200, "data": data}
+
+
+@app.route("/api/dynamic-descriptor-proxy-batch", methods=["POST"])
+def dynamic_descriptor_proxy_batch() -> Tuple[Any, int]:
+    """
+    Batched variant of the dynamic-descriptor proxy.
+
+    Takes `{"paths": ["v2/solana/alt-resolution/<alt>/<index>?...", ...]}`, fetches
+    every path from the metadata service concurrently (bounded by
+    DYNAMIC_DESCRIPTOR_BATCH_CONCURRENCY), re-signs each response and returns
+    `{"results": [...]}` in request order, each entry carrying its own `status`
+    and either `data` or `error`.
+    """
+    request_data = request.get_json(silent=True)
+    paths = request_data.get("paths") if isinstance(request_data, dict) else None
+    if not isinstance(paths, list):
+        return jsonify({"error": "Expected a JSON object with a 'paths' array"}), 400
+    if len(paths) > DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many paths (max {DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS})"}), 400
+
+    results = io_workload.run(lambda: list(_dynamic_descriptor_batch_executor.map(_fetch_dynamic_descriptor_item, paths)))
+    for path, result in zip(paths, results):
+        result["path"] = path
+
+    return jsonify({"results": results}), 200
+
+
+@app.route("/api/import-report", methods=["GET"])
+def get_import_report() -> Tuple[Dict[str, Any], int]:
+    """
+    Report cold-start cost: time spent importing this module and each lazily
+    loaded erc7730/eip712 pipeline.
+    """
+    return {
+        "module_import_seconds": MODULE_IMPORT_SECONDS,
+        "pipelines": _pipelines.import_report(),
+    }, 200
+
+
+# Optional warm-up: WARMUP_PIPELINES=v1,v2 imports those pipelines and builds
+# their pydantic validators in the background right after start-up
+if not IS_POOL_WORKER:
+    _pipelines.warm_up_in_background(
+        name.strip() for name in os.getenv("WARMUP_PIPELINES", "").split(",") if name.strip()
+    )
+
+MODULE_IMPORT_SECONDS = time.perf_counter() - _MODULE_IMPORT_START
+
+
 if __name__ == "__main__":
     app.run(debug=False)
@@ -0,0 +1,288 @@
+"""
+Offline benchmarks for the sample API descriptor pipeline.
+
+Synthetic v1/v2 descriptors of increasing size are driven through the Flask
+test client and through the individual pipeline stages, with CAL and the
+metadata service replaced by local stub servers. Results are written as JSON
+so runs can be compared across commits. An API response other than 200
+aborts the run, so misconfigured inputs do not pass for fast requests:
+
+    python perf/bench.py --sizes 1,10,100,1000 --iterations 5 --output bench.json
+    python perf/bench.py --compare baseline.json bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(PERF_DIR, "..", "api")
+sys.path.insert(0, PERF_DIR)
+
+from descriptors import contract_descriptor, eip712_descriptor  # noqa: E402
+from stubs import cal_stub, metadata_stub, synthetic_signed_descriptor  # noqa: E402
+
+
+class UnexpectedResponse(Exception):
+    """
+    An API call answered something else than 200. This aborts the run rather
+    than being recorded: the timings of error responses are meaningless.
+    """
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(
+    name: str,
+    size: int,
+    run: Callable[[], Any],
+    iterations: int,
+    setup: Optional[Callable[[], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Time `run` over `iterations` iterations, calling `setup` (untimed) before each.
+    Failures are recorded in the result instead of aborting the suite, except
+    for `UnexpectedResponse`.
+    """
+    samples = []
+    try:
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000)
+    except UnexpectedResponse:
+        raise
+    except Exception as e:
+        return {"name": name, "size": size, "error": f"{type(e).__name__}: {e}", "trace": traceback.format_exc()}
+
+    return {
+        "name": name,
+        "size": size,
+        "iterations": iterations,
+        "min_ms": min(samples),
+        "mean_ms": statistics.fmean(samples),
+        "median_ms": statistics.median(samples),
+        "p95_ms": _percentile(samples, 0.95),
+        "max_ms": max(samples),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=PERF_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _reset_caches(index: Any) -> None:
+    """Drop every in-process cache so the next run is cold."""
+    index.descriptor_cache.clear()
+    index.get_signer(index.TEST_SIGNING_KEY).clear()
+    index.get_signer(index.TEST_SIGNING_KEY_CERTIFICATE).clear()
+    index.metadata_service_client.clear()
+    index.certificates_cache.clear()
+
+
+def _check(method: str, path: str, response: Any) -> None:
+    if response.status_code != 200:
+        raise UnexpectedResponse(
+            f"{method} {path}: HTTP {response.status_code}: {response.get_data(as_text=True).strip()[:500]}"
+        )
+
+
+def _post(client: Any, path: str, body: Any) -> None:
+    _check("POST", path, client.post(path, json=body))
+
+
+def _get(client: Any, path: str) -> None:
+    _check("GET", path, client.get(path))
+
+
+def _calldata_descriptors(index: Any, descriptor: Dict[str, Any]) -> List[Any]:
+    data = index.normalize_etherscan_urls(json.loads(json.dumps(descriptor)))
+    v1 = index._pipelines.load("v1")
+    input_descriptor = v1.InputERC7730Descriptor.model_validate(data, strict=False)
+    return v1.erc7730_descriptor_to_calldata_descriptors(input_descriptor)
+
+
+def _eip712_instructions(index: Any, descriptor: Dict[str, Any]) -> List[Any]:
+    data = index.normalize_etherscan_urls(json.loads(json.dumps(descriptor)))
+    input_descriptor = index._pipelines.load("v1").InputERC7730Descriptor.model_validate(data, strict=False)
+    output = index._pipelines.load("common").ListOutputAdder()
+    eip712_descriptors = index._convert_v1_erc7730_to_eip712_descriptors(input_descriptor, output)
+    eip712 = index._pipelines.load("eip712")
+    instructions = []
+    for eip712_descriptor_in in (eip712_descriptors or {}).values():
+        resolved = eip712.EIP712InputToResolvedConverter().convert(eip712_descriptor_in)
+        for by_schema in eip712.EIP712ResolvedToInstructionsConverter().convert(resolved).values():
+            for instruction_list in by_schema.values():
+                instructions.extend(instruction_list)
+    return instructions
+
+
+def _each(fn: Callable[[Any], Any], items: List[Any]) -> None:
+    if not items:
+        raise RuntimeError("no input items (the preceding conversion stage failed)")
+    for item in items:
+        fn(item)
+
+
+def _cold_import(statement: str) -> None:
+    """Run `statement` in a fresh interpreter with the API on the path."""
+    subprocess.run(
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {API_DIR!r}); {statement}"],
+        check=True,
+        env=os.environ.copy(),
+    )
+
+
+def run_benchmarks(index: Any, sizes: List[int], iterations: int) -> List[Dict[str, Any]]:
+    client = index.app.test_client()
+    reset = lambda: _reset_caches(index)  # noqa: E731
+    results = [
+        measure("cold_start.import_index", 1, lambda: _cold_import("import index"), iterations),
+        measure(
+            "cold_start.import_index_and_pipelines", 1,
+            lambda: _cold_import("import index; index._pipelines.warm_up(['v1', 'v2'])"), iterations
+        ),
+    ]
+
+    for size in sizes:
+        for version in ("v1", "v2"):
+            v2 = version == "v2"
+            contract = contract_descriptor(selectors=size, enum_values=size, v2=v2)
+            eip712 = eip712_descriptor(schemas=size, v2=v2)
+            for kind, descriptor in (("contract", contract), ("eip712", eip712)):
+                results.append(measure(
+                    f"http.process_descriptor.{kind}.{version}.cold", size,
+                    lambda d=descriptor: _post(client, "/api/process-erc7730-descriptor", d), iterations, reset
+                ))
+                results.append(measure(
+                    f"http.process_descriptor.{kind}.{version}.warm", size,
+                    lambda d=descriptor: _post(client, "/api/process-erc7730-descriptor", d), iterations
+                ))
+
+        calldata: List[Any] = []
+        instructions: List[Any] = []
+        results.append(measure(
+            "stage.erc7730_to_calldata", size,
+            lambda: calldata.__setitem__(slice(None), _calldata_descriptors(index, contract_descriptor(size, size))),
+            iterations
+        ))
+        results.append(measure(
+            "stage.format_and_sign_descriptor", size,
+            lambda: _each(index.format_and_sign_descriptor, calldata), iterations, reset
+        ))
+        results.append(measure(
+            "stage.erc7730_to_eip712_instructions", size,
+            lambda: instructions.__setitem__(slice(None), _eip712_instructions(index, eip712_descriptor(size))),
+            iterations
+        ))
+        results.append(measure(
+            "stage.format_and_sign_eip712_instruction", size,
+            lambda: _each(index.format_and_sign_eip712_instruction, instructions), iterations, reset
+        ))
+
+        signed = [synthetic_signed_descriptor(f"bench:{size}:{i}") for i in range(size)]
+        results.append(measure(
+            "stage.resign_signed_descriptor", size,
+            lambda: _each(index.resign_signed_descriptor, signed), iterations, reset
+        ))
+        results.append(measure(
+            "stage.resign_descriptors_in_response", size,
+            lambda: index.resign_descriptors_in_response({"items": [{"signedDescriptor": d} for d in signed]}),
+            iterations, reset
+        ))
+
+        paths = [f"v2/solana/alt-resolution/bench{size}/{i}" for i in range(size)]
+        results.append(measure(
+            "http.dynamic_descriptor_proxy.cold", size,
+            lambda: _each(lambda p: _get(client, f"/api/dynamic-descriptor-proxy/{p}"), paths), iterations, reset
+        ))
+        results.append(measure(
+            "http.dynamic_descriptor_proxy_batch.cold", size,
+            lambda: _post(client, "/api/dynamic-descriptor-proxy-batch", {"paths": paths}), iterations, reset
+        ))
+
+    results.append(measure("http.certificates.cold", 1, lambda: _get(client, "/api/certificates"), iterations, reset))
+    results.append(measure("http.certificates.warm", 1, lambda: _get(client, "/api/certificates"), iterations))
+    return results
+
+
+def compare(baseline_path: str, current_path: str) -> None:
+    """Print the median ratio current/baseline of every benchmark present in both files."""
+    with open(baseline_path) as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    for key in sorted(set(baseline) & set(current)):
+        before, after = baseline[key], current[key]
+        if "median_ms" not in before or "median_ms" not in after:
+            continue
+        ratio = after["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        print(f"{key[0]:<55} {key[1]:>6} {before['median_ms']:>10.2f} -> {after['median_ms']:>10.2f} ms  x{ratio:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,100", help="comma-separated descriptor sizes")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with cal_stub() as cal, metadata_stub() as metadata:
+        # Configure the API before importing it: local upstreams, no persisted state
+        os.environ["CAL_URL"] = cal.url
+        os.environ["METADATA_SERVICE_URL"] = metadata.url
+        os.environ.pop("DESCRIPTOR_CACHE_DIR", None)
+        os.environ["CAL_CERTIFICATES_SNAPSHOT"] = ""
+        # Convert in this process, so signature cache resets apply to the measured work
+        os.environ["CONVERSION_EXECUTOR"] = "inline"
+        sys.path.insert(0, API_DIR)
+        import index
+
+        sizes = [int(size) for size in args.sizes.split(",")]
+        report = {
+            "meta": {
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "iterations": args.iterations,
+                "sizes": sizes,
+            },
+            "results": [],
+        }
+        try:
+            report["results"] = run_benchmarks(index, sizes, args.iterations)
+        except UnexpectedResponse as e:
+            print(f"Aborted: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
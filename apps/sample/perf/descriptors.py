@@ -0,0 +1,130 @@
+"""
+Synthetic ERC-7730 descriptors for benchmarks.
+
+Sizes scale the number of calldata selectors (each with an enum-formatted
+field), metadata enum values and EIP-712 schemas, and the number of
+deployments every descriptor is signed for.
+"""
+from typing import Any, Dict, List
+
+V1_SCHEMA = "https://eips.ethereum.org/assets/eip-7730/erc7730-v1.schema.json"
+V2_SCHEMA = "https://eips.ethereum.org/assets/eip-7730/erc7730-v2.schema.json"
+
+
+def _address(seed: int) -> str:
+    return "0x" + f"{seed:040x}"
+
+
+def _deployments(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"chainId": 1 + index % 10, "address": _address(0xBE0C0000 + index)}
+        for index in range(count)
+    ]
+
+
+def _enum_values(size: int) -> Dict[str, str]:
+    return {str(value): f"Option {value}" for value in range(max(size, 2))}
+
+
+def _function_abi(index: int) -> Dict[str, Any]:
+    return {
+        "type": "function",
+        "name": f"action{index}",
+        "stateMutability": "nonpayable",
+        "inputs": [
+            {"name": "to", "type": "address"},
+            {"name": "amount", "type": "uint256"},
+            {"name": "mode", "type": "uint8"},
+        ],
+        "outputs": [],
+    }
+
+
+def _calldata_fields() -> List[Dict[str, Any]]:
+    return [
+        {"path": "to", "label": "Recipient", "format": "addressName", "params": {"types": ["eoa", "contract"]}},
+        {"path": "amount", "label": "Amount", "format": "raw"},
+        {"path": "mode", "label": "Mode", "format": "enum", "params": {"$ref": "$.metadata.enums.mode"}},
+    ]
+
+
+def contract_descriptor(selectors: int, enum_values: int = 4, deployments: int = 1, v2: bool = False) -> Dict[str, Any]:
+    """Contract descriptor with `selectors` functions sharing one `enum_values`-sized enum."""
+    abi = [_function_abi(index) for index in range(selectors)]
+    if v2:
+        formats = {
+            f"action{index}(address to,uint256 amount,uint8 mode)": {
+                "intent": f"Action {index}",
+                "fields": _calldata_fields(),
+            }
+            for index in range(selectors)
+        }
+        contract: Dict[str, Any] = {"deployments": _deployments(deployments)}
+    else:
+        formats = {
+            f"action{index}(address,uint256,uint8)": {
+                "intent": f"Action {index}",
+                "fields": _calldata_fields(),
+                "required": ["to", "amount"],
+            }
+            for index in range(selectors)
+        }
+        contract = {"abi": abi, "deployments": _deployments(deployments)}
+
+    return {
+        "$schema": V2_SCHEMA if v2 else V1_SCHEMA,
+        "context": {"$id": f"bench-contract-{selectors}", "contract": contract},
+        "metadata": {
+            "owner": "Benchmark",
+            "info": {"legalName": "Benchmark Inc.", "url": "https://example.org"},
+            "enums": {"mode": _enum_values(enum_values)},
+        },
+        "display": {"formats": formats},
+    }
+
+
+def eip712_descriptor(schemas: int, deployments: int = 1, v2: bool = False) -> Dict[str, Any]:
+    """EIP-712 descriptor with `schemas` distinct primary types."""
+    domain_type = [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"},
+    ]
+    schema_list = []
+    formats = {}
+    for index in range(schemas):
+        primary_type = f"Order{index}"
+        schema_list.append({
+            "primaryType": primary_type,
+            "types": {
+                "EIP712Domain": domain_type,
+                primary_type: [
+                    {"name": "maker", "type": "address"},
+                    {"name": "amount", "type": "uint256"},
+                    {"name": "deadline", "type": "uint256"},
+                ],
+            },
+        })
+        formats[f"{primary_type}(address maker,uint256 amount,uint256 deadline)"] = {
+            "intent": f"Sign order {index}",
+            "fields": [
+                {"path": "maker", "label": "Maker", "format": "raw"},
+                {"path": "amount", "label": "Amount", "format": "raw"},
+                {"path": "deadline", "label": "Deadline", "format": "date", "params": {"encoding": "timestamp"}},
+            ],
+        }
+
+    return {
+        "$schema": V2_SCHEMA if v2 else V1_SCHEMA,
+        "context": {
+            "$id": f"bench-eip712-{schemas}",
+            "eip712": {
+                "deployments": _deployments(deployments),
+                "domain": {"name": "Benchmark", "version": "1"},
+                "schemas": schema_list,
+            },
+        },
+        "metadata": {"owner": "Benchmark", "info": {"legalName": "Benchmark Inc.", "url": "https://example.org"}},
+        "display": {"formats": formats},
+    }
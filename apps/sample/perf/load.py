@@ -0,0 +1,394 @@
+"""
+Concurrent load and soak test for the sample API.
+
+Replays a weighted mix of API calls (by default descriptor processing,
+certificates and dynamic descriptor proxy calls, as issued by the interceptor)
+from many concurrent clients against a locally started server, with CAL and
+the metadata service replaced by local stub servers with injectable latency:
+
+    python perf/load.py --concurrency 32 --duration 60 --output load.json
+    python perf/load.py --traffic traffic.jsonl --duration 1800 --max-rss-growth 64
+    python perf/load.py --dump-traffic > traffic.jsonl
+
+Traffic files are JSON lines `{"route", "method", "path", "body", "weight"}`;
+every `{n}` in `path` or `body` is replaced with a counter cycling through
+`--distinct` values, so caches see a bounded but non-trivial key space.
+
+The report has throughput, p50/p95/p99 latency, status counts and error rate
+per route, the server RSS (including its worker processes) sampled over time,
+and the final /api/cache-stats. With `--max-rss-growth`, the run exits with
+status 1 when the RSS grew by more than that many MiB after the warm-up.
+
+The run is aborted, with exit status 1, on the first request that does not
+get a 200 response (including overload rejections and timeouts): lower the
+concurrency or raise the server limits until the load is served.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(PERF_DIR, "..", "api")
+sys.path.insert(0, PERF_DIR)
+
+from bench import UnexpectedResponse, _git_revision, _percentile  # noqa: E402
+from descriptors import contract_descriptor, eip712_descriptor  # noqa: E402
+from stubs import Latency, cal_stub, metadata_stub  # noqa: E402
+
+# Started with the API directory on the path and the port as argument
+SERVER_SCRIPT = (
+    "import sys; sys.path.insert(0, sys.argv[1]); import index; "
+    "index.app.run(host='127.0.0.1', port=int(sys.argv[2]), threaded=True)"
+)
+
+
+def default_traffic() -> List[Dict[str, Any]]:
+    """Interceptor-like mix: mostly proxy calls, regular descriptor processing, rare certificates."""
+    traffic = []
+    for size in (1, 10):
+        for version in ("v1", "v2"):
+            v2 = version == "v2"
+            for descriptor in (
+                contract_descriptor(selectors=size, enum_values=size, v2=v2),
+                eip712_descriptor(schemas=size, v2=v2),
+            ):
+                descriptor["metadata"]["owner"] = "Load test {n}"
+                traffic.append({
+                    "route": "process-erc7730-descriptor",
+                    "method": "POST",
+                    "path": "/api/process-erc7730-descriptor",
+                    "body": descriptor,
+                    "weight": 2 if size == 1 else 1,
+                })
+    traffic.append({"route": "certificates", "method": "GET", "path": "/api/certificates", "weight": 2})
+    traffic.append({
+        "route": "dynamic-descriptor-proxy",
+        "method": "GET",
+        "path": "/api/dynamic-descriptor-proxy/v2/solana/alt-resolution/load/{n}",
+        "weight": 20,
+    })
+    return traffic
+
+
+def load_traffic(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class _Request:
+    """A traffic entry with its body pre-serialized for `{n}` substitution."""
+
+    def __init__(self, entry: Dict[str, Any]) -> None:
+        self.route = entry.get("route") or entry["path"].strip("/").split("/")[1]
+        self.method = entry.get("method", "GET").upper()
+        self.path = entry["path"]
+        self.body = json.dumps(entry["body"]) if "body" in entry else None
+        self.weight = float(entry.get("weight", 1))
+
+    def render(self, n: int) -> Tuple[str, Optional[str]]:
+        value = str(n)
+        body = self.body.replace("{n}", value) if self.body is not None else None
+        return self.path.replace("{n}", value), body
+
+
+class Recorder:
+    """Thread-safe per-route latency samples and status counts."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, route: str, seconds: float, status: str) -> None:
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds * 1000)
+            counts = self.statuses.setdefault(route, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies.clear()
+            self.statuses.clear()
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            routes = {}
+            for route, samples in sorted(self.latencies.items()):
+                counts = self.statuses[route]
+                errors = sum(count for status, count in counts.items() if not status.startswith("2"))
+                routes[route] = {
+                    "requests": len(samples),
+                    "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+                    "p50_ms": _percentile(samples, 0.50),
+                    "p95_ms": _percentile(samples, 0.95),
+                    "p99_ms": _percentile(samples, 0.99),
+                    "max_ms": max(samples),
+                    "error_rate": errors / len(samples),
+                    "statuses": dict(sorted(counts.items())),
+                }
+        total = sum(route["requests"] for route in routes.values())
+        return {"requests": total, "throughput_rps": total / elapsed if elapsed else 0.0, "routes": routes}
+
+
+def _client(
+    base_url: str,
+    traffic: List[_Request],
+    recorder: Recorder,
+    counter: "itertools.count[int]",
+    distinct: int,
+    seed: int,
+    stop: threading.Event,
+    timeout: float,
+    failures: List[str],
+) -> None:
+    rng = random.Random(seed)
+    weights = [request.weight for request in traffic]
+    session = requests.Session()
+    while not stop.is_set():
+        request = rng.choices(traffic, weights)[0]
+        path, body = request.render(next(counter) % distinct)
+        start = time.perf_counter()
+        try:
+            response = session.request(
+                request.method,
+                base_url + path,
+                data=body,
+                headers={"Content-Type": "application/json"} if body is not None else None,
+                timeout=timeout,
+            )
+            response.content
+            status = str(response.status_code)
+            if response.status_code != 200:
+                failures.append(f"{request.method} {path}: HTTP {status}: {response.text.strip()[:500]}")
+        except requests.RequestException as e:
+            status = type(e).__name__
+            failures.append(f"{request.method} {path}: {status}: {e}")
+        recorder.record(request.route, time.perf_counter() - start, status)
+        if failures:
+            stop.set()
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process and its direct children (Linux /proc), or None."""
+    total = 0
+    found = False
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces: fields start after its closing parenthesis
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            if int(entry) != pid and parent != pid:
+                continue
+            with open(f"/proc/{entry}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        found = True
+        except (OSError, IndexError, ValueError):
+            continue
+    return total if found else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, server: Optional[subprocess.Popen], timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"API server exited with status {server.returncode}")
+        try:
+            if requests.get(f"{base_url}/api/cache-stats", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API server at {base_url} did not become ready in {timeout:.0f}s")
+
+
+def _latency(mean: float, jitter: float) -> Latency:
+    if not jitter:
+        return mean
+    return lambda: max(0.0, random.uniform(mean - jitter, mean + jitter))
+
+
+def run_load(
+    base_url: str,
+    traffic: List[_Request],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    distinct: int,
+    sample_interval: float,
+    timeout: float,
+    server_pid: Optional[int],
+) -> Dict[str, Any]:
+    """
+    Run the load, raising `UnexpectedResponse` on the first non-200 response.
+    """
+    recorder = Recorder()
+    counter = itertools.count()
+    stop = threading.Event()
+    failures: List[str] = []
+    clients = [
+        threading.Thread(
+            target=_client,
+            args=(base_url, traffic, recorder, counter, distinct, seed, stop, timeout, failures),
+            daemon=True,
+        )
+        for seed in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+
+    if warmup > 0:
+        # Only the steady state counts: drop warm-up samples
+        stop.wait(warmup)
+        recorder.reset()
+    rss: List[Tuple[float, Optional[int]]] = []
+    measured_from = time.monotonic()
+    deadline = measured_from + duration
+    while True:
+        now = time.monotonic()
+        if server_pid is not None:
+            rss.append((round(now - measured_from, 3), _rss_bytes(server_pid)))
+        if now >= deadline or stop.is_set():
+            break
+        stop.wait(min(sample_interval, deadline - now))
+    stop.set()
+    for client in clients:
+        client.join(timeout + 1)
+    if failures:
+        raise UnexpectedResponse(failures[0])
+    elapsed = time.monotonic() - measured_from
+
+    report = recorder.report(elapsed)
+    samples = [(t, value) for t, value in rss if value is not None]
+    report["rss"] = {
+        "samples": [[t, value] for t, value in samples],
+        "start_bytes": samples[0][1] if samples else None,
+        "end_bytes": samples[-1][1] if samples else None,
+        "growth_bytes": samples[-1][1] - samples[0][1] if samples else None,
+        "peak_bytes": max(value for _, value in samples) if samples else None,
+    }
+    try:
+        report["cache_stats"] = requests.get(f"{base_url}/api/cache-stats", timeout=timeout).json()
+    except (requests.RequestException, ValueError) as e:
+        report["cache_stats"] = {"error": str(e)}
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traffic", help="JSON lines traffic file (default: built-in interceptor mix)")
+    parser.add_argument("--dump-traffic", action="store_true", help="print the built-in traffic mix and exit")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument("--distinct", type=int, default=1000, help="values cycled through by {n}")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="stub CAL/metadata delay (s)")
+    parser.add_argument("--upstream-jitter", type=float, default=0.0, help="uniform +/- jitter on that delay (s)")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="RSS sampling interval (s)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (s)")
+    parser.add_argument("--asgi", action="store_true", help="serve the API in ASGI mode (needs uvicorn, aiohttp)")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="PID of the --url server, for RSS sampling")
+    parser.add_argument("--max-rss-growth", type=float, help="fail when RSS grows by more MiB than this")
+    parser.add_argument("--output", help="write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    if args.dump_traffic:
+        for entry in default_traffic():
+            print(json.dumps(entry))
+        return
+
+    traffic = [_Request(entry) for entry in (load_traffic(args.traffic) if args.traffic else default_traffic())]
+    latency = _latency(args.upstream_latency, args.upstream_jitter)
+    server: Optional[subprocess.Popen] = None
+    with cal_stub(latency) as cal, metadata_stub(latency) as metadata:
+        try:
+            if args.url:
+                base_url, server_pid = args.url.rstrip("/"), args.pid
+            else:
+                port = _free_port()
+                env = os.environ.copy()
+                env.update({
+                    "CAL_URL": cal.url,
+                    "METADATA_SERVICE_URL": metadata.url,
+                    "CAL_CERTIFICATES_SNAPSHOT": "",
+                })
+                env.pop("DESCRIPTOR_CACHE_DIR", None)
+                if args.asgi:
+                    command = ["-m", "uvicorn", "--app-dir", API_DIR, "_asgi:app", "--port", str(port)]
+                else:
+                    command = ["-c", SERVER_SCRIPT, API_DIR, str(port)]
+                server = subprocess.Popen(
+                    [sys.executable, *command],
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                base_url, server_pid = f"http://127.0.0.1:{port}", server.pid
+            _wait_ready(base_url, server)
+            results = run_load(
+                base_url, traffic, args.concurrency, args.duration, args.warmup,
+                max(1, args.distinct), args.sample_interval, args.timeout, server_pid,
+            )
+        except UnexpectedResponse as e:
+            print(f"Aborted: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(10)
+        upstream_requests = {"cal": cal.requests, "metadata": metadata.requests}
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "server": args.url or ("asgi" if args.asgi else "wsgi"),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "distinct": args.distinct,
+            "upstream_latency": args.upstream_latency,
+            "upstream_jitter": args.upstream_jitter,
+            "upstream_requests": upstream_requests,
+        },
+        "results": results,
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    growth = results["rss"]["growth_bytes"]
+    if args.max_rss_growth is not None and growth is not None and growth > args.max_rss_growth * 1024 * 1024:
+        print(f"RSS grew by {growth / 1024 / 1024:.1f} MiB (limit {args.max_rss_growth} MiB)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
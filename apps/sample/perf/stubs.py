@@ -0,0 +1,177 @@
+"""
+Local stand-ins for the CAL and metadata services used by the sample API.
+
+Both servers run in a background thread on an ephemeral port and answer with
+deterministic synthetic data, optionally after an injected delay, so
+benchmarks and load tests never reach the network.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+# Public key ids overridden by the API (mirrors CAL_CERTIFICATES_OVERRIDES)
+CERTIFICATE_KEY_IDS = [
+    "cal_calldata_key",
+    "erc20_metadata_key",
+    "cal_network",
+    "plugin_selector_key",
+    "cal_trusted_name",
+    "cal_gated_signing",
+    "domain_metadata_key",
+    "token_metadata_key",
+]
+TARGET_DEVICES = ["nanos", "nanox", "nanosp", "stax", "flex", "apex_p"]
+
+# Fixed delay in seconds, or a callable drawing one per request
+Latency = Union[float, Callable[[], float]]
+
+# Tag of the trailing SIGNATURE field of dynamic descriptors
+SIGNATURE_TLV_TAG = 0x15
+
+
+def _fake_bytes(seed: str, length: int) -> bytes:
+    """Deterministic pseudo-random bytes derived from a seed."""
+    out = b""
+    counter = 0
+    while len(out) < length:
+        out += hashlib.sha256(f"{seed}:{counter}".encode()).digest()
+        counter += 1
+    return out[:length]
+
+
+def synthetic_certificates() -> List[Dict[str, Any]]:
+    """CAL /certificates response covering every overridden key on every device."""
+    certificates = []
+    for device in TARGET_DEVICES:
+        for key_id in CERTIFICATE_KEY_IDS:
+            public_key = (b"\x02" + _fake_bytes(f"{device}:{key_id}", 32)).hex()
+            data = "0101" + "0221" + public_key + "0401" + "07"
+            certificates.append({
+                "target_device": device,
+                "public_key_id": key_id,
+                "public_key_usage": "coin_meta",
+                "public_key": public_key,
+                "descriptor": {
+                    "data": data,
+                    "signatures": {"prod": _fake_bytes(data, 70).hex(), "test": _fake_bytes(data, 70).hex()},
+                },
+            })
+    return certificates
+
+
+def synthetic_signed_descriptor(seed: str, payload_size: int = 96) -> str:
+    """A TLV dynamic descriptor (payload fields + trailing SIGNATURE) as hex."""
+    payload = b""
+    tag = 1
+    for chunk_start in range(0, payload_size, 32):
+        chunk = _fake_bytes(f"{seed}:{chunk_start}", min(32, payload_size - chunk_start))
+        payload += bytes([tag, len(chunk)]) + chunk
+        tag += 1
+    signature = _fake_bytes(f"{seed}:signature", 70)
+    return (payload + bytes([SIGNATURE_TLV_TAG, len(signature)]) + signature).hex()
+
+
+def metadata_response(path: str) -> Dict[str, Any]:
+    """Metadata service response for a dynamic-descriptor path."""
+    return {
+        "data": {"path": path},
+        "signedDescriptor": synthetic_signed_descriptor(path),
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under load-test concurrency
+    request_queue_size = 1024
+
+
+class StubServer:
+    """
+    A JSON HTTP server running in a background thread.
+
+    `handler(path, query, headers)` returns `(status, body, headers)`; `latency` seconds
+    (or a callable returning them) are slept before each response.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str, Dict[str, str]], Tuple[int, Any, Dict[str, str]]],
+        latency: Latency = 0.0,
+    ) -> None:
+        self.requests = 0
+        self.latency = latency
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                stub.requests += 1
+                delay = stub.latency() if callable(stub.latency) else stub.latency
+                if delay > 0:
+                    time.sleep(delay)
+                parts = urlsplit(self.path)
+                status, body, headers = handler(parts.path, parts.query, dict(self.headers))
+                encoded = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def cal_stub(latency: Latency = 0.0) -> StubServer:
+    """CAL stand-in serving /certificates with ETag revalidation."""
+    certificates = synthetic_certificates()
+    etag = '"' + hashlib.sha256(json.dumps(certificates).encode()).hexdigest()[:16] + '"'
+
+    def handle(path: str, query: str, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        if not path.endswith("/certificates"):
+            return 404, {"error": "not found"}, {}
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, certificates, {"ETag": etag}
+
+    return StubServer(handle, latency)
+
+
+def metadata_stub(latency: Latency = 0.0) -> StubServer:
+    """Metadata service stand-in answering every path with a signed descriptor."""
+
+    def handle(path: str, query: str, headers: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        return 200, metadata_response(f"{path}?{query}" if query else path), {}
+
+    return StubServer(handle, latency)
@@ -0,0 +1,112 @@
+"""
+Shared fixtures of the sample API tests.
+
+    python -m pytest apps/sample/tests
+
+The API is configured through environment variables read at import time, so
+`api` starts the CAL and metadata service stand-ins of perf/stubs.py, points
+the API at them and imports it once per session. Conversions run in the test
+process (CONVERSION_EXECUTOR=inline) so tests can replace the erc7730/eip712
+pipeline with `fake_conversion`.
+"""
+import hashlib
+import os
+import sys
+from typing import Any, Callable, Dict, Iterator, List
+
+import ecdsa
+import pytest
+
+SAMPLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SAMPLE_DIR, "api"))
+sys.path.insert(0, os.path.join(SAMPLE_DIR, "perf"))
+
+from stubs import cal_stub, metadata_stub  # noqa: E402
+
+# A processed descriptor group as produced by the conversion pipeline
+DescriptorGroups = Dict[str, List[Dict[str, Any]]]
+
+# index.TEST_SIGNING_KEY
+SIGNING_KEY = "b1ed47ef58f782e2bc4d5abe70ef66d9009c2957967017054470e0f3e10f5833"
+
+
+def verify(public_key: str, payload: bytes, signature: bytes) -> bool:
+    """
+    Whether `signature` is a valid DER signature of SHA-256(payload) by the
+    compressed, hex-encoded `public_key`.
+    """
+    key = ecdsa.VerifyingKey.from_string(bytes.fromhex(public_key), curve=ecdsa.SECP256k1)
+    return key.verify_digest(signature, hashlib.sha256(payload).digest(), sigdecode=ecdsa.util.sigdecode_der)
+
+
+@pytest.fixture(scope="session")
+def upstreams() -> Iterator[Dict[str, Any]]:
+    with cal_stub() as cal, metadata_stub() as metadata:
+        yield {"cal": cal, "metadata": metadata}
+
+
+@pytest.fixture(scope="session")
+def api(upstreams: Dict[str, Any]) -> Any:
+    os.environ.update(
+        CAL_URL=upstreams["cal"].url,
+        METADATA_SERVICE_URL=upstreams["metadata"].url,
+        CAL_CERTIFICATES_SNAPSHOT="",
+        CONVERSION_EXECUTOR="inline",
+        CACHE_BACKEND="memory",
+    )
+    for name in ("DESCRIPTOR_CACHE_DIR", "DESCRIPTOR_STORE_DIR", "UPSTREAM_CASSETTE_MODE", "ETHERSCAN_API_KEY"):
+        os.environ.pop(name, None)
+    import index
+
+    return index
+
+
+@pytest.fixture
+def client(api: Any) -> Any:
+    api.descriptor_cache.clear()
+    api.metadata_service_client.clear()
+    api.certificates_cache.clear()
+    api.incremental_store.clear()
+    return api.app.test_client()
+
+
+@pytest.fixture
+def fake_conversion(api: Any, monkeypatch: pytest.MonkeyPatch) -> Callable[[Callable[[Dict[str, Any]], DescriptorGroups]], List[Dict[str, Any]]]:
+    """
+    Replace the validate -> convert -> sign pipeline with `convert(request_data)`.
+    Returns the list of request bodies the pipeline was called with.
+    """
+    calls: List[Dict[str, Any]] = []
+
+    def install(convert: Callable[[Dict[str, Any]], DescriptorGroups]) -> List[Dict[str, Any]]:
+        def process(request_data: Dict[str, Any]) -> DescriptorGroups:
+            calls.append(request_data)
+            return convert(request_data)
+
+        monkeypatch.setattr(api, "_process_normalized_descriptor_data", process)
+        monkeypatch.setattr(api, "_iter_normalized_descriptor_groups", lambda data: iter(process(data).items()))
+        return calls
+
+    return install
+
+
+def calldata_groups(request_data: Dict[str, Any]) -> DescriptorGroups:
+    """
+    A deterministic stand-in for the processed output of a contract descriptor:
+    one group per `deployments` entry, one selector per `selectors` entry.
+    Raises ValueError like the pipeline when the descriptor has no deployments.
+    """
+    deployments = request_data.get("deployments")
+    if not deployments:
+        raise ValueError("Missing deployments")
+    return {
+        f"{chain_id}:{address}": [{
+            "descriptors_calldata": {
+                address: {
+                    selector: {"data": f"{selector[2:]}00", "signatures": {"test": "3045", "prod": "3045"}}
+                    for selector in request_data.get("selectors", [])
+                }
+            }
+        }]
+        for chain_id, address in deployments
+    }
@@ -0,0 +1,151 @@
+import json
+import os
+from typing import Any, Dict, List
+
+import pytest
+
+from _abi import AbiInliner, AbiNotCachedError, AbiResolver, AbiStore, is_valid_reference, parse_abi_payload
+from _transform import ETHERSCAN_V2_API_URL, NullStripper, transform_json
+from _upstream import UpstreamError
+from conftest import calldata_groups
+
+ADDRESS = "0x" + "ab" * 20
+ABI = [{"type": "function", "name": "transfer", "inputs": []}]
+
+
+def abi_url(address: str = ADDRESS, chain_id: str = "1") -> str:
+    return f"{ETHERSCAN_V2_API_URL}?chainid={chain_id}&module=contract&action=getabi&address={address}"
+
+
+@pytest.mark.parametrize("chain_id, address, valid", [
+    ("1", ADDRESS, True),
+    ("137", ADDRESS.upper().replace("0X", "0x"), True),
+    ("1", "0x1234", False),
+    ("1", "../../etc/passwd", False),
+    ("1/..", ADDRESS, False),
+    ("١", ADDRESS, False),
+])
+def test_is_valid_reference(chain_id: str, address: str, valid: bool) -> None:
+    assert is_valid_reference(chain_id, address) is valid
+
+
+def test_store_shares_objects(tmp_path: Any) -> None:
+    store = AbiStore(str(tmp_path))
+    digest = store.put("1", ADDRESS, ABI)
+    assert store.put("10", "0x" + "cd" * 20, ABI) == digest
+    assert len(os.listdir(tmp_path / "objects" / digest[:2])) == 1
+    # Read back from disk by a fresh store; addresses are case-insensitive
+    assert AbiStore(str(tmp_path)).get("10", "0x" + "CD" * 20) == ABI
+    assert AbiStore(str(tmp_path)).get("1", "0x" + "cd" * 20) is None
+
+
+def test_store_rejects_invalid_references(tmp_path: Any) -> None:
+    store = AbiStore(str(tmp_path))
+    with pytest.raises(ValueError, match="Invalid ABI reference"):
+        store.put("1", "../escape", ABI)
+    assert store.get("1", "../escape") is None
+    assert not os.path.exists(tmp_path / "refs")
+
+
+def test_seed(tmp_path: Any) -> None:
+    seed = tmp_path / "seed" / "1"
+    seed.mkdir(parents=True)
+    (seed / f"{ADDRESS}.json").write_text(json.dumps({"status": "1", "result": json.dumps(ABI)}))
+    (seed / "README.md").write_text("ignored")
+    store = AbiStore(str(tmp_path / "store"))
+    assert store.seed(str(tmp_path / "seed")) == 1
+    assert store.get("1", ADDRESS) == ABI
+    assert store.seed(str(tmp_path / "missing")) == 0
+
+
+def test_parse_abi_payload() -> None:
+    assert parse_abi_payload(ABI) == ABI
+    assert parse_abi_payload({"status": "0", "result": "Max rate limit reached"}) is None
+    assert parse_abi_payload({"status": "1", "result": "not json"}) is None
+    assert parse_abi_payload(["not", "an", "abi"]) is None
+
+
+def test_resolver_fetches_once(tmp_path: Any) -> None:
+    fetched: List[Any] = []
+
+    def fetch(path: str, params: Any) -> Any:
+        fetched.append(dict(params))
+        return {"status": "1", "result": json.dumps(ABI)}
+
+    resolver = AbiResolver(AbiStore(str(tmp_path)), fetch)
+    assert resolver.resolve_url(abi_url()) == ABI
+    assert resolver.resolve_url(abi_url(ADDRESS.upper().replace("0X", "0x"))) == ABI
+    assert len(fetched) == 1 and fetched[0]["address"] == ADDRESS
+    assert resolver.stats()["hits"] == 1
+    # Not a getabi URL, or an invalid reference: left alone without fetching
+    assert resolver.resolve_url("https://example.com/abi.json") is None
+    assert resolver.resolve_url(abi_url("0x1234")) is None
+    assert len(fetched) == 1
+
+
+def test_resolver_fetch_errors(tmp_path: Any) -> None:
+    def fetch(path: str, params: Any) -> Any:
+        raise UpstreamError("unreachable")
+
+    resolver = AbiResolver(AbiStore(str(tmp_path)), fetch)
+    assert resolver.resolve_url(abi_url()) is None
+    assert resolver.stats()["fetch_errors"] == 1
+
+
+def test_resolver_offline(tmp_path: Any) -> None:
+    seed = tmp_path / "seed" / "1"
+    seed.mkdir(parents=True)
+    (seed / f"{ADDRESS}.json").write_text(json.dumps(ABI))
+    resolver = AbiResolver(AbiStore(str(tmp_path / "store")), lambda path, params: pytest.fail("fetched"),
+                           offline=True, seed_directory=str(tmp_path / "seed"))
+    assert resolver.resolve_url(abi_url()) == ABI
+    assert resolver.stats()["seeded"] == 1
+    with pytest.raises(AbiNotCachedError, match="not in the local ABI cache"):
+        resolver.resolve_url(abi_url("0x" + "ef" * 20))
+
+
+def test_inliner_only_walks_the_contract_context(tmp_path: Any) -> None:
+    store = AbiStore(str(tmp_path))
+    store.put("1", ADDRESS, ABI)
+    resolver = AbiResolver(store, lambda path, params: pytest.fail("fetched"), offline=True)
+    descriptor: Dict[str, Any] = {
+        "context": {"contract": {"abi": abi_url(), "deployments": [{"chainId": 1, "address": ADDRESS}]}},
+        "metadata": {"abi": abi_url("0x" + "ef" * 20), "owner": None},
+        "display": {"formats": {"abi": abi_url("0x" + "ef" * 20)}},
+    }
+    inlined = transform_json(descriptor, [NullStripper(), AbiInliner(resolver)])
+    assert inlined["context"]["contract"]["abi"] == ABI
+    assert inlined["metadata"] == {"abi": abi_url("0x" + "ef" * 20)}
+    assert inlined["display"]["formats"]["abi"] == abi_url("0x" + "ef" * 20)
+
+
+def test_abis_are_inlined_after_the_cache_lookup(api: Any, client: Any, fake_conversion: Any,
+                                                  monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> None:
+    calls = fake_conversion(calldata_groups)
+    resolver = AbiResolver(AbiStore(str(tmp_path)), lambda path, params: {"status": "1", "result": json.dumps(ABI)})
+    resolved: List[str] = []
+    resolve_url = resolver.resolve_url
+    monkeypatch.setattr(resolver, "resolve_url", lambda url: resolved.append(url) or resolve_url(url))
+    monkeypatch.setattr(api, "abi_resolver", resolver)
+    descriptor = {"deployments": [[1, ADDRESS]], "context": {"contract": {"abi": abi_url()}}}
+
+    assert client.post("/api/process-erc7730-descriptor", json=descriptor).status_code == 200
+    assert calls[0]["context"]["contract"]["abi"] == ABI
+    # Cache hits, keyed on the ABI URL, resolve nothing
+    assert client.post("/api/process-erc7730-descriptor", json=descriptor).status_code == 200
+    assert client.post("/api/process-erc7730-descriptors", json=[descriptor]).status_code == 200
+    assert len(calls) == 1
+    assert resolved == [abi_url()]
+
+
+def test_batch_reports_uncached_abis(api: Any, client: Any, fake_conversion: Any,
+                                     monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> None:
+    fake_conversion(calldata_groups)
+    resolver = AbiResolver(AbiStore(str(tmp_path)), lambda path, params: pytest.fail("fetched"), offline=True)
+    monkeypatch.setattr(api, "abi_resolver", resolver)
+    descriptor = {"deployments": [[1, ADDRESS]], "context": {"contract": {"abi": abi_url()}}}
+
+    response = client.post("/api/process-erc7730-descriptors", json=[descriptor, {"deployments": [[1, "0xabc"]]}])
+    assert response.status_code == 200
+    assert [error["index"] for error in response.get_json()["errors"]] == [0]
+    assert "not in the local ABI cache" in response.get_json()["errors"][0]["error"]
@@ -0,0 +1,204 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from _admission import Overloaded, ProcessPool, Workload
+from conftest import calldata_groups
+
+DESCRIPTOR = {"deployments": [[1, "0xabc"]], "selectors": ["0x01"]}
+
+
+def die_in_worker(value: int) -> int:
+    """
+    Kill the pool worker running it, as the OOM killer would; return normally
+    when run in-process.
+    """
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return value * 2
+
+
+def test_rejects_when_queue_is_full() -> None:
+    workload = Workload("test", 1, 1, reject_status=429)
+    with workload.slot():
+        with pytest.raises(Overloaded) as error:
+            # One running, one waiting: the third is rejected
+            workload._admit()
+            workload._admit()
+    assert error.value.status == 429
+    assert error.value.retry_after >= 1
+    assert str(error.value) == f"Server busy (test queue is full), retry in {error.value.retry_after}s"
+    assert workload.stats()["rejected"] == 1
+
+
+def test_retry_after_grows_with_the_queue() -> None:
+    workload = Workload("test", 2, 10)
+    workload._service_seconds = 3.0
+    assert workload.retry_after() == 2
+    workload._pending = 6
+    assert workload.retry_after() == 8
+
+
+def test_async_slot_shares_admission() -> None:
+    workload = Workload("test", 1, 0)
+
+    async def run() -> None:
+        with workload.slot():
+            with pytest.raises(Overloaded):
+                async with workload.async_slot():
+                    pass
+        async with workload.async_slot():
+            assert workload.stats()["running"] == 1
+
+    asyncio.run(run())
+    assert workload.stats()["running"] == 0
+
+
+@pytest.mark.parametrize("path, workload_name, status", [
+    ("/api/process-erc7730-descriptor", "conversion_workload", 429),
+    ("/api/process-erc7730-descriptors", "conversion_workload", 429),
+    ("/api/certificates", "io_workload", 503),
+    ("/api/dynamic-descriptor-proxy/v2/solana/token-account-state/abc", "io_workload", 503),
+])
+def test_overloaded_routes(api: Any, client: Any, fake_conversion: Any, monkeypatch: pytest.MonkeyPatch,
+                           path: str, workload_name: str, status: int) -> None:
+    fake_conversion(calldata_groups)
+    workload = Workload(workload_name.split("_")[0], 1, 0, reject_status=status)
+    monkeypatch.setattr(api, workload_name, workload)
+    with workload.slot():
+        if path.startswith("/api/process"):
+            response = client.post(path, json=DESCRIPTOR if path.endswith("descriptor") else [DESCRIPTOR])
+        else:
+            response = client.get(path)
+    assert response.status_code == status
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "queue is full" in response.get_json()["error"]
+
+
+def test_cached_descriptor_skips_admission(api: Any, client: Any, fake_conversion: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_conversion(calldata_groups)
+    assert client.post("/api/process-erc7730-descriptor", json=DESCRIPTOR).status_code == 200
+    workload = Workload("conversion", 1, 0, reject_status=429)
+    monkeypatch.setattr(api, "conversion_workload", workload)
+    with workload.slot():
+        assert client.post("/api/process-erc7730-descriptor", json=DESCRIPTOR).status_code == 200
+
+
+def test_process_pool_disabled() -> None:
+    assert ProcessPool(2, enabled=False).get() is None
+
+
+def test_broken_pool_recovery() -> None:
+    workload = Workload("test", 1, 0, processes=True)
+    # The worker dies: the call is retried in this process and the pool replaced
+    assert workload.run(die_in_worker, 21) == 42
+    assert workload.stats()["pool_restarts"] == 1
+    assert not workload.pool.active
+    # Each item runs on its own, and breaks its own pool
+    assert workload.map(die_in_worker, [1, 2]) == [2, 4]
+    assert workload.stats()["pool_restarts"] == 3
+
+
+def test_broken_pool_given_up() -> None:
+    pool = ProcessPool(1)
+    for _ in range(4):
+        executor = pool.get()
+        assert executor is not None
+        pool.discard(executor)
+        # Discarding a pool that was already replaced is a no-op
+        pool.discard(executor)
+    assert pool.restarts == 4
+    assert pool.get() is None
+
+
+def sleep_in_worker(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def test_map_holds_a_slot_per_item() -> None:
+    workload = Workload("test", 2, 0, processes=True)
+    results: List[List[float]] = []
+    batch = threading.Thread(target=lambda: results.append(workload.map(sleep_in_worker, [0.5] * 4)))
+    batch.start()
+    try:
+        # Two items run at a time, each holding one of the two slots
+        deadline = time.monotonic() + 30
+        while workload._slots.acquire(blocking=False):
+            workload._slots.release()
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        # The other two wait for a slot, and count against the queue
+        assert workload.stats()["queued"] == 2
+        with pytest.raises(Overloaded):
+            workload.run(sleep_in_worker, 0)
+    finally:
+        batch.join()
+    assert results == [[0.5] * 4]
+    assert (workload.stats()["running"], workload.stats()["queued"]) == (0, 0)
+    workload.pool.get().shutdown()
+
+
+def test_map_failures_release_the_batch() -> None:
+    workload = Workload("test", 1, 0)
+
+    def half(value: int) -> float:
+        if value == 2:
+            raise ValueError("odd")
+        return value / 2
+
+    # Admitted as one request, larger than the queue
+    assert workload.map(half, [4, 6, 8]) == [2, 3, 4]
+    with pytest.raises(ValueError):
+        workload.map(half, [4, 2, 8])
+    assert workload.stats()["queued"] == workload.stats()["running"] == 0
+    assert workload.map(half, []) == []
+
+
+# Cannot be pickled: pickle looks functions up by name
+unpicklable = lambda value: value * 2  # noqa: E731
+
+
+def test_unpicklable_work_runs_in_process() -> None:
+    workload = Workload("test", 1, 0, processes=True)
+    assert workload.run(unpicklable, 21) == 42
+    assert workload.pool.active and workload.stats()["pool_restarts"] == 0
+    workload.pool.get().shutdown()
+
+
+def worker_state() -> Dict[str, Any]:
+    import _signing
+    import index
+
+    return {
+        "cassette": index.upstream_cassette,
+        "store": index.descriptor_store,
+        "signers": len(_signing._signers),
+        "threads": sorted(thread.name for thread in threading.enumerate()),
+    }
+
+
+def test_pool_workers_skip_startup_work(api: Any, monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> None:
+    monkeypatch.setenv("UPSTREAM_CASSETTE_MODE", "replay")
+    monkeypatch.setenv("UPSTREAM_CASSETTE_DIR", str(tmp_path))
+    monkeypatch.setenv("DESCRIPTOR_STORE_DIR", str(tmp_path))
+    monkeypatch.setenv("WARMUP_PIPELINES", "v1,v2")
+    pool = ProcessPool(1)
+    executor = pool.get()
+    assert executor is not None
+    try:
+        state = executor.submit(worker_state).result()
+    finally:
+        executor.shutdown()
+    assert state == {"cassette": None, "store": None, "signers": 0, "threads": ["MainThread"]}
+
+
+def test_cache_stats(client: Any) -> None:
+    stats = client.get("/api/cache-stats").get_json()
+    assert stats["workloads"]["conversion"]["executor"] == "inline"
+    assert stats["store"] is None and stats["cassette"] is None
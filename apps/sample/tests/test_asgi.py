@@ -0,0 +1,184 @@
+import asyncio
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from _admission import Workload
+from conftest import calldata_groups
+from stubs import metadata_response
+
+pytest.importorskip("aiohttp")
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+@pytest.fixture
+def asgi(client: Any) -> Any:
+    import _asgi
+
+    return _asgi
+
+
+def serve(asgi: Any, *requests: Any) -> List[Response]:
+    """
+    Serve the `request` coroutines concurrently on a new event loop. The
+    aiohttp session is bound to its loop, so it is closed before returning.
+    """
+    async def main() -> List[Response]:
+        try:
+            return list(await asyncio.gather(*requests))
+        finally:
+            await asgi.metadata_service.close()
+
+    return asyncio.run(main())
+
+
+async def request(
+    asgi: Any,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    query: bytes = b"",
+    headers: Tuple[Tuple[bytes, bytes], ...] = (),
+    chunk_size: int = 0,
+) -> Response:
+    """
+    Send one request to the ASGI app, with the body in `chunk_size` chunks
+    (all at once by default), and return its (status, headers, body).
+    """
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] if chunk_size else [body]
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": query,
+        "root_path": "",
+        "headers": list(headers),
+    }
+    await asgi.app(scope, receive, send)
+    start, *body_messages = sent
+    assert start["type"] == "http.response.start"
+    return (
+        start["status"],
+        {name.decode("latin-1"): value.decode("latin-1") for name, value in start["headers"]},
+        b"".join(message.get("body", b"") for message in body_messages),
+    )
+
+
+def test_dynamic_descriptor_proxy(api: Any, asgi: Any) -> None:
+    path = "v2/solana/alt-resolution/alt/1"
+    (status, headers, body), = serve(asgi, request(
+        asgi, "GET", f"/api/dynamic-descriptor-proxy/{path}", query=b"commitment=finalized"
+    ))
+    assert status == 200
+    assert json.loads(body)["data"] == metadata_response(f"/{path}?commitment=finalized")["data"]
+    # Same stages and request metrics as the WSGI route
+    assert "metadata_fetch;dur=" in headers["server-timing"]
+    assert "io_queue;dur=" in headers["server-timing"]
+    metrics = api.app.test_client().get("/api/metrics").get_data(as_text=True)
+    assert 'api_stage_duration_seconds_count{route="dynamic_descriptor_proxy",stage="metadata_fetch"}' in metrics
+
+
+def test_proxy_coalesces_concurrent_requests(api: Any, asgi: Any, upstreams: Dict[str, Any]) -> None:
+    path = "/api/dynamic-descriptor-proxy/v2/solana/token-account-state/abc"
+    upstream_calls = api.metadata_service_client.stats()["upstream_calls"]
+    coalesced = asgi.metadata_service.coalesced
+    upstreams["metadata"].latency = 0.2
+    try:
+        responses = serve(asgi, *(request(asgi, "GET", path) for _ in range(4)))
+    finally:
+        upstreams["metadata"].latency = 0.0
+    assert [status for status, _, _ in responses] == [200] * 4
+    assert len({body for _, _, body in responses}) == 1
+    assert api.metadata_service_client.stats()["upstream_calls"] - upstream_calls == 1
+    assert asgi.metadata_service.coalesced - coalesced == 3
+
+
+def test_dynamic_descriptor_proxy_batch(asgi: Any) -> None:
+    paths = ["v2/solana/alt-resolution/alt/1", "v2/solana/token-account-state/abc?x=1", "", 3]
+    (status, headers, body), = serve(asgi, request(
+        asgi, "POST", "/api/dynamic-descriptor-proxy-batch", json.dumps({"paths": paths}).encode(), chunk_size=16
+    ))
+    assert status == 200
+    results = json.loads(body)["results"]
+    assert [result["status"] for result in results] == [200, 200, 400, 400]
+    assert [result["path"] for result in results] == paths
+    assert "metadata_fetch;dur=" in headers["server-timing"]
+
+
+def test_overloaded(api: Any, asgi: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    workload = Workload("io", 1, 0, reject_status=503)
+    monkeypatch.setattr(api, "io_workload", workload)
+    with workload.slot():
+        (status, headers, body), = serve(asgi, request(asgi, "GET", "/api/certificates"))
+    assert status == 503
+    assert int(headers["retry-after"]) >= 1
+    assert "queue is full" in json.loads(body)["error"]
+
+
+def test_body_limit(asgi: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(asgi, "ASGI_MAX_BODY_BYTES", 64)
+    body = json.dumps({"paths": ["v2/solana/token-account-state/abc"] * 4}).encode()
+    declared, streamed, bridged = serve(
+        asgi,
+        request(asgi, "POST", "/api/dynamic-descriptor-proxy-batch", body,
+                headers=((b"content-length", str(len(body)).encode()),)),
+        request(asgi, "POST", "/api/dynamic-descriptor-proxy-batch", body, chunk_size=16),
+        request(asgi, "POST", "/api/process-erc7730-descriptors", body, chunk_size=16),
+    )
+    for status, _, response_body in (declared, streamed, bridged):
+        assert status == 413
+        assert json.loads(response_body) == {"error": "Request body too large (max 64 bytes)"}
+
+
+def test_flask_routes(asgi: Any, fake_conversion: Any) -> None:
+    calls = fake_conversion(calldata_groups)
+    descriptor = {"deployments": [[1, "0xabc"]], "selectors": ["0x01", "0x02"]}
+    body = json.dumps(descriptor).encode()
+    (status, headers, response_body), = serve(asgi, request(
+        asgi, "POST", "/api/process-erc7730-descriptor", body,
+        headers=((b"content-type", b"application/json"), (b"accept-encoding", b"gzip")), chunk_size=8,
+    ))
+    assert status == 200
+    # The chunked body reached the Flask app whole
+    assert calls == [descriptor]
+    if headers.get("content-encoding") == "gzip":
+        response_body = gzip.decompress(response_body)
+    assert json.loads(response_body)["descriptors"] == calldata_groups(descriptor)
+    assert "total;dur=" in headers["server-timing"]
+
+
+def test_lifespan(asgi: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Shutdown stops the thread pool, so give it one of its own
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(asgi, "_executor", executor)
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return messages.pop(0)
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    asyncio.run(asgi.app({"type": "lifespan"}, receive, send))
+    assert sent == [{"type": "lifespan.startup.complete"}, {"type": "lifespan.shutdown.complete"}]
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
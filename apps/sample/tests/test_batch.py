@@ -0,0 +1,50 @@
+from typing import Any, Dict
+
+from conftest import DescriptorGroups, calldata_groups
+
+DESCRIPTOR = {"deployments": [[1, "0xabc"]], "selectors": ["0x01", "0x02"]}
+OTHER = {"deployments": [[1, "0xabc"], [10, "0xdef"]], "selectors": ["0x03"]}
+
+
+def test_batch(client: Any, fake_conversion: Any) -> None:
+    calls = fake_conversion(calldata_groups)
+    client.post("/api/process-erc7730-descriptor", json=DESCRIPTOR)
+    response = client.post("/api/process-erc7730-descriptors",
+                           json=[DESCRIPTOR, OTHER, {"selectors": []}, OTHER, 1, {}])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["message"] == "Processed 3 of 6 ERC7730 descriptors"
+    assert body["errors"] == [
+        {"index": 2, "status": 400, "error": "Missing deployments"},
+        {"index": 4, "status": 400, "error": "Descriptor must be a JSON object"},
+        {"index": 5, "status": 400, "error": "No JSON data provided"},
+    ]
+    # Groups of several descriptors for the same chainId:address are merged
+    assert body["descriptors"]["1:0xabc"][0]["descriptors_calldata"]["0xabc"].keys() == {"0x01", "0x02", "0x03"}
+    assert body["descriptors"]["10:0xdef"] == calldata_groups(OTHER)["10:0xdef"]
+    # DESCRIPTOR came from the cache and OTHER was converted once
+    assert len(calls) == 3
+
+
+def test_batch_requires_a_list(client: Any) -> None:
+    for body in ({"not": "a list"}, []):
+        response = client.post("/api/process-erc7730-descriptors", json=body)
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "Expected a non-empty JSON array of descriptors"}
+
+
+def test_batch_without_any_success(client: Any, fake_conversion: Any) -> None:
+    fake_conversion(calldata_groups)
+    response = client.post("/api/process-erc7730-descriptors", json=[{"selectors": []}, "descriptor"])
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Processed 0 of 2 ERC7730 descriptors"
+
+    def fail(request_data: Dict[str, Any]) -> DescriptorGroups:
+        if request_data.get("deployments"):
+            raise RuntimeError("Signer unavailable")
+        return calldata_groups(request_data)
+
+    fake_conversion(fail)
+    response = client.post("/api/process-erc7730-descriptors", json=[DESCRIPTOR, {"selectors": []}])
+    assert response.status_code == 207
+    assert [error["status"] for error in response.get_json()["errors"]] == [500, 400]
@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Any, List
+
+import pytest
+
+from _cache import CacheBackend, LRUCache, ResultCache, SingleFlight, SQLiteCache
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_lru_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache: LRUCache[str, int] = LRUCache(4, ttl=10)
+    cache.set("a", 1)
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_eviction(tmp_path: Any) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, "one", 3)
+    other = SQLiteCache(path, "other", 3)
+    for index in range(3):
+        cache.set(index, {"value": index})
+    other.set("kept", 1)
+
+    # A hit older than ACCESS_RESOLUTION moves the entry to the end
+    cache.ACCESS_RESOLUTION = -1
+    assert cache.get(0) == {"value": 0}
+    cache.set(3, {"value": 3})
+    assert [cache.get(index) for index in range(4)] == [{"value": 0}, None, {"value": 2}, {"value": 3}]
+    assert len(cache) == 3
+    # Namespaces are evicted independently
+    assert other.get("kept") == 1
+
+
+def test_sqlite_cache_coarse_access_time(tmp_path: Any) -> None:
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "ns", 2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Within ACCESS_RESOLUTION a hit does not write, so "a" stays the oldest
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert (cache.get("b"), cache.get("c")) == (2, 3)
+
+
+def test_sqlite_cache_binary_and_ttl(tmp_path: Any) -> None:
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "ns", 2, ttl=-1, binary=True)
+    cache.set(b"\x01", b"\x02")
+    assert cache.get(b"\x01") is None
+    assert SQLiteCache(str(tmp_path / "cache.sqlite3"), "bin", 2, binary=True).get("x", b"") == b""
+
+
+def test_sqlite_cache_counters_are_thread_safe(tmp_path: Any) -> None:
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "ns", 2)
+    cache.set("hit", 1)
+
+    def lookups() -> None:
+        for _ in range(200):
+            cache.get("hit")
+            cache.get("miss")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1600, 1600)
+
+
+def test_cache_backends_implement_every_method() -> None:
+    class Incomplete(CacheBackend[str, int]):
+        def get(self, key: str, default: Any = None) -> Any:
+            return default
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete()  # type: ignore[abstract]
+
+
+def test_single_flight_shares_one_computation() -> None:
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls: List[int] = []
+    results: List[Any] = []
+
+    def compute() -> str:
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", compute))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["value"] * 5
+    assert flight.shared == 4
+
+
+def test_single_flight_propagates_errors() -> None:
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    # A failure is not remembered
+    assert flight.do("key", lambda: 1) == 1
+
+
+def test_result_cache_disk_tier(tmp_path: Any) -> None:
+    cache = ResultCache(1, str(tmp_path))
+    calls: List[str] = []
+    compute = lambda key: (lambda: calls.append(key) or {"key": key})  # noqa: E731
+    assert cache.get_or_compute("a", compute("a")) == {"key": "a"}
+    assert cache.get_or_compute("b", compute("b")) == {"key": "b"}
+    # "a" was evicted from memory but is still on disk
+    assert cache.get_or_compute("a", compute("a")) == {"key": "a"}
+    assert calls == ["a", "b"]
+    assert ResultCache(1, str(tmp_path)).get("b") == {"key": "b"}
@@ -0,0 +1,68 @@
+import os
+from typing import Any, Dict
+
+import pytest
+import requests
+
+from _cassette import RECORD, REPLAY, Cassette, CassetteMiss
+
+
+def session_with(cassette: Cassette) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", cassette.adapter())
+    return session
+
+
+def test_record_then_replay(tmp_path: Any, upstreams: Dict[str, Any]) -> None:
+    cal, metadata = upstreams["cal"], upstreams["metadata"]
+    recorder = session_with(Cassette(str(tmp_path), RECORD))
+    recorded = [
+        recorder.get(f"{cal.url}/certificates", params={"ref": "branch:main", "output": "descriptor"}),
+        recorder.get(f"{metadata.url}/v2/solana/alt-resolution/alt/1"),
+    ]
+
+    replayer = Cassette(str(tmp_path), REPLAY)
+    # The host is not part of the key, and query parameters are sorted
+    session = session_with(replayer)
+    replayed = [
+        session.get("http://elsewhere/certificates?output=descriptor&ref=branch%3Amain"),
+        session.get("http://elsewhere/v2/solana/alt-resolution/alt/1"),
+    ]
+    for before, after in zip(recorded, replayed):
+        assert after.status_code == before.status_code
+        assert after.json() == before.json()
+        assert after.headers.get("ETag") == before.headers.get("ETag")
+    assert replayer.stats()["replayed"] == 2
+
+    # Cache validators are honoured on replay
+    revalidated = session.get("http://elsewhere/certificates?output=descriptor&ref=branch%3Amain",
+                              headers={"If-None-Match": recorded[0].headers["ETag"]})
+    assert revalidated.status_code == 304
+
+    with pytest.raises(CassetteMiss, match="No recorded response for GET /missing"):
+        session.get("http://elsewhere/missing")
+    assert replayer.stats()["misses"] == 1
+
+
+def test_concurrent_recorders(tmp_path: Any, upstreams: Dict[str, Any]) -> None:
+    metadata = upstreams["metadata"]
+    # Two processes recording into the same directory, as two test workers would
+    first, second = Cassette(str(tmp_path), RECORD), Cassette(str(tmp_path), RECORD)
+    session_with(first).get(f"{metadata.url}/v2/first")
+    session_with(second).get(f"{metadata.url}/v2/second")
+    assert Cassette(str(tmp_path), REPLAY).stats()["entries"] == 2
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+
+
+def test_binary_bodies(tmp_path: Any) -> None:
+    cassette = Cassette(str(tmp_path), RECORD)
+    request = requests.Request("GET", "http://upstream/blob").prepare()
+    response = requests.Response()
+    response.status_code, response._content = 200, b"\xff\x00"
+    cassette.record(request, response)
+    assert Cassette(str(tmp_path), REPLAY).replay(request).content == b"\xff\x00"
+
+
+def test_unknown_mode(tmp_path: Any) -> None:
+    with pytest.raises(ValueError, match="Unknown cassette mode"):
+        Cassette(str(tmp_path), "rewind")
@@ -0,0 +1,45 @@
+import os
+from typing import Any, Dict
+
+from _cache import RevalidatingValue
+
+
+def test_certificates(client: Any, upstreams: Dict[str, Any]) -> None:
+    response = client.get("/api/certificates")
+    assert response.status_code == 200
+    certificates = response.get_json()
+    assert certificates
+    for [entry] in certificates.values():
+        assert entry["descriptor"]["signatures"]["test"] == entry["descriptor"]["signatures"]["prod"]
+    # Served from memory afterwards
+    requests_made = upstreams["cal"].requests
+    assert client.get("/api/certificates").get_json() == certificates
+    assert upstreams["cal"].requests == requests_made
+
+
+def test_revalidation_keeps_the_value(tmp_path: Any) -> None:
+    fetched = []
+
+    def fetch(validators: Dict[str, str]) -> Any:
+        fetched.append(dict(validators))
+        # Unchanged upstream: None keeps the current value
+        return ({"v": 1}, {"etag": "1"}) if not validators else None
+
+    value = RevalidatingValue(fetch, -1, str(tmp_path / "snapshot.json"))
+    assert value.get() == {"v": 1}
+    value._refresh()
+    assert value.get() == {"v": 1}
+    assert fetched[:2] == [{}, {"etag": "1"}]
+
+
+def test_snapshot_serves_while_upstream_is_down(tmp_path: Any) -> None:
+    snapshot = str(tmp_path / "snapshot.json")
+    value = RevalidatingValue(lambda validators: ({"v": 1}, {"etag": "1"}), 300, snapshot)
+    assert value.get() == {"v": 1}
+    assert os.path.exists(snapshot)
+
+    def unreachable(validators: Any) -> Any:
+        raise OSError("unreachable")
+
+    # A new process serves the snapshot while the upstream is down
+    assert RevalidatingValue(unreachable, 300, snapshot).get() == {"v": 1}
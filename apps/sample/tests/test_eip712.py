@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+
+class Instruction(BaseModel):
+    chain_id: int
+    address: str
+    display_name: str
+
+
+class Message(BaseModel):
+    schema_hash: str
+    labels: List[str]
+
+
+class Contract(BaseModel):
+    address: str
+    contractName: str
+    messages: List[Message]
+
+
+class DAppDescriptor(BaseModel):
+    chainId: int
+    contracts: List[Contract]
+
+
+class ToInstructions:
+    """
+    Stand-in for the eip712 resolved -> instructions converter: one instruction
+    per message label, grouped by address and schema hash.
+    """
+
+    def convert(self, descriptor: DAppDescriptor) -> Dict[str, Dict[str, List[Instruction]]]:
+        return {
+            contract.address: {
+                message.schema_hash: [
+                    Instruction(chain_id=descriptor.chainId, address=contract.address, display_name=label)
+                    for label in message.labels
+                ]
+                for message in contract.messages
+            }
+            for contract in descriptor.contracts
+        }
+
+
+@pytest.fixture
+def eip712(api: Any, monkeypatch: pytest.MonkeyPatch) -> List[Instruction]:
+    """
+    Replace the eip712 pipeline with stand-ins. Returns the instructions
+    serialized, in order.
+    """
+    serialized: List[Instruction] = []
+
+    def serialize_instruction(instruction: Instruction, version: Any) -> str:
+        serialized.append(instruction)
+        return f"{instruction.chain_id:02x}{instruction.display_name.encode().hex()}"
+
+    pipeline = SimpleNamespace(
+        EIP712InputToResolvedConverter=lambda: SimpleNamespace(convert=lambda descriptor: descriptor),
+        EIP712ResolvedToInstructionsConverter=ToInstructions,
+        EIP712Version=SimpleNamespace(V2=2),
+        serialize_instruction=serialize_instruction,
+    )
+    load = api._pipelines.load
+    monkeypatch.setattr(api._pipelines, "load", lambda name: pipeline if name == "eip712" else load(name))
+    return serialized
+
+
+def test_one_conversion_per_distinct_schema(api: Any, eip712: List[Instruction], monkeypatch: pytest.MonkeyPatch) -> None:
+    converted: List[str] = []
+    format_and_sign = api.format_and_sign_eip712_instruction
+
+    def counting(instruction: Instruction, template: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if template is None:
+            converted.append(instruction.display_name)
+        return format_and_sign(instruction, template)
+
+    monkeypatch.setattr(api, "format_and_sign_eip712_instruction", counting)
+    messages = [Message(schema_hash="s1", labels=["Order", "Amount"]), Message(schema_hash="s2", labels=["Permit"])]
+    relabeled = [Message(schema_hash="s1", labels=["Swap", "Amount"])]
+    descriptors = {
+        "1": DAppDescriptor(chainId=1, contracts=[Contract(address="0xa", contractName="DEX", messages=messages)]),
+        "10": DAppDescriptor(chainId=10, contracts=[
+            Contract(address="0xa", contractName="DEX", messages=messages),
+            # Same schema, other display format
+            Contract(address="0xb", contractName="DEX", messages=relabeled),
+        ]),
+    }
+
+    groups = api._format_eip712_descriptors_for_response(descriptors)
+
+    # s1 and s2 once for 0xa, s1 again for its other format on 0xb
+    assert converted == ["Order", "Amount", "Permit", "Swap", "Amount"]
+    # Every deployment is still serialized and signed for its own chain and address
+    assert [(instruction.chain_id, instruction.address) for instruction in eip712].count((10, "0xa")) == 3
+    assert len(eip712) == 8
+    deployed = groups["10:0xa"][0]["descriptors_eip712"]["0xa"]["s1"]["instructions"]
+    assert [(instruction["chain_id"], instruction["address"]) for instruction in deployed] == [(10, "0xa")] * 2
+    assert deployed[0]["display_name"] == "Order"
+    assert deployed[0]["descriptor"] == f"0a{b'Order'.hex()}"
+    assert groups["10:0xb"][0]["descriptors_eip712"]["0xb"]["s1"]["instructions"][0]["display_name"] == "Swap"
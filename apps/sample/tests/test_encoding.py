@@ -0,0 +1,92 @@
+import base64
+import copy
+import gzip
+from typing import Any, Optional
+
+import pytest
+
+from _encoding import (
+    COMPRESSION_MIN_BYTES,
+    COMPRESSORS,
+    compact_descriptors,
+    compress_response,
+    json_response,
+    negotiate_encoding,
+)
+from conftest import calldata_groups
+
+DESCRIPTOR = {"deployments": [[1, "0xabc"]], "selectors": ["0x01", "0x02"]}
+
+# The preferred coding among the installed ones
+PREFERRED = next(iter(COMPRESSORS))
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("*", PREFERRED),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0.5, *;q=0.8", PREFERRED),
+])
+def test_negotiate_encoding(accept_encoding: str, expected: Optional[str]) -> None:
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_compress_response_threshold() -> None:
+    small = compress_response(json_response({"a": 1}), "gzip")
+    assert "Content-Encoding" not in small.headers
+    assert small.headers["Vary"] == "Accept-Encoding"
+
+    body = {"data": "00" * COMPRESSION_MIN_BYTES}
+    large = compress_response(json_response(body), "gzip")
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(large.get_data()) == json_response(body).get_data()
+
+
+def test_json_response_keeps_key_order() -> None:
+    assert json_response({"b": 1, "a": "é"}, 201).get_data() == '{"b":1,"a":"é"}'.encode("utf-8")
+
+
+def test_compact_descriptors() -> None:
+    descriptors = {
+        "1:0xabc": [{
+            "descriptors_calldata": {"0xabc": {
+                "0x01": {"data": "0a0b", "signatures": {"test": "3045", "prod": "3045"}},
+                "0x02": {"data": "zz", "signatures": {"test": "3045", "prod": "3046"}},
+                "0x03": {"data": "0A0B", "signatures": "3045"},
+            }},
+        }],
+    }
+    original = copy.deepcopy(descriptors)
+    compact = compact_descriptors(descriptors)
+    assert compact["1:0xabc"][0]["descriptors_calldata"]["0xabc"] == {
+        "0x01": {"data": "0a0b", "signatures": "3045"},
+        "0x02": {"data": "zz", "signatures": {"test": "3045", "prod": "3046"}},
+        "0x03": {"data": "0A0B", "signatures": "3045"},
+    }
+    binary = compact_descriptors(descriptors, binary=True)["1:0xabc"][0]["descriptors_calldata"]["0xabc"]
+    assert binary["0x01"] == {
+        "data": {"$bytes": base64.b64encode(b"\x0a\x0b").decode()},
+        "signatures": {"$bytes": base64.b64encode(b"\x30\x45").decode()},
+    }
+    # Not hex: left as is
+    assert binary["0x02"]["data"] == "zz"
+    # $bytes expands to lowercase hex, so other hex is left as is to keep its case
+    assert binary["0x03"]["data"] == "0A0B"
+    # The input, possibly shared with a cache, is untouched
+    assert descriptors == original
+
+
+def test_compact_format(client: Any, fake_conversion: Any) -> None:
+    fake_conversion(calldata_groups)
+    body = client.post("/api/process-erc7730-descriptor?format=compact&bytes=base64", json=DESCRIPTOR).get_json()
+    assert body["format"] == "compact-v1"
+    assert body["descriptors"]["1:0xabc"][0]["descriptors_calldata"]["0xabc"]["0x01"] == {
+        "data": {"$bytes": "AQA="}, "signatures": {"$bytes": "MEU="},
+    }
+    # The cached result is not modified by compacting
+    assert client.post("/api/process-erc7730-descriptor", json=DESCRIPTOR).get_json()["descriptors"] == (
+        calldata_groups(DESCRIPTOR)
+    )
@@ -0,0 +1,141 @@
+from typing import Any, Dict, List
+
+import _incremental
+from _incremental import IncrementalStore
+from conftest import DescriptorGroups, calldata_groups
+
+DESCRIPTOR = {"deployments": [[1, "0xabc"]], "selectors": ["0x01", "0x02"]}
+
+
+def incremental_groups(request_data: Dict[str, Any]) -> DescriptorGroups:
+    """
+    `calldata_groups` going through the incremental session like the calldata
+    pipeline: one item per selector, derived from `sources[selector]`.
+    """
+    session = _incremental.current()
+    groups = calldata_groups(request_data)
+    for key, [entry] in groups.items():
+        for address, selectors in entry["descriptors_calldata"].items():
+            for selector in list(selectors):
+                source = request_data.get("sources", {}).get(selector)
+                compute = lambda value=selectors[selector], source=source: {**value, "source": source}  # noqa: E731
+                selectors[selector] = session.item(key, "calldata", selector, source, compute) if session else compute()
+    return groups
+
+
+def process(store: IncrementalStore, selectors: Dict[str, str], computed: List[str]) -> Any:
+    """
+    Process one group of `selector -> source` the way the calldata pipeline does.
+    """
+    with _incremental.session(store) as session:
+        assert _incremental.current() is session
+        output = {
+            selector: session.item("1:0xabc", "calldata", selector, source,
+                                   lambda selector=selector, source=source: computed.append(selector) or f"signed:{source}")
+            for selector, source in selectors.items()
+        }
+    assert _incremental.current() is None
+    return session, {"1:0xabc": [{"descriptors_calldata": {"0xabc": output}}]}
+
+
+def test_unchanged_items_are_reused() -> None:
+    store = IncrementalStore(16)
+    computed: List[str] = []
+    session, _ = process(store, {"0x01": "a", "0x02": "b"}, computed)
+    assert session.delta() == {"1:0xabc": {"calldata": {"changed": ["0x01", "0x02"], "removed": []}}}
+    session.commit()
+
+    session, processed = process(store, {"0x01": "a", "0x02": "B", "0x03": "c"}, computed)
+    assert computed == ["0x01", "0x02", "0x02", "0x03"]
+    assert session.reused == 1
+    assert processed["1:0xabc"][0]["descriptors_calldata"]["0xabc"]["0x01"] == "signed:a"
+    assert session.delta() == {"1:0xabc": {"calldata": {"changed": ["0x02", "0x03"], "removed": []}}}
+    assert session.only_changed(processed) == {
+        "1:0xabc": [{"descriptors_calldata": {"0xabc": {"0x02": "signed:B", "0x03": "signed:c"}}}]
+    }
+
+
+def test_removed_items_and_uncommitted_sessions() -> None:
+    store = IncrementalStore(16)
+    computed: List[str] = []
+    process(store, {"0x01": "a", "0x02": "b"}, computed)[0].commit()
+
+    session, processed = process(store, {"0x01": "a"}, computed)
+    assert session.delta() == {"1:0xabc": {"calldata": {"changed": [], "removed": ["0x02"]}}}
+    # Groups without changes are left out
+    assert session.only_changed(processed) == {}
+
+    # The session above was not committed, so 0x02 is still known
+    session, _ = process(store, {"0x01": "a", "0x02": "b"}, computed)
+    assert session.reused == 2
+
+
+def test_store_eviction() -> None:
+    store = IncrementalStore(1)
+    store.put("1:0xabc", "calldata", {"0x01": ("hash", "output")})
+    store.put("1:0xdef", "calldata", {})
+    assert store.get("1:0xabc") == {}
+
+
+def test_removed_groups() -> None:
+    store = IncrementalStore(16)
+    with _incremental.session(store) as session:
+        session.item("1:0xabc", "calldata", "0x01", "a", lambda: "signed:a")
+        session.item("10:0xabc", "calldata", "0x01", "a", lambda: "signed:a")
+        session.item("10:0xabc", "eip712", "f00d", "s", lambda: "signed:s")
+    session.commit()
+
+    with _incremental.session(store) as session:
+        session.item("1:0xabc", "calldata", "0x01", "a", lambda: "signed:a")
+    # Every item of a group no longer produced is removed; the other sections are left alone
+    assert session.delta() == {
+        "1:0xabc": {"calldata": {"changed": [], "removed": []}},
+        "10:0xabc": {"calldata": {"changed": [], "removed": ["0x01"]}},
+    }
+    session.commit()
+    assert store.get("10:0xabc")["calldata"] == {}
+    assert store.submission("1:0xabc", "calldata") == ["1:0xabc"]
+
+    with _incremental.session(store) as session:
+        session.item("1:0xabc", "calldata", "0x01", "a", lambda: "signed:a")
+    assert session.delta() == {"1:0xabc": {"calldata": {"changed": [], "removed": []}}}
+
+
+def test_incremental_delta(client: Any, fake_conversion: Any) -> None:
+    calls = fake_conversion(incremental_groups)
+    url = "/api/process-erc7730-descriptor?incremental=true"
+    first = client.post(url, json={**DESCRIPTOR, "sources": {"0x01": "a", "0x02": "b"}}).get_json()
+    assert first["delta"] == {"1:0xabc": {"calldata": {"changed": ["0x01", "0x02"], "removed": []}}}
+
+    edited = {"deployments": [[1, "0xabc"]], "selectors": ["0x01", "0x03"], "sources": {"0x01": "A", "0x03": "c"}}
+    second = client.post(url, json=edited).get_json()
+    assert second["delta"] == {"1:0xabc": {"calldata": {"changed": ["0x01", "0x03"], "removed": ["0x02"]}}}
+    assert second["descriptors"]["1:0xabc"][0]["descriptors_calldata"]["0xabc"]["0x01"]["source"] == "A"
+
+    only = client.post("/api/process-erc7730-descriptor?delta=true",
+                       json={**edited, "sources": {"0x01": "A", "0x03": "C"}}).get_json()
+    assert only["delta"]["1:0xabc"]["calldata"] == {"changed": ["0x03"], "removed": []}
+    assert only["descriptors"]["1:0xabc"][0]["descriptors_calldata"]["0xabc"].keys() == {"0x03"}
+    # Incremental requests bypass the descriptor cache
+    assert len(calls) == 3
+
+
+def test_incremental_errors_are_not_committed(api: Any, client: Any, fake_conversion: Any) -> None:
+    fake_conversion(incremental_groups)
+    response = client.post("/api/process-erc7730-descriptor?incremental=true", json={"selectors": ["0x01"]})
+    assert response.status_code == 400
+    assert api.incremental_store.stats()["size"] == 0
+
+
+def test_incremental_removed_deployment(client: Any, fake_conversion: Any) -> None:
+    fake_conversion(incremental_groups)
+    url = "/api/process-erc7730-descriptor?delta=true"
+    descriptor = {"deployments": [[1, "0xabc"], [10, "0xdef"]], "selectors": ["0x01"], "sources": {"0x01": "a"}}
+    client.post(url, json=descriptor)
+
+    response = client.post(url, json={**descriptor, "deployments": [[1, "0xabc"]]}).get_json()
+    assert response["delta"] == {
+        "1:0xabc": {"calldata": {"changed": [], "removed": []}},
+        "10:0xdef": {"calldata": {"changed": [], "removed": ["0x01"]}},
+    }
+    assert response["descriptors"] == {}
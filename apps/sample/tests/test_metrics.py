@@ -0,0 +1,61 @@
+import re
+from typing import Any, Dict
+
+from _metrics import Counter, Histogram, collect_stages, record_stages, stage
+from conftest import calldata_groups
+
+
+def test_server_timing(client: Any, fake_conversion: Any) -> None:
+    fake_conversion(calldata_groups)
+    response = client.get("/api/certificates")
+    timings = response.headers["Server-Timing"]
+    assert re.fullmatch(r"(\w+;dur=\d+\.\d\d, )*total;dur=\d+\.\d\d", timings)
+    assert "cal_fetch;dur=" in timings
+
+    response = client.post("/api/process-erc7730-descriptor", json={"deployments": [[1, "0xabc"]]})
+    assert "normalize;dur=" in response.headers["Server-Timing"]
+
+
+def test_metrics_endpoint(client: Any) -> None:
+    client.get("/api/certificates")
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert re.search(r'^api_requests_total\{route="get_certificates",status="200"\} [1-9]', body, re.M)
+    assert re.search(r'^api_request_duration_seconds_count\{route="get_certificates"\} [1-9]', body, re.M)
+    assert re.search(r'^api_stage_duration_seconds_count\{route="get_certificates",stage="cal_fetch"\} [1-9]', body, re.M)
+    assert "# TYPE api_requests_in_flight gauge" in body
+
+
+def test_collected_stages() -> None:
+    with stage("outside"):
+        pass  # No-op outside a request
+    with collect_stages() as collected:
+        with stage("sign"):
+            pass
+        with stage("sign"):
+            pass
+        record_stages({"convert": 1.0})
+    assert set(collected) == {"sign", "convert"}
+    assert collected["convert"] == 1.0
+
+
+def test_render() -> None:
+    counter = Counter("test_total", "A counter.", ["kind"])
+    counter.inc('a "quoted"\nvalue')
+    histogram = Histogram("test_seconds", "A histogram.", buckets=(0.1, 1.0))
+    histogram.observe(0.5)
+    lines: Dict[str, str] = {}
+    for line in counter.render() + histogram.render():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            lines[name] = value
+    assert lines == {
+        'test_total{kind="a \\"quoted\\"\\nvalue"}': "1",
+        'test_seconds_bucket{le="0.1"}': "0",
+        'test_seconds_bucket{le="1"}': "1",
+        'test_seconds_bucket{le="+Inf"}': "1",
+        "test_seconds_sum": "0.5",
+        "test_seconds_count": "1",
+    }
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+import _pipelines
+from conftest import SAMPLE_DIR
+
+IMPORT_CHECK = """
+import json, sys
+import index
+print(json.dumps({
+    "modules": sorted({name.split(".")[0] for name in sys.modules} & {"erc7730", "eip712"}),
+    "report": index._pipelines.import_report(),
+}))
+"""
+
+
+def test_importing_the_api_loads_no_pipeline(api: Any) -> None:
+    # In a fresh interpreter: the test session may already have loaded them
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK],
+        cwd=os.path.join(SAMPLE_DIR, "api"),
+        env=dict(os.environ, WARMUP_PIPELINES=""),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    imported = json.loads(result.stdout.splitlines()[-1])
+    assert imported["modules"] == []
+    assert not any(entry["loaded"] for entry in imported["report"].values())
+
+
+def test_load_imports_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    imports: List[str] = []
+
+    def load_fake() -> SimpleNamespace:
+        imports.append("fake")
+        return SimpleNamespace(value=1)
+
+    monkeypatch.setitem(_pipelines._LOADERS, "fake", load_fake)
+    monkeypatch.setattr(_pipelines, "_loaded", {})
+    assert _pipelines.import_report()["fake"]["loaded"] is False
+    assert _pipelines.load("fake") is _pipelines.load("fake")
+    assert imports == ["fake"]
+    report = _pipelines.import_report()["fake"]
+    assert report["loaded"] is True and report["import_seconds"] >= 0
+
+    thread = _pipelines.warm_up_in_background(["fake", "unknown"])
+    assert thread is not None
+    thread.join()
+    assert _pipelines.import_report()["fake"]["warmup_seconds"] >= 0
+    assert imports == ["fake"]
+    assert _pipelines.warm_up_in_background(["unknown"]) is None
+
+
+def test_import_report_route(client: Any) -> None:
+    report = client.get("/api/import-report").get_json()
+    assert report["module_import_seconds"] > 0
+    assert set(report["pipelines"]) == {"common", "eip712", "v1", "v2"}
@@ -0,0 +1,46 @@
+import json
+import os
+from typing import Any, Dict
+
+from _precompile import precompile
+from _store import DescriptorStore
+from conftest import calldata_groups
+
+
+def write(directory: Any, name: str, descriptor: Dict[str, Any]) -> None:
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(descriptor, f)
+
+
+def test_precompile(api: Any, fake_conversion: Any, tmp_path: Any) -> None:
+    calls = fake_conversion(calldata_groups)
+    registry, output = tmp_path / "registry", str(tmp_path / "store")
+    write(registry, "a.json", {"deployments": [[1, "0xabc"]], "selectors": ["0x01"]})
+    write(registry, "nested/b.json", {"deployments": [[1, "0xabc"], [10, "0xdef"]], "selectors": ["0x02"]})
+    write(registry, "broken.json", {"selectors": ["0x03"]})
+
+    summary = precompile(str(registry), output, workers=1)
+    assert {key: summary[key] for key in ("inputs", "processed", "reused", "errors", "keys")} == {
+        "inputs": 3, "processed": 3, "reused": 0, "errors": 1, "keys": 2,
+    }
+    store = DescriptorStore(output, reload_interval=0)
+    key, entry = store.get("1", "0xabc")
+    generation = store.stats()["generation"]
+    assert (key, generation) == ("1:0xabc", summary["generation"])
+    # Both descriptors of 1:0xabc are merged into one entry
+    assert entry[0]["descriptors_calldata"]["0xabc"].keys() == {"0x01", "0x02"}
+    assert store.get("10", "0xdef") is not None
+
+    # Unchanged inputs are reused by content hash; failed ones are retried
+    summary = precompile(str(registry), output, workers=1)
+    assert (summary["processed"], summary["reused"]) == (1, 2)
+    write(registry, "a.json", {"deployments": [[1, "0xabc"]], "selectors": ["0x04"]})
+    summary = precompile(str(registry), output, workers=1)
+    assert (summary["processed"], summary["reused"]) == (2, 1)
+    assert [call.get("selectors") for call in calls[-2:]] == [["0x04"], ["0x03"]]
+
+    _, entry = store.get("1", "0xabc")
+    assert store.stats()["generation"] == summary["generation"] != generation
+    assert entry[0]["descriptors_calldata"]["0xabc"].keys() == {"0x02", "0x04"}
@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import Any, Dict, List
+
+from conftest import DescriptorGroups, calldata_groups
+
+DESCRIPTOR = {"deployments": [[1, "0xabc"]], "selectors": ["0x01", "0x02"]}
+
+
+def test_process_descriptor(client: Any, fake_conversion: Any) -> None:
+    calls = fake_conversion(calldata_groups)
+    response = client.post("/api/process-erc7730-descriptor", json=DESCRIPTOR)
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "message": "ERC7730 descriptor processed successfully",
+        "descriptors": calldata_groups(DESCRIPTOR),
+    }
+    # Served from the descriptor cache the second time
+    assert client.post("/api/process-erc7730-descriptor", json=DESCRIPTOR).get_json() == response.get_json()
+    assert len(calls) == 1
+    assert client.get("/api/cache-stats").get_json()["descriptors"]["memory"]["hits"] >= 1
+
+
+def test_process_descriptor_errors(client: Any, fake_conversion: Any) -> None:
+    fake_conversion(calldata_groups)
+    response = client.post("/api/process-erc7730-descriptor", json={"selectors": []})
+    assert (response.status_code, response.get_json()) == (400, {"error": "Missing deployments"})
+    response = client.post("/api/process-erc7730-descriptor", data="null", content_type="application/json")
+    assert (response.status_code, response.get_json()) == (400, {"error": "No JSON data provided"})
+
+
+def test_concurrent_requests_share_one_conversion(api: Any, fake_conversion: Any) -> None:
+    release = threading.Event()
+
+    def slow(request_data: Dict[str, Any]) -> DescriptorGroups:
+        release.wait(5)
+        return calldata_groups(request_data)
+
+    calls = fake_conversion(slow)
+    api.descriptor_cache.clear()
+    responses: List[Any] = []
+    threads = [
+        threading.Thread(target=lambda: responses.append(
+            api.app.test_client().post("/api/process-erc7730-descriptor", json=DESCRIPTOR)
+        ))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert [response.status_code for response in responses] == [200] * 4
+    assert len(calls) == 1
@@ -0,0 +1,67 @@
+import threading
+from typing import Any, Dict, List
+
+from _signing import Signer
+from _tlv import find_last
+from _upstream import UpstreamClient, UpstreamError
+from conftest import SIGNING_KEY, verify
+from stubs import SIGNATURE_TLV_TAG, metadata_response
+
+import pytest
+
+
+def test_dynamic_descriptor_proxy(client: Any) -> None:
+    path = "v2/solana/alt-resolution/alt/1"
+    response = client.get(f"/api/dynamic-descriptor-proxy/{path}?commitment=finalized")
+    assert response.status_code == 200
+    body = response.get_json()
+    original = bytes.fromhex(metadata_response(f"/{path}?commitment=finalized")["signedDescriptor"])
+    resigned = bytes.fromhex(body["signedDescriptor"])
+    assert resigned != original
+    signature = find_last(resigned, SIGNATURE_TLV_TAG)
+    assert signature is not None
+    assert verify(Signer(SIGNING_KEY).public_key, resigned[:signature.start],
+                  resigned[signature.value_start:signature.end])
+    assert body["data"] == {"path": f"/{path}?commitment=finalized"}
+
+
+def test_upstream_client_caches_and_coalesces(upstreams: Dict[str, Any]) -> None:
+    metadata = upstreams["metadata"]
+    transformed: List[Any] = []
+    upstream = UpstreamClient("metadata service", metadata.url, transform=lambda payload: transformed.append(1) or payload)
+    metadata.latency = 0.2
+    try:
+        results: List[Any] = []
+        threads = [
+            threading.Thread(target=lambda: results.append(upstream.get_json("v2/path", [("b", "2"), ("a", "1")])))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        metadata.latency = 0.0
+    assert len({str(result) for result in results}) == 1
+    assert upstream.stats()["upstream_calls"] == 1
+    assert upstream.stats()["coalesced"] == 3
+    # Query parameters are normalized, and the result is cached
+    assert upstream.get_json("v2/path", [("a", "1"), ("b", "2")]) == results[0]
+    assert upstream.stats()["upstream_calls"] == 1
+    assert transformed == [1]
+
+
+def test_upstream_client_errors() -> None:
+    upstream = UpstreamClient("metadata service", "http://127.0.0.1:9", timeout=1)
+    with pytest.raises(UpstreamError, match="Failed to fetch from metadata service."):
+        upstream.get_json("v2/path")
+
+
+def test_dynamic_descriptor_proxy_batch(client: Any) -> None:
+    paths = ["v2/solana/alt-resolution/alt/1", "v2/solana/token-account-state/abc?x=1", "", 3]
+    response = client.post("/api/dynamic-descriptor-proxy-batch", json={"paths": paths})
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [200, 200, 400, 400]
+    assert [result["path"] for result in results] == paths
+    assert results[0]["data"] == client.get(f"/api/dynamic-descriptor-proxy/{paths[0]}").get_json()
+    assert client.post("/api/dynamic-descriptor-proxy-batch", json={"paths": "nope"}).status_code == 400
@@ -0,0 +1,84 @@
+import hashlib
+from typing import List
+
+import pytest
+
+import _signing
+from _admission import ProcessPool
+from _signing import Signer, get_signer, signing_stats
+from conftest import SIGNING_KEY, verify
+
+
+@pytest.fixture
+def signer() -> Signer:
+    return Signer(SIGNING_KEY, cache_size=2)
+
+
+def test_signatures_are_valid_and_deterministic(signer: Signer) -> None:
+    signature = signer.sign(b"payload")
+    assert verify(signer.public_key, b"payload", signature)
+    # RFC 6979 nonces: a fresh signer produces the same bytes
+    assert Signer(SIGNING_KEY, cache_size=0).sign(b"payload") == signature
+
+
+def test_repeated_digest_is_a_cache_hit(signer: Signer) -> None:
+    digest = hashlib.sha256(b"payload").digest()
+    first = signer.sign_digest(digest)
+    assert signer.stats()["hits"] == 0 and signer.stats()["misses"] == 1
+
+    assert signer.sign_digest(digest) == first
+    assert signer.stats()["hits"] == 1 and signer.stats()["misses"] == 1
+
+    signer.sign_digest(hashlib.sha256(b"other").digest())
+    assert signer.stats()["hits"] == 1 and signer.stats()["misses"] == 2
+    assert signer.stats()["size"] == 2
+
+
+def test_cache_is_bounded(signer: Signer) -> None:
+    for index in range(3):
+        signer.sign(str(index).encode())
+    assert signer.stats()["size"] == 2
+    # The oldest signature was evicted and is computed again
+    signer.sign(b"0")
+    assert signer.stats()["misses"] == 4
+
+
+def test_sign_digests_uses_the_cache(signer: Signer) -> None:
+    digests = [hashlib.sha256(payload).digest() for payload in (b"a", b"b", b"a")]
+    signatures = signer.sign_digests(digests)
+    assert signatures == [signer.sign_digest(digest) for digest in digests]
+    assert signatures[0] == signatures[2]
+
+
+def test_shared_signers() -> None:
+    signer = get_signer(SIGNING_KEY)
+    assert get_signer(SIGNING_KEY) is signer
+    signer.sign(b"payload")
+    assert signing_stats()[signer.public_key]["size"] >= 1
+
+
+def test_parallel_signatures_match_serial(monkeypatch: pytest.MonkeyPatch) -> None:
+    payloads = [f"payload {index}".encode() for index in range(40)]
+    digests = [hashlib.sha256(payload).digest() for payload in payloads]
+    serial = Signer(SIGNING_KEY, cache_size=0).sign_digests(digests)
+
+    monkeypatch.setattr(_signing, "PARALLEL_SIGNING_WORKERS", 2)
+    monkeypatch.setattr(_signing, "PARALLEL_SIGNING_MIN_BATCH", 8)
+    pool = ProcessPool(2)
+    monkeypatch.setattr(_signing, "_pool", pool)
+    assert _signing.parallel_signing_enabled()
+    try:
+        assert Signer(SIGNING_KEY, cache_size=0).sign_digests(digests) == serial
+        assert pool.active and pool.restarts == 0
+
+        signer = Signer(SIGNING_KEY, cache_size=0)
+        signed: List[bytes] = []
+        with _signing.batch() as signing_batch:
+            for payload in payloads:
+                signing_batch.add(signer, payload, signed.append)
+            assert signed == []
+        assert signed == serial
+    finally:
+        executor = pool.get()
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,99 @@
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from _store import DescriptorStore, encode_entry, read_index, write_store
+
+from test_transform import random_document
+
+
+def entry(selectors: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{
+        "descriptors_calldata": {"0xAbC": selectors},
+        "descriptors_eip712": {"0xAbC": {"schema": {"instructions": ["i1"]}}},
+    }]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_encode_entry_matches_json_dumps(seed: int) -> None:
+    rng = random.Random(seed)
+    value = entry({f"0x{index:02x}": random_document(rng) for index in range(4)}) + [{"other": random_document(rng)}]
+    encoded, items = encode_entry(value)
+    assert encoded == json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    for item, locations in items.items():
+        for field, address, offset, length in locations:
+            assert json.loads(encoded[offset:offset + length]) == value[0][field][address][item]
+
+
+def test_store_lookups(tmp_path: Any) -> None:
+    directory = str(tmp_path)
+    descriptors = {
+        "1:0xAbC": entry({"0x01": {"data": "01", "signatures": {"test": "30", "prod": "30"}}}),
+        "10:0xDeF": entry({}),
+    }
+    write_store(directory, descriptors, {}, 4, "test")
+    store = DescriptorStore(directory, reload_interval=0)
+
+    key, raw = store.get_raw("1", "0xabc")
+    assert key == "1:0xAbC"
+    assert json.loads(bytes(raw)) == descriptors["1:0xAbC"]
+    assert store.get("10", "0xdef") == ("10:0xDeF", descriptors["10:0xDeF"])
+    assert store.get("1", "0xdef") is None
+
+    key, values = store.get_item_raw("1", "0xABC", "0x01")
+    assert [(field, address, json.loads(bytes(raw))) for field, address, raw in values] == [
+        ("descriptors_calldata", "0xAbC", {"data": "01", "signatures": {"test": "30", "prod": "30"}}),
+    ]
+    assert [field for field, _, _ in store.get_item_raw("1", "0xabc", "schema")[1]] == ["descriptors_eip712"]
+    assert store.get_item_raw("1", "0xabc", "0x02") is None
+    assert store.stats()["hits"] == 4 and store.stats()["misses"] == 2
+
+
+def test_store_reloads_new_generations(tmp_path: Any) -> None:
+    directory = str(tmp_path)
+    write_store(directory, {"1:0xabc": entry({"0x01": "old"})}, {}, 2, "test")
+    store = DescriptorStore(directory, reload_interval=0)
+    assert store.get("1", "0xabc")[1][0]["descriptors_calldata"]["0xAbC"]["0x01"] == "old"
+    old_generation = store.generation
+
+    index = write_store(directory, {"1:0xabc": entry({"0x01": "new"})}, {}, 2, "test")
+    # Make sure the replaced index is seen as modified
+    index_path = os.path.join(directory, "index.json")
+    os.utime(index_path, (os.stat(index_path).st_atime, os.stat(index_path).st_mtime + 1))
+    assert store.get("1", "0xabc")[1][0]["descriptors_calldata"]["0xAbC"]["0x01"] == "new"
+    assert store.generation == index["generation"] != old_generation
+    # Shards of the previous generation are removed
+    assert all(name.startswith(index["generation"]) for name in os.listdir(os.path.join(directory, "shards")))
+
+
+def test_missing_store(tmp_path: Any) -> None:
+    assert read_index(str(tmp_path))["entries"] == {}
+    assert DescriptorStore(str(tmp_path)).get_raw("1", "0xabc") is None
+
+
+def test_stored_lookups(api: Any, client: Any, monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> None:
+    assert client.get("/api/descriptors/1/0xabc").status_code == 503
+    descriptors = {
+        "1:0xAbC": [{
+            "descriptors_calldata": {"0xAbC": {"0x01": {"data": "0100", "signatures": {"test": "30", "prod": "30"}}}},
+            "descriptors_eip712": {"0xAbC": {"f00d": {"instructions": []}}},
+        }],
+    }
+    write_store(str(tmp_path), descriptors, {}, 2, "test")
+    monkeypatch.setattr(api, "descriptor_store", DescriptorStore(str(tmp_path)))
+
+    assert client.get("/api/descriptors/1/0xabc").get_json() == {"descriptors": descriptors}
+    compact = client.get("/api/descriptors/1/0xABC?format=compact").get_json()
+    assert compact["format"] == "compact-v1"
+    assert compact["descriptors"]["1:0xAbC"][0]["descriptors_calldata"]["0xAbC"]["0x01"]["signatures"] == "30"
+    assert client.get("/api/descriptors/1/0xabc/0x01").get_json() == {"descriptors": {"1:0xAbC": [{
+        "descriptors_calldata": {"0xAbC": {"0x01": {"data": "0100", "signatures": {"test": "30", "prod": "30"}}}},
+    }]}}
+    assert client.get("/api/descriptors/1/0xabc/f00d?format=compact").get_json()["descriptors"] == {
+        "1:0xAbC": [{"descriptors_eip712": {"0xAbC": {"f00d": {"instructions": []}}}}],
+    }
+    assert client.get("/api/descriptors/1/0xdef").status_code == 404
+    assert client.get("/api/descriptors/1/0xabc/0x02").status_code == 404
@@ -0,0 +1,73 @@
+import json
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from conftest import calldata_groups
+
+OTHER = {"deployments": [[1, "0xabc"], [10, "0xdef"]], "selectors": ["0x03"]}
+NDJSON = "application/x-ndjson"
+
+
+def read_ndjson(response: Any) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in response.get_data().splitlines()]
+
+
+def test_stream(client: Any, fake_conversion: Any) -> None:
+    fake_conversion(calldata_groups)
+    response = client.post("/api/process-erc7730-descriptor", json=OTHER, headers={"Accept": NDJSON})
+    assert response.mimetype == NDJSON
+    records = read_ndjson(response)
+    assert [(record["type"], record.get("key")) for record in records] == [
+        ("group", "1:0xabc"), ("group", "10:0xdef"), ("trailer", None),
+    ]
+    assert records[0]["descriptors"] == calldata_groups(OTHER)["1:0xabc"]
+    assert records[-1] == {"type": "trailer", "groups": 2}
+
+    compact = read_ndjson(client.post("/api/process-erc7730-descriptor?format=compact", json=OTHER,
+                                      headers={"Accept": NDJSON}))
+    assert compact[0]["format"] == "compact-v1"
+    assert compact[0]["descriptors"][0]["descriptors_calldata"]["0xabc"]["0x03"]["signatures"] == "3045"
+
+
+def test_stream_errors(client: Any, fake_conversion: Any, api: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_conversion(calldata_groups)
+    # Before the first group: a regular error response
+    response = client.post("/api/process-erc7730-descriptor", json={"selectors": []}, headers={"Accept": NDJSON})
+    assert (response.status_code, response.get_json()) == (400, {"error": "Missing deployments"})
+
+    def failing_later(request_data: Dict[str, Any]) -> Any:
+        yield "1:0xabc", calldata_groups(request_data)["1:0xabc"]
+        raise ValueError("Invalid selector")
+
+    monkeypatch.setattr(api, "_iter_normalized_descriptor_groups", failing_later)
+    records = read_ndjson(client.post("/api/process-erc7730-descriptor", json=OTHER, headers={"Accept": NDJSON}))
+    assert records[-1] == {"type": "trailer", "groups": 1, "status": 400, "error": "Invalid selector"}
+    assert api.conversion_workload.stats()["running"] == 0
+
+
+def test_stream_records_streamed_stages(client: Any, fake_conversion: Any, api: Any,
+                                        monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_conversion(calldata_groups)
+
+    def signing_later(request_data: Dict[str, Any]) -> Any:
+        groups = calldata_groups(request_data)
+        yield "1:0xabc", groups["1:0xabc"]
+        with api.stage("sign"):
+            time.sleep(0.05)
+        yield "10:0xdef", groups["10:0xdef"]
+
+    monkeypatch.setattr(api, "_iter_normalized_descriptor_groups", signing_later)
+    labels = ("process_erc7730_descriptor", "sign")
+    counts, total = api._metrics.STAGE_LATENCY._values.get(labels, ([0], [0.0]))
+    before = sum(counts), total[0]
+
+    response = client.post("/api/process-erc7730-descriptor", json=OTHER, headers={"Accept": NDJSON})
+    # Only known once the body has been generated
+    assert "sign;dur=" not in response.headers["Server-Timing"]
+    assert read_ndjson(response)[-1] == {"type": "trailer", "groups": 2}
+
+    counts, total = api._metrics.STAGE_LATENCY._values[labels]
+    assert sum(counts) == before[0] + 1
+    assert total[0] - before[1] >= 0.05
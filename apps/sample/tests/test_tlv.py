@@ -0,0 +1,60 @@
+import pytest
+
+from _signing import Signer
+from _tlv import encode_der_uint, find_last, iter_tlv, read_der_uint, resign_descriptors, resign_descriptors_hex
+from conftest import SIGNING_KEY, verify
+from stubs import SIGNATURE_TLV_TAG, synthetic_signed_descriptor
+
+
+@pytest.fixture
+def signer() -> Signer:
+    return Signer(SIGNING_KEY, cache_size=0)
+
+
+@pytest.mark.parametrize("value", [0, 0x7F, 0x80, 0xFF, 0x100, 0x12345678])
+def test_der_uint_round_trip(value: int) -> None:
+    encoded = encode_der_uint(value)
+    assert read_der_uint(memoryview(encoded + b"\x00"), 0) == (value, len(encoded))
+
+
+def test_resign_round_trip(signer: Signer) -> None:
+    original = bytes.fromhex(synthetic_signed_descriptor("round-trip"))
+    [resigned] = resign_descriptors([original], signer, SIGNATURE_TLV_TAG)
+
+    original_signature = find_last(original, SIGNATURE_TLV_TAG)
+    signature = find_last(resigned, SIGNATURE_TLV_TAG)
+    assert original_signature is not None and signature is not None
+    # Same payload, new signature over it, still the last field
+    assert resigned[:signature.start] == original[:original_signature.start]
+    assert signature.end == len(resigned)
+    assert verify(signer.public_key, resigned[:signature.start], resigned[signature.value_start:signature.end])
+    # Re-signing is deterministic (RFC 6979) and idempotent
+    assert resign_descriptors([resigned], signer, SIGNATURE_TLV_TAG) == [resigned]
+
+
+def test_resign_long_fields(signer: Signer) -> None:
+    # A value longer than 0x7f bytes uses a multi-byte length
+    payload = b"\x01" + encode_der_uint(300) + b"\xaa" * 300
+    descriptor = payload + bytes([SIGNATURE_TLV_TAG, 2]) + b"\x30\x00"
+    [resigned] = resign_descriptors([descriptor], signer, SIGNATURE_TLV_TAG)
+    assert [field.tag for field in iter_tlv(resigned)] == [1, SIGNATURE_TLV_TAG]
+    assert resigned.startswith(payload)
+
+
+def test_resign_hex_batch(signer: Signer) -> None:
+    descriptors = [synthetic_signed_descriptor("a"), synthetic_signed_descriptor("b"), synthetic_signed_descriptor("a")]
+    resigned = resign_descriptors_hex(descriptors, signer, SIGNATURE_TLV_TAG)
+    assert len(resigned) == 3
+    assert resigned[0] == resigned[2] != resigned[1]
+
+
+@pytest.mark.parametrize("descriptor, message", [
+    (b"\x01", "truncated TLV: missing length byte"),
+    (b"\x01\x05\x00", "truncated TLV: value exceeds descriptor length"),
+    (b"\x01\x85\x00", "truncated TLV: invalid length encoding"),
+    (b"\x01\x01\x00", "no SIGNATURE (tag 0x15) field found in descriptor"),
+])
+def test_resign_errors(signer: Signer, descriptor: bytes, message: str) -> None:
+    with pytest.raises(ValueError) as error:
+        resign_descriptors([descriptor], signer, SIGNATURE_TLV_TAG)
+    assert str(error.value) == message
@@ -0,0 +1,107 @@
+import copy
+import random
+from typing import Any, List
+
+import pytest
+
+from _signing import Signer
+from _transform import (
+    ETHERSCAN_LEGACY_ABI_URL,
+    EtherscanUrlNormalizer,
+    JsonVisitor,
+    NullStripper,
+    SignedDescriptorResigner,
+    transform_json,
+)
+from conftest import SIGNING_KEY
+from stubs import SIGNATURE_TLV_TAG, synthetic_signed_descriptor
+
+
+def baseline_remove_null_values(obj: Any) -> Any:
+    """
+    The original recursive implementation, as a reference.
+    """
+    if isinstance(obj, dict):
+        return {key: baseline_remove_null_values(value) for key, value in obj.items() if value is not None}
+    if isinstance(obj, list):
+        return [baseline_remove_null_values(item) for item in obj if item is not None]
+    return obj
+
+
+def random_document(rng: random.Random, depth: int = 0) -> Any:
+    kind = rng.choice(["dict", "list", "scalar"] if depth < 5 else ["scalar"])
+    if kind == "dict":
+        return {f"k{index}": random_document(rng, depth + 1) for index in range(rng.randint(0, 4))}
+    if kind == "list":
+        return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return rng.choice([None, None, 0, 1.5, "", "text", True, False])
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_null_stripper_matches_baseline(seed: int) -> None:
+    document = random_document(random.Random(seed))
+    expected = baseline_remove_null_values(copy.deepcopy(document))
+    assert transform_json(document, [NullStripper()]) == expected
+
+
+def test_null_stripper_deep_document() -> None:
+    # Deeper than the recursion limit of the baseline implementation
+    document: Any = None
+    for _ in range(5000):
+        document = {"child": [document, 1]}
+    stripped = transform_json(document, [NullStripper()])
+    for _ in range(4999):
+        stripped = stripped["child"][0]
+    # The innermost null is gone
+    assert stripped == {"child": [1]}
+
+
+def test_etherscan_url_normalizer() -> None:
+    document = {
+        "abi": f"{ETHERSCAN_LEGACY_ABI_URL}0x1",
+        "other": ["https://example.com", "https://api.etherscan.io/v2/api?chainid=10&address=0x2"],
+    }
+    transformed = transform_json(document, [EtherscanUrlNormalizer("KEY")])
+    assert transformed == {
+        "abi": "https://api.etherscan.io/v2/api?chainid=1&module=contract&action=getabi&address=0x1&apikey=KEY",
+        "other": ["https://example.com", "https://api.etherscan.io/v2/api?chainid=10&address=0x2&apikey=KEY"],
+    }
+
+
+def test_resigner_batches_every_signed_descriptor() -> None:
+    signer = Signer(SIGNING_KEY, cache_size=0)
+    document = {
+        "signedDescriptor": synthetic_signed_descriptor("root"),
+        "items": [{"signedDescriptor": synthetic_signed_descriptor(str(index)), "x": None} for index in range(3)],
+    }
+    transformed = transform_json(
+        copy.deepcopy(document), [NullStripper(), SignedDescriptorResigner(signer, SIGNATURE_TLV_TAG)]
+    )
+    assert transformed["items"][0] == {"signedDescriptor": transformed["items"][0]["signedDescriptor"]}
+    for before, after in zip(
+        [document["signedDescriptor"]] + [item["signedDescriptor"] for item in document["items"]],
+        [transformed["signedDescriptor"]] + [item["signedDescriptor"] for item in transformed["items"]],
+    ):
+        assert after != before
+        # Only the trailing signature changes
+        assert after[:200] == before[:200]
+
+
+def test_enter_prunes_per_visitor() -> None:
+    seen: List[str] = []
+
+    class Recorder(JsonVisitor):
+        leaf_types = (str,)
+
+        def enter(self, key: Any, value: Any) -> bool:
+            return key != "skipped"
+
+        def visit_leaf(self, container: Any, key: Any, value: Any) -> Any:
+            seen.append(value)
+            return value
+
+    document = {"kept": ["a", {"b": "b"}], "skipped": {"c": "c", "d": None}}
+    transformed = transform_json(document, [Recorder(), NullStripper()])
+    assert sorted(seen) == ["a", "b"]
+    # Other visitors still walk the skipped subtree
+    assert transformed["skipped"] == {"c": "c"}
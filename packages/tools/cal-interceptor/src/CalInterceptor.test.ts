@@ -0,0 +1,231 @@
+import { CalInterceptor } from "./CalInterceptor";
+
+const ALT_URL =
+  "https://metadata.example.com/v2/solana/alt-resolution/alt/1?commitment=finalized";
+const TOKEN_URL =
+  "https://metadata.example.com/v2/solana/token-account-state/account";
+
+function batchResponse(...paths: string[]): Response {
+  return new Response(
+    JSON.stringify({
+      results: paths.map((path) => ({
+        path,
+        status: 200,
+        data: { signedDescriptor: path },
+      })),
+    }),
+  );
+}
+
+describe("CalInterceptor", () => {
+  let interceptor: CalInterceptor;
+
+  beforeEach(() => {
+    vi.spyOn(console, "log").mockImplementation(() => undefined);
+    interceptor = new CalInterceptor();
+  });
+
+  afterEach(() => {
+    interceptor.stop();
+    vi.restoreAllMocks();
+  });
+
+  describe("prefetchDynamicDescriptors", () => {
+    it("resolves every dynamic descriptor in one batch request", async () => {
+      const fetchSpy = vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        new Response(
+          JSON.stringify({
+            results: [
+              {
+                path: "v2/solana/alt-resolution/alt/1?commitment=finalized",
+                status: 200,
+                data: { signedDescriptor: "resigned" },
+              },
+              {
+                path: "v2/solana/token-account-state/account",
+                status: 502,
+                error: "Upstream unavailable",
+              },
+            ],
+          }),
+        ),
+      );
+
+      const count = await interceptor.prefetchDynamicDescriptors([
+        ALT_URL,
+        "https://crypto-assets-service.example.com/cal/dapps",
+        TOKEN_URL,
+      ]);
+
+      expect(count).toBe(1);
+      expect(fetchSpy).toHaveBeenCalledTimes(1);
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "https://metadata.example.com/api/dynamic-descriptor-proxy-batch",
+        expect.objectContaining({
+          method: "POST",
+          body: JSON.stringify({
+            paths: [
+              "v2/solana/alt-resolution/alt/1?commitment=finalized",
+              "v2/solana/token-account-state/account",
+            ],
+          }),
+        }),
+      );
+    });
+
+    it("serves prefetched descriptors without another request", async () => {
+      const fetchSpy = vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        new Response(
+          JSON.stringify({
+            results: [
+              {
+                path: "v2/solana/alt-resolution/alt/1?commitment=finalized",
+                status: 200,
+                data: { signedDescriptor: "resigned" },
+              },
+            ],
+          }),
+        ),
+      );
+      await interceptor.prefetchDynamicDescriptors([ALT_URL]);
+
+      interceptor.start();
+      const response = await fetch(ALT_URL);
+
+      expect(await response.json()).toStrictEqual({
+        signedDescriptor: "resigned",
+      });
+      expect(fetchSpy).toHaveBeenCalledTimes(1);
+    });
+
+    it("does nothing without dynamic descriptor URLs", async () => {
+      const fetchSpy = vi.spyOn(globalThis, "fetch");
+
+      await expect(
+        interceptor.prefetchDynamicDescriptors([
+          "https://crypto-assets-service.example.com/cal/dapps",
+        ]),
+      ).resolves.toBe(0);
+      expect(fetchSpy).not.toHaveBeenCalled();
+    });
+
+    it("refetches prefetched descriptors once they expire", async () => {
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(
+          batchResponse("v2/solana/alt-resolution/alt/1?commitment=finalized"),
+        )
+        .mockResolvedValueOnce(new Response('{"signedDescriptor":"fresh"}'));
+      const now = Date.now();
+      vi.spyOn(Date, "now").mockReturnValue(now);
+      await interceptor.prefetchDynamicDescriptors([ALT_URL]);
+
+      vi.spyOn(Date, "now").mockReturnValue(now + 30_000);
+      interceptor.start();
+      const response = await fetch(ALT_URL);
+
+      expect(await response.json()).toStrictEqual({
+        signedDescriptor: "fresh",
+      });
+      expect(fetchSpy).toHaveBeenLastCalledWith(
+        "https://metadata.example.com/api/dynamic-descriptor-proxy/v2/solana/alt-resolution/alt/1?commitment=finalized",
+      );
+    });
+
+    it("keeps a bounded number of prefetched descriptors", async () => {
+      const paths = Array.from(
+        { length: 257 },
+        (_, index) => `v2/solana/token-account-state/account${index}`,
+      );
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(batchResponse(...paths.slice(0, 256)))
+        .mockResolvedValueOnce(batchResponse(...paths.slice(256)))
+        .mockResolvedValueOnce(new Response('{"signedDescriptor":"again"}'));
+      await expect(
+        interceptor.prefetchDynamicDescriptors(
+          paths.map((path) => `https://metadata.example.com/${path}`),
+        ),
+      ).resolves.toBe(257);
+
+      interceptor.start();
+      // The oldest entry was evicted, the newest is still served
+      await fetch(`https://metadata.example.com/${paths[256]}`);
+      expect(fetchSpy).toHaveBeenCalledTimes(2);
+      await fetch(`https://metadata.example.com/${paths[0]}`);
+      expect(fetchSpy).toHaveBeenCalledTimes(3);
+    });
+
+    it("throws when the batch request fails", async () => {
+      vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        new Response("", { status: 503 }),
+      );
+
+      await expect(
+        interceptor.prefetchDynamicDescriptors([ALT_URL]),
+      ).rejects.toThrow("Failed to prefetch dynamic descriptors: HTTP 503");
+    });
+  });
+
+  describe("dynamic descriptor requests", () => {
+    it("batches concurrent requests into one proxy request", async () => {
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(
+          batchResponse(
+            "v2/solana/alt-resolution/alt/1?commitment=finalized",
+            "v2/solana/token-account-state/account",
+          ),
+        );
+      interceptor.start();
+
+      const responses = await Promise.all([
+        fetch(ALT_URL),
+        fetch(TOKEN_URL),
+        fetch(ALT_URL),
+      ]);
+
+      expect(fetchSpy).toHaveBeenCalledTimes(1);
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "https://metadata.example.com/api/dynamic-descriptor-proxy-batch",
+        expect.objectContaining({
+          body: JSON.stringify({
+            paths: [
+              "v2/solana/alt-resolution/alt/1?commitment=finalized",
+              "v2/solana/token-account-state/account",
+            ],
+          }),
+        }),
+      );
+      expect(
+        await Promise.all(responses.map((response) => response.json())),
+      ).toStrictEqual([
+        {
+          signedDescriptor:
+            "v2/solana/alt-resolution/alt/1?commitment=finalized",
+        },
+        { signedDescriptor: "v2/solana/token-account-state/account" },
+        {
+          signedDescriptor:
+            "v2/solana/alt-resolution/alt/1?commitment=finalized",
+        },
+      ]);
+    });
+
+    it("fetches a lone request through the single-path proxy", async () => {
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(new Response('{"signedDescriptor":"alone"}'));
+      interceptor.start();
+
+      const response = await fetch(TOKEN_URL);
+
+      expect(await response.json()).toStrictEqual({
+        signedDescriptor: "alone",
+      });
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "https://metadata.example.com/api/dynamic-descriptor-proxy/v2/solana/token-account-state/account",
+      );
+    });
+  });
+});
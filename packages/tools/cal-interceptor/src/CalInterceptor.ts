@@ -21,6 +21,65 @@ const DYNAMIC_DESCRIPTOR_PATHS = [
  */
 const DYNAMIC_DESCRIPTOR_PROXY_PREFIX = "/api/dynamic-descriptor-proxy";
 
+/**
+ * Batched variant of the re-signing proxy: resolves many dynamic descriptor
+ * paths in a single round trip.
+ */
+const DYNAMIC_DESCRIPTOR_PROXY_BATCH_PATH =
+  "/api/dynamic-descriptor-proxy-batch";
+
+/**
+ * Dynamic descriptor requests intercepted within this window are resolved
+ * together, in one batched proxy request
+ */
+const DYNAMIC_DESCRIPTOR_BATCH_WINDOW_MS = 10;
+
+/**
+ * Most paths sent in one batched proxy request (the proxy's default
+ * DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS)
+ */
+const DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS = 256;
+
+/**
+ * Prefetched dynamic descriptors are served for this long (the proxy's default
+ * DYNAMIC_DESCRIPTOR_CACHE_TTL), and at most this many are kept
+ */
+const DYNAMIC_DESCRIPTOR_PREFETCH_TTL_MS = 30_000;
+const DYNAMIC_DESCRIPTOR_PREFETCH_MAX_ENTRIES = 256;
+
+interface DynamicDescriptorBatchResult {
+  path: string;
+  status: number;
+  data?: unknown;
+  error?: string;
+}
+
+interface PendingDynamicDescriptor {
+  url: URL;
+  waiters: {
+    resolve: (body: string) => void;
+    reject: (error: unknown) => void;
+  }[];
+}
+
+/**
+ * Metadata-service pathname + search of a dynamic descriptor URL, as keyed in
+ * the prefetched descriptors
+ */
+function dynamicDescriptorKey(url: URL): string {
+  return `${url.pathname}${url.search}`;
+}
+
+/**
+ * Body served for one batch result: the re-signed descriptor, or the error
+ * body the single-path proxy would have returned
+ */
+function dynamicDescriptorBody(result: DynamicDescriptorBatchResult): string {
+  return JSON.stringify(
+    result.status === 200 ? result.data : { error: result.error },
+  );
+}
+
 /**
  * CAL Interceptor - intercepts CAL (Crypto Assets List) API calls
  * and returns locally stored descriptors when available
@@ -28,6 +87,22 @@ const DYNAMIC_DESCRIPTOR_PROXY_PREFIX = "/api/dynamic-descriptor-proxy";
 export class CalInterceptor {
   private readonly interceptor: FetchInterceptor;
   private readonly storage: StorageInterface;
+  /**
+   * Re-signed dynamic descriptor bodies fetched ahead of time and when they
+   * expire, keyed by metadata-service pathname + search, oldest first
+   */
+  private readonly prefetchedDynamicDescriptors = new Map<
+    string,
+    { body: string; expiresAt: number }
+  >();
+  /**
+   * Dynamic descriptor requests waiting for the next batch, by key
+   */
+  private pendingDynamicDescriptors = new Map<
+    string,
+    PendingDynamicDescriptor
+  >();
+  private dynamicDescriptorBatchTimer?: ReturnType<typeof setTimeout>;
 
   constructor(storage?: StorageInterface) {
     // Default to in-memory storage for environment-agnostic behavior
@@ -134,6 +209,7 @@ export class CalInterceptor {
   clearStoredDescriptors(): void {
     try {
       this.storage.clear();
+      this.prefetchedDynamicDescriptors.clear();
       console.log("Cleared all stored descriptors and certificates");
     } catch (error) {
       console.error("Failed to clear descriptors:", error);
@@ -148,6 +224,53 @@ export class CalInterceptor {
     return Object.keys(descriptors).length;
   }
 
+  /**
+   * Resolve many dynamic descriptors (ALT resolution, token account state, ...)
+   * through the batched re-signing proxy in one round trip. Intercepted
+   * requests for these URLs are served from the prefetched results for
+   * DYNAMIC_DESCRIPTOR_PREFETCH_TTL_MS. Optional: concurrent intercepted
+   * requests are batched anyway.
+   * @param urls - Metadata-service URLs the device flow is going to request
+   * @returns Number of descriptors successfully prefetched
+   */
+  async prefetchDynamicDescriptors(urls: string[]): Promise<number> {
+    const parsedUrls = urls
+      .map((url) => new URL(url))
+      .filter((parsedUrl) =>
+        DYNAMIC_DESCRIPTOR_PATHS.some((path) =>
+          parsedUrl.pathname.startsWith(path),
+        ),
+      );
+    if (parsedUrls.length === 0) {
+      return 0;
+    }
+
+    let count = 0;
+    for (
+      let start = 0;
+      start < parsedUrls.length;
+      start += DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS
+    ) {
+      const chunk = parsedUrls.slice(
+        start,
+        start + DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS,
+      );
+      const results = await this.fetchDynamicDescriptorBatch(chunk);
+      results.forEach((result, index) => {
+        const parsedUrl = chunk[index];
+        if (parsedUrl && result.status === 200) {
+          this.storePrefetchedDynamicDescriptor(
+            dynamicDescriptorKey(parsedUrl),
+            dynamicDescriptorBody(result),
+          );
+          count++;
+        }
+      });
+    }
+    console.log(`Prefetched ${count} dynamic descriptors via re-signing proxy`);
+    return count;
+  }
+
   /**
    * Modify CAL response - called by interceptor
    * Returns modified response or null to pass through
@@ -251,17 +374,137 @@ export class CalInterceptor {
       return null;
     }
 
-    const base =
-      typeof globalThis.location !== "undefined"
-        ? globalThis.location.origin
-        : parsedUrl.origin;
-    const proxyUrl = new URL(
-      `${DYNAMIC_DESCRIPTOR_PROXY_PREFIX}${parsedUrl.pathname}${parsedUrl.search}`,
-      base,
-    ).toString();
-
-    console.log(`Fetching ${parsedUrl.pathname} via re-signing proxy`);
-    const response = await fetch(proxyUrl);
-    return response.text();
+    const key = dynamicDescriptorKey(parsedUrl);
+    const prefetched = this.prefetchedDynamicDescriptors.get(key);
+    if (prefetched !== undefined) {
+      if (prefetched.expiresAt > Date.now()) {
+        console.log(`Serving prefetched ${parsedUrl.pathname}`);
+        return prefetched.body;
+      }
+      this.prefetchedDynamicDescriptors.delete(key);
+    }
+
+    // Wait for the batch window, so concurrent requests share a round trip
+    return new Promise<string>((resolve, reject) => {
+      const pending = this.pendingDynamicDescriptors.get(key) ?? {
+        url: parsedUrl,
+        waiters: [],
+      };
+      pending.waiters.push({ resolve, reject });
+      this.pendingDynamicDescriptors.set(key, pending);
+      if (
+        this.pendingDynamicDescriptors.size >=
+        DYNAMIC_DESCRIPTOR_BATCH_MAX_ITEMS
+      ) {
+        void this.flushDynamicDescriptors();
+      } else if (this.dynamicDescriptorBatchTimer === undefined) {
+        this.dynamicDescriptorBatchTimer = setTimeout(
+          () => void this.flushDynamicDescriptors(),
+          DYNAMIC_DESCRIPTOR_BATCH_WINDOW_MS,
+        );
+      }
+    });
+  }
+
+  /**
+   * Resolve the pending dynamic descriptor requests: through the single-path
+   * proxy when there is only one, else in one batched proxy request
+   */
+  private async flushDynamicDescriptors(): Promise<void> {
+    clearTimeout(this.dynamicDescriptorBatchTimer);
+    this.dynamicDescriptorBatchTimer = undefined;
+    const pending = [...this.pendingDynamicDescriptors.values()];
+    this.pendingDynamicDescriptors = new Map();
+
+    try {
+      let bodies: string[];
+      if (pending.length === 1) {
+        const { url } = pending[0]!;
+        const proxyUrl = new URL(
+          `${DYNAMIC_DESCRIPTOR_PROXY_PREFIX}${dynamicDescriptorKey(url)}`,
+          this.proxyBase(url),
+        ).toString();
+        console.log(`Fetching ${url.pathname} via re-signing proxy`);
+        const response = await fetch(proxyUrl);
+        bodies = [await response.text()];
+      } else {
+        console.log(
+          `Fetching ${pending.length} dynamic descriptors via re-signing proxy`,
+        );
+        const results = await this.fetchDynamicDescriptorBatch(
+          pending.map(({ url }) => url),
+        );
+        bodies = results.map(dynamicDescriptorBody);
+      }
+      pending.forEach(({ waiters }, index) => {
+        const body = bodies[index] ?? JSON.stringify({ error: "No result" });
+        waiters.forEach(({ resolve }) => resolve(body));
+      });
+    } catch (error) {
+      pending.forEach(({ waiters }) =>
+        waiters.forEach(({ reject }) => reject(error)),
+      );
+    }
+  }
+
+  /**
+   * Resolve dynamic descriptor URLs in one request to the batched proxy
+   */
+  private async fetchDynamicDescriptorBatch(
+    urls: URL[],
+  ): Promise<DynamicDescriptorBatchResult[]> {
+    const response = await fetch(
+      new URL(
+        DYNAMIC_DESCRIPTOR_PROXY_BATCH_PATH,
+        this.proxyBase(urls[0]!),
+      ).toString(),
+      {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          paths: urls.map((url) => dynamicDescriptorKey(url).slice(1)),
+        }),
+      },
+    );
+    if (!response.ok) {
+      throw new Error(
+        `Failed to prefetch dynamic descriptors: HTTP ${response.status}`,
+      );
+    }
+    const { results } = (await response.json()) as {
+      results: DynamicDescriptorBatchResult[];
+    };
+    return results;
+  }
+
+  /**
+   * Keep a prefetched body for DYNAMIC_DESCRIPTOR_PREFETCH_TTL_MS, evicting the
+   * oldest entries beyond DYNAMIC_DESCRIPTOR_PREFETCH_MAX_ENTRIES
+   */
+  private storePrefetchedDynamicDescriptor(key: string, body: string): void {
+    this.prefetchedDynamicDescriptors.delete(key);
+    this.prefetchedDynamicDescriptors.set(key, {
+      body,
+      expiresAt: Date.now() + DYNAMIC_DESCRIPTOR_PREFETCH_TTL_MS,
+    });
+    for (const oldest of this.prefetchedDynamicDescriptors.keys()) {
+      if (
+        this.prefetchedDynamicDescriptors.size <=
+        DYNAMIC_DESCRIPTOR_PREFETCH_MAX_ENTRIES
+      ) {
+        break;
+      }
+      this.prefetchedDynamicDescriptors.delete(oldest);
+    }
+  }
+
+  /**
+   * Origin of the re-signing proxy: the sample app's own when running in a
+   * browser, else the intercepted URL's
+   */
+  private proxyBase(url: URL): string {
+    return typeof globalThis.location !== "undefined"
+      ? globalThis.location.origin
+      : url.origin;
   }
 }
@@ -0,0 +1,275 @@
+import { ERC7730Client, expandCompactDescriptors } from "./ERC7730Client";
+
+const GROUP = [
+  {
+    descriptors_calldata: {
+      "0xabc": {
+        "0x01": { data: "0a0b", signatures: { test: "3045", prod: "3045" } },
+      },
+    },
+  },
+];
+
+const COMPACT_GROUP = [
+  {
+    descriptors_calldata: {
+      "0xabc": {
+        "0x01": { data: { $bytes: "Cgs=" }, signatures: { $bytes: "MEU=" } },
+      },
+    },
+  },
+];
+
+function jsonResponse(body: unknown, status = 200): Response {
+  return new Response(JSON.stringify(body), {
+    status,
+    headers: { "Content-Type": "application/json" },
+  });
+}
+
+function ndjsonLines(records: unknown[]): string {
+  return records.map((record) => `${JSON.stringify(record)}\n`).join("");
+}
+
+function ndjsonResponse(chunks: string[]): Response {
+  const encoder = new TextEncoder();
+  const stream = new ReadableStream<Uint8Array>({
+    start(controller) {
+      chunks.forEach((chunk) => controller.enqueue(encoder.encode(chunk)));
+      controller.close();
+    },
+  });
+  return new Response(stream, {
+    headers: { "Content-Type": "application/x-ndjson" },
+  });
+}
+
+async function collect<T>(iterable: AsyncIterable<T>): Promise<T[]> {
+  const items: T[] = [];
+  for await (const item of iterable) {
+    items.push(item);
+  }
+  return items;
+}
+
+describe("expandCompactDescriptors", () => {
+  it("expands deduplicated signatures and base64 payloads", () => {
+    expect(
+      expandCompactDescriptors({
+        format: "compact-v1",
+        message: "ok",
+        descriptors: { "1:0xabc": COMPACT_GROUP },
+      }),
+    ).toStrictEqual({ message: "ok", descriptors: { "1:0xabc": GROUP } });
+  });
+
+  it("keeps the case of hex strings sent as-is", () => {
+    const group = [
+      {
+        descriptors_calldata: {
+          "0xabc": { "0x01": { data: "0A0B", signatures: "3045" } },
+        },
+      },
+    ];
+    expect(
+      expandCompactDescriptors({
+        format: "compact-v1",
+        descriptors: { "1:0xabc": group },
+      }),
+    ).toStrictEqual({
+      descriptors: {
+        "1:0xabc": [
+          {
+            descriptors_calldata: {
+              "0xabc": {
+                "0x01": {
+                  data: "0A0B",
+                  signatures: { test: "3045", prod: "3045" },
+                },
+              },
+            },
+          },
+        ],
+      },
+    });
+  });
+
+  it("returns regular responses as-is", () => {
+    const response = { descriptors: { "1:0xabc": GROUP } };
+    expect(expandCompactDescriptors(response)).toBe(response);
+  });
+});
+
+describe("ERC7730Client", () => {
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  describe("processDescriptor", () => {
+    it("requests and expands the compact format", async () => {
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(
+          jsonResponse({
+            format: "compact-v1",
+            descriptors: { "1:0xabc": COMPACT_GROUP },
+          }),
+        );
+      const client = new ERC7730Client({
+        baseUrl: "http://api",
+        compact: true,
+      });
+
+      const result = await client.processDescriptor({ context: {} });
+
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "http://api/api/process-erc7730-descriptor?format=compact&bytes=base64",
+        expect.objectContaining({ method: "POST", body: '{"context":{}}' }),
+      );
+      expect(result).toStrictEqual({ descriptors: { "1:0xabc": GROUP } });
+    });
+
+    it("throws on HTTP errors", async () => {
+      vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        new Response("Missing deployments", { status: 400 }),
+      );
+
+      await expect(
+        new ERC7730Client().processDescriptor("{}"),
+      ).rejects.toThrow("HTTP 400: Missing deployments");
+    });
+  });
+
+  describe("processDescriptorStream", () => {
+    it("yields each group, across chunk boundaries", async () => {
+      const records = ndjsonLines([
+        { type: "group", key: "1:0xabc", descriptors: GROUP },
+        {
+          type: "group",
+          key: "10:0xabc",
+          format: "compact-v1",
+          descriptors: COMPACT_GROUP,
+        },
+        { type: "trailer", groups: 2 },
+      ]);
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(
+          ndjsonResponse([records.slice(0, 25), records.slice(25)]),
+        );
+
+      const groups = await collect(
+        new ERC7730Client().processDescriptorStream({ context: {} }),
+      );
+
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "/api/process-erc7730-descriptor",
+        expect.objectContaining({
+          headers: expect.objectContaining({ Accept: "application/x-ndjson" }),
+        }),
+      );
+      expect(groups).toStrictEqual([
+        { key: "1:0xabc", descriptors: GROUP },
+        { key: "10:0xabc", descriptors: GROUP },
+      ]);
+    });
+
+    it("throws the error reported in the trailer", async () => {
+      vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        ndjsonResponse([
+          ndjsonLines([
+            { type: "group", key: "1:0xabc", descriptors: GROUP },
+            {
+              type: "trailer",
+              groups: 1,
+              status: 400,
+              error: "Invalid selector",
+            },
+          ]),
+        ]),
+      );
+
+      await expect(
+        collect(new ERC7730Client().processDescriptorStream({})),
+      ).rejects.toThrow("HTTP 400: Invalid selector");
+    });
+
+    it("throws when the stream ends without a trailer", async () => {
+      vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        ndjsonResponse([
+          ndjsonLines([{ type: "group", key: "1:0xabc", descriptors: GROUP }]),
+        ]),
+      );
+
+      await expect(
+        collect(new ERC7730Client().processDescriptorStream({})),
+      ).rejects.toThrow("Descriptor stream ended without a trailer");
+    });
+  });
+
+  describe("processDescriptors", () => {
+    it("posts every descriptor as one array", async () => {
+      const response = {
+        message: "Processed 1 of 2 ERC7730 descriptors",
+        descriptors: { "1:0xabc": GROUP },
+        errors: [{ index: 1, status: 400, error: "Missing deployments" }],
+      };
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(jsonResponse(response));
+
+      const result = await new ERC7730Client().processDescriptors([
+        '{"a":1}',
+        { b: 2 },
+      ]);
+
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "/api/process-erc7730-descriptors",
+        expect.objectContaining({ body: '[{"a":1},{"b":2}]' }),
+      );
+      expect(result).toStrictEqual(response);
+    });
+  });
+
+  describe("fetchStoredDescriptors", () => {
+    it("looks up a single item", async () => {
+      const fetchSpy = vi
+        .spyOn(globalThis, "fetch")
+        .mockResolvedValueOnce(
+          jsonResponse({ descriptors: { "1:0xabc": GROUP } }),
+        );
+
+      const result = await new ERC7730Client({
+        baseUrl: "http://api",
+      }).fetchStoredDescriptors(1, "0xabc", "0x01");
+
+      expect(fetchSpy).toHaveBeenCalledWith(
+        "http://api/api/descriptors/1/0xabc/0x01",
+      );
+      expect(result).toStrictEqual({ descriptors: { "1:0xabc": GROUP } });
+    });
+
+    it("returns null when nothing is stored", async () => {
+      vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        jsonResponse({ error: "No descriptors for 1:0xabc" }, 404),
+      );
+
+      await expect(
+        new ERC7730Client().fetchStoredDescriptors(1, "0xabc"),
+      ).resolves.toBeNull();
+    });
+
+    it("throws when no store is configured", async () => {
+      vi.spyOn(globalThis, "fetch").mockResolvedValueOnce(
+        jsonResponse(
+          { error: "No precompiled descriptor store configured" },
+          503,
+        ),
+      );
+
+      await expect(
+        new ERC7730Client().fetchStoredDescriptors(1, "0xabc"),
+      ).rejects.toThrow("HTTP 503");
+    });
+  });
+});
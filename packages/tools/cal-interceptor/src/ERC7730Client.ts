@@ -6,12 +6,98 @@ export interface ProcessedDescriptors {
   descriptors: Record<string, unknown>;
 }
 
+export interface ProcessedDescriptorsBatch extends ProcessedDescriptors {
+  /**
+   * Per-item failures, indexed by position in the submitted array
+   */
+  errors: { index: number; status: number; error: string }[];
+}
+
+/**
+ * One "chainId:address" group of a streamed descriptor processing response
+ */
+export interface ProcessedDescriptorGroup {
+  key: string;
+  descriptors: unknown[];
+}
+
+interface StreamRecord {
+  type: "group" | "trailer";
+  key?: string;
+  descriptors?: unknown[];
+  format?: string;
+  status?: number;
+  error?: string;
+}
+
 export interface ERC7730ClientConfig {
   /**
    * Base URL for the API
    * @default "" (uses same origin)
    */
   baseUrl?: string;
+  /**
+   * Request the compact response format (deduplicated signatures, base64
+   * payloads); responses are expanded back to the regular shape
+   * @default false
+   */
+  compact?: boolean;
+}
+
+const COMPACT_FORMAT = "compact-v1";
+const COMPACT_QUERY = "format=compact&bytes=base64";
+
+/**
+ * Lowercase hex of a base64 `$bytes` payload (the API only sends lowercase hex
+ * payloads as `$bytes`, other hex strings are sent as-is)
+ */
+function base64ToHex(value: string): string {
+  const binary = atob(value);
+  let hex = "";
+  for (let i = 0; i < binary.length; i++) {
+    hex += binary.charCodeAt(i).toString(16).padStart(2, "0");
+  }
+  return hex;
+}
+
+function expandCompactValue(value: unknown, key?: string): unknown {
+  if (Array.isArray(value)) {
+    return value.map((item) => expandCompactValue(item));
+  }
+  if (value !== null && typeof value === "object") {
+    const record = value as Record<string, unknown>;
+    const keys = Object.keys(record);
+    if (keys.length === 1 && typeof record["$bytes"] === "string") {
+      return expandCompactValue(base64ToHex(record["$bytes"]), key);
+    }
+    return Object.fromEntries(
+      keys.map((childKey) => [
+        childKey,
+        expandCompactValue(record[childKey], childKey),
+      ]),
+    );
+  }
+  if (key === "signatures" && typeof value === "string") {
+    return { test: value, prod: value };
+  }
+  return value;
+}
+
+/**
+ * Expand a compact-format response (see the API's `?format=compact`) back to
+ * the regular processed descriptors shape; other responses are returned as-is
+ */
+export function expandCompactDescriptors<T extends ProcessedDescriptors>(
+  response: T & { format?: string },
+): T {
+  if (response.format !== COMPACT_FORMAT) {
+    return response;
+  }
+  const { format: _format, ...rest } = response;
+  return {
+    ...rest,
+    descriptors: expandCompactValue(response.descriptors),
+  } as T;
 }
 
 /**
@@ -19,9 +105,17 @@ export interface ERC7730ClientConfig {
  */
 export class ERC7730Client {
   private baseUrl: string;
+  private compact: boolean;
 
   constructor(config: ERC7730ClientConfig = {}) {
     this.baseUrl = config.baseUrl || "";
+    this.compact = config.compact ?? false;
+  }
+
+  private url(path: string): string {
+    return this.compact
+      ? `${this.baseUrl}${path}?${COMPACT_QUERY}`
+      : `${this.baseUrl}${path}`;
   }
 
   /**
@@ -37,23 +131,138 @@ export class ERC7730Client {
         ? erc7730Descriptor
         : JSON.stringify(erc7730Descriptor);
 
-    const response = await fetch(
-      `${this.baseUrl}/api/process-erc7730-descriptor`,
-      {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body,
+    const response = await fetch(this.url("/api/process-erc7730-descriptor"), {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
       },
+      body,
+    });
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`HTTP ${response.status}: ${errorText}`);
+    }
+
+    return expandCompactDescriptors(await response.json());
+  }
+
+  /**
+   * Process an ERC7730 descriptor, yielding each "chainId:address" group as
+   * soon as the server has signed it (NDJSON response). A later group with the
+   * same key replaces an earlier one.
+   * @param erc7730Descriptor - ERC7730 descriptor (JSON string or object)
+   */
+  async *processDescriptorStream(
+    erc7730Descriptor: string | object,
+  ): AsyncGenerator<ProcessedDescriptorGroup> {
+    const body =
+      typeof erc7730Descriptor === "string"
+        ? erc7730Descriptor
+        : JSON.stringify(erc7730Descriptor);
+
+    const response = await fetch(this.url("/api/process-erc7730-descriptor"), {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Accept: "application/x-ndjson",
+      },
+      body,
+    });
+
+    if (!response.ok || !response.body) {
+      const errorText = await response.text();
+      throw new Error(`HTTP ${response.status}: ${errorText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = "";
+    let done = false;
+    while (!done) {
+      const chunk = await reader.read();
+      done = chunk.done;
+      buffered += decoder.decode(chunk.value, { stream: !done });
+      const lines = buffered.split("\n");
+      buffered = lines.pop() ?? "";
+      for (const line of lines.filter((entry) => entry.trim())) {
+        const record = JSON.parse(line) as StreamRecord;
+        if (record.type === "trailer") {
+          if (record.error !== undefined) {
+            throw new Error(`HTTP ${record.status}: ${record.error}`);
+          }
+          return;
+        }
+        yield {
+          key: record.key as string,
+          descriptors: (record.format === COMPACT_FORMAT
+            ? expandCompactValue(record.descriptors)
+            : record.descriptors) as unknown[],
+        };
+      }
+    }
+    throw new Error("Descriptor stream ended without a trailer");
+  }
+
+  /**
+   * Process several ERC7730 descriptors in a single request
+   * @param erc7730Descriptors - ERC7730 descriptors (JSON strings or objects)
+   * @returns Merged processed descriptors keyed by "chainId:address" and per-item errors
+   */
+  async processDescriptors(
+    erc7730Descriptors: (string | object)[],
+  ): Promise<ProcessedDescriptorsBatch> {
+    const body = JSON.stringify(
+      erc7730Descriptors.map((descriptor) =>
+        typeof descriptor === "string" ? JSON.parse(descriptor) : descriptor,
+      ),
     );
 
+    const response = await fetch(this.url("/api/process-erc7730-descriptors"), {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body,
+    });
+
     if (!response.ok) {
       const errorText = await response.text();
       throw new Error(`HTTP ${response.status}: ${errorText}`);
     }
 
-    return await response.json();
+    return expandCompactDescriptors(await response.json());
+  }
+
+  /**
+   * Look up precompiled descriptors of a contract, optionally reduced to a
+   * single calldata selector or EIP-712 schema hash
+   * @param chainId - Chain id of the contract
+   * @param address - Contract address
+   * @param item - Selector or schema hash
+   * @returns Processed descriptors keyed by "chainId:address", or null when none are stored
+   */
+  async fetchStoredDescriptors(
+    chainId: number | string,
+    address: string,
+    item?: string,
+  ): Promise<ProcessedDescriptors | null> {
+    const path = [chainId, address, item]
+      .filter((part) => part !== undefined)
+      .map((part) => encodeURIComponent(String(part)))
+      .join("/");
+
+    const response = await fetch(this.url(`/api/descriptors/${path}`));
+
+    if (response.status === 404) {
+      return null;
+    }
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`HTTP ${response.status}: ${errorText}`);
+    }
+
+    return expandCompactDescriptors(await response.json());
   }
 
   /**
@@ -5,9 +5,11 @@ export {
 export { CalInterceptor } from "./CalInterceptor";
 export type {
   ERC7730ClientConfig,
+  ProcessedDescriptorGroup,
   ProcessedDescriptors,
+  ProcessedDescriptorsBatch,
 } from "./ERC7730Client";
-export { ERC7730Client } from "./ERC7730Client";
+export { ERC7730Client, expandCompactDescriptors } from "./ERC7730Client";
 export type { AddERC7730Options, AddERC7730Result } from "./ERC7730Helper";
 export {
   addERC7730Descriptor,